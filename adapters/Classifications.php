@@ -1,176 +1,180 @@
 <?php
+/**
+ * @adapter_key classifications
+ * @entity classifications
+ * @modes insert
+ * @headers parent_id, name
+ */
 error_reporting(E_ALL);
 ini_set('display_errors', 1);
 fwrite(STDERR, "🛠 Classifications adapter started (supports postcodes, stakeholder groups, distribution lists and more)\n");
+require_once __DIR__ . "/lib/csv_stream.php";
 
 // === Input Path ===
 $inputPath = trim($argv[1] ?? '', " \t\n\r\0\x0B\"'");
-if (!is_readable($inputPath)) {
-    echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
-    exit(1);
-}
-
-// === Load CSV ===
-$lines = file($inputPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-fwrite(STDERR, "📦 Php file read:\n");
-
-if (count($lines) < 2) {
-    echo json_encode(["error" => "CSV file is empty or malformed"]);
-    exit(1);
-}
+$fh = open_csv_input($inputPath);
 
 // === Header Mapping ===
+// "id" is an optional local id: children may name it in parent_id instead of an existing classification ID
 $headerMap = [
+    "id"          => "id",
     "parent_id"   => "parent_id",
     "name"        => "name",
     "description" => "description",
     "header"      => "header",
 ];
+$required = ["parent_id", "name"];
 
 // === Normalize Header ===
-$rawHeader = array_map('trim', str_getcsv(array_shift($lines), ",", '"', "\\"));
-$rawHeader[0] = preg_replace('/^\xEF\xBB\xBF/', '', $rawHeader[0]); // Strip BOM
-$normalizedHeader = array_map(fn($col) => $headerMap[$col] ?? $col, $rawHeader);
+$rawHeader = read_csv_header($fh);
+$normalizedHeader = normalize_header($rawHeader, $headerMap);
+$dataStart = ftell($fh);
 
 // === Validate Columns ===
 fwrite(STDERR, "🧾 Raw header: " . implode(", ", $rawHeader) . "\n");
-$expected = array_values($headerMap);
-$missing = array_diff($expected, $normalizedHeader);
+$missing = array_diff($required, $normalizedHeader);
 if ($missing) {
-    echo json_encode(["error" => "Missing columns", "missing" => $missing]);
+    echo json_encode(["error" => "Missing columns", "missing" => array_values($missing)]);
     exit(1);
 }
 
+// === Local Hierarchy ===
+// Local ids present in the file, and which of them are referenced as parents.
+// A first pass over the file; only the ids are kept
+$localIds = [];
+$referencedParents = [];
+if (in_array("id", $normalizedHeader, true)) {
+    foreach (csv_rows($fh) as $cells) {
+        if (count($cells) !== count($normalizedHeader)) continue;
+        $cellRow = array_combine($normalizedHeader, $cells);
+        if ($cellRow["id"] !== "") $localIds[$cellRow["id"]] = true;
+        if ($cellRow["parent_id"] !== "") $referencedParents[$cellRow["parent_id"]] = true;
+    }
+    fseek($fh, $dataStart);
+}
+
+// === Output setup ===
+$adapterName = "classifications";
+[$fp, $auditFile] = open_audit_log($adapterName, ["rowIndex", "name", "parent_id", "description", "header", "message", "result"]);
+$out = open_output(["adapter_key" => "classifications"], report_file("payload_" . $adapterName, "json"));
+$resultCounts = ["Success" => 0, "Skipped" => 0, "Error" => 0];
+
+// Each record goes out as soon as it is built, with its audit row
+function emit_classification(array &$out, $fp, array &$resultCounts, array $record) {
+    $meta = $record["meta"];
+    if (!emit_record($out, $record)) {
+        $meta["result"] = "Skipped";
+        $meta["message"] = "JSON encoding failed";
+    }
+    $resultCounts[$meta["result"]]++;
+    audit_row($fp, [
+        $meta["rowIndex"] ?? "",
+        $meta["name"] ?? "",
+        $meta["parent_id"] ?? "",
+        $meta["description"] ?? "",
+        $meta["header"] ?? "",
+        $meta["message"] ?? "",
+        $meta["result"] ?? "Success"
+    ]);
+}
+
 // === Build Records ===
-$records = [];
-foreach ($lines as $index => $line) {
+foreach (csv_rows($fh) as $rowIndex => $fields) {
+    // The parsed cells stand in for the source line, which may span several lines
+    $line = implode(",", $fields);
     try {
-        $row = array_combine($normalizedHeader, array_map('trim', str_getcsv($line, ",", '"', "\\")));
+        $row = array_combine($normalizedHeader, $fields);
         if (!$row) {
             fwrite(STDERR, "⚠️ Skipping malformed row: " . $line . "\n");
-            $records[] = ["values" => [], "meta" => [
-                "rowIndex"     => $index + 2,
+            emit_classification($out, $fp, $resultCounts, ["values" => [], "meta" => [
+                "rowIndex"     => $rowIndex,
                 "adapter_name" => basename(__FILE__, ".php"),
                 "raw"          => $line,
                 "result"       => "Skipped",
                 "message"      => "Malformed row"
-            ]];
+            ]]);
             continue;
         }
         if (!isset($row["name"]) || trim($row["name"]) === "") {
             fwrite(STDERR, "⚠️ Skipping row with empty name: " . json_encode($row) . "\n");
-            $records[] = ["values" => [], "meta" => [
-                "rowIndex"     => $index + 2,
+            emit_classification($out, $fp, $resultCounts, ["values" => [], "meta" => [
+                "rowIndex"     => $rowIndex,
                 "adapter_name" => basename(__FILE__, ".php"),
                 "raw"          => $line,
                 "result"       => "Skipped",
                 "message"      => "Empty name"
-            ]];
+            ]]);
             continue;
         }
 
         // remove the characters not allowed in this cell ie.  /,:;
         $row["name"] = preg_replace('/[\/:;]/', '', $row["name"]);
 
-        // Normalize classificationType
-        $classificationType = (strtoupper($row["header"]) === "TRUE") ? 1 : 2;
+        $sourceId = $row["id"] ?? "";
+        $parentIsLocal = $row["parent_id"] !== "" && isset($localIds[$row["parent_id"]]);
+
+        // Normalize classificationType; without a header column, rows that have children are headings
+        if (isset($row["header"])) {
+            $classificationType = (strtoupper($row["header"]) === "TRUE") ? 1 : 2;
+        } else {
+            $classificationType = ($sourceId !== "" && isset($referencedParents[$sourceId])) ? 1 : 2;
+        }
 
         // Build record
-        $records[] = [
+        emit_classification($out, $fp, $resultCounts, [
             "values" => [
                 "classificationType" => $classificationType,
                 "dataVersion"        => 0,
                 "deleted"            => false,
-                "description"        => $row["description"] ?: null,
+                "description"        => ($row["description"] ?? "") ?: null,
                 "name"               => $row["name"],
-                "parentId"           => (int) $row["parent_id"]
+                // A local parent's ID is only known once it is created; the loader fills it in
+                "parentId"           => $parentIsLocal ? null : (int) $row["parent_id"]
             ],
             "meta" => [
-                "rowIndex"     => $index + 2,
-                "name"         => $row["name"],
-                "parent_id"    => $row["parent_id"],
-                "description"  => $row["description"] ?? "",
-                "header"       => $row["header"] ?? "",
-                "adapter_name" => basename(__FILE__, ".php"),
-                "raw"          => $line,
-                "result"       => "Success",
-                "message"      => ""
+                "rowIndex"      => $rowIndex,
+                "sourceId"      => $sourceId,
+                "parentLocalId" => $parentIsLocal ? $row["parent_id"] : "",
+                "name"          => $row["name"],
+                "parent_id"     => $row["parent_id"],
+                "description"   => $row["description"] ?? "",
+                "header"        => $row["header"] ?? "",
+                "adapter_name"  => basename(__FILE__, ".php"),
+                "raw"           => $line,
+                "result"        => "Success",
+                "message"       => ""
             ]
-        ];
+        ]);
     } catch (Throwable $e) {
-        $records[] = ["values" => [], "meta" => [
-            "rowIndex"     => $index + 2,
+        emit_classification($out, $fp, $resultCounts, ["values" => [], "meta" => [
+            "rowIndex"     => $rowIndex,
             "adapter_name" => basename(__FILE__, ".php"),
             "raw"          => $line,
             "result"       => "Error",
             "message"      => $e->getMessage()
-        ]];
+        ]]);
         continue;
     }
 }
-
-if (empty($records)) {
-    fwrite(STDERR, "❌ No valid records generated\n");
-    echo json_encode(["error" => "No valid records generated"]);
-    exit(1);
-}
-
-// === Emit Output ===
-$output = [
-    "recordCount" => count($records),
-    "generatedAt" => date("c"),
-    "adapter_key" => "classifications",
-    "records"     => $records
-];
-
-// === Output folder setup ===
-$adapterName = "classifications";
-$repoRoot    = dirname(__DIR__); // parent of current script folder
-$reportDir   = $repoRoot . "/auditreports";
-if (!is_dir($reportDir)) { mkdir($reportDir, 0777, true); }
-
-$timestamp   = date("Ymd_His");
-$auditFile   = $reportDir . "/migration_log_" . $adapterName . "_" . $timestamp . ".csv";
-$payloadFile = $reportDir . "/payload_" . $adapterName . "_" . $timestamp . ".json";
-
-// Write payload JSON
-file_put_contents($payloadFile, json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES));
-
-// === Write audit CSV ===
-$fp = fopen($auditFile, "w");
-fputcsv($fp, ["rowIndex", "name", "parent_id", "description", "header", "message", "result"], ",", '"', "\\");
-foreach ($records as $rec) {
-    fputcsv($fp, [
-        $rec["meta"]["rowIndex"] ?? "",
-        $rec["meta"]["name"] ?? "",
-        $rec["meta"]["parent_id"] ?? "",
-        $rec["meta"]["description"] ?? "",
-        $rec["meta"]["header"] ?? "",
-        $rec["meta"]["message"] ?? "",
-        $rec["meta"]["result"] ?? "Success"
-    ], ",", '"', "\\");
-}
+fclose($fh);
 fclose($fp);
 
+// === Finish Output ===
+close_output($out);
+
 // === Write summary CSV ===
-$summaryFile = $reportDir . "/migration_summary_" . $adapterName . "_" . $timestamp . ".csv";
+$summaryFile = report_file("migration_summary_" . $adapterName, "csv");
 $fpSummary   = fopen($summaryFile, "w");
-fputcsv($fpSummary, ["recordCount", "successCount", "skippedCount", "errorCount", "generatedAt"], ",", '"', "\\");
-$successCount = count(array_filter($records, fn($r) => ($r["meta"]["result"] ?? "") === "Success"));
-$skippedCount = count(array_filter($records, fn($r) => ($r["meta"]["result"] ?? "") === "Skipped"));
-$errorCount   = count(array_filter($records, fn($r) => ($r["meta"]["result"] ?? "") === "Error"));
-fputcsv($fpSummary, [
-    $output["recordCount"],
-    $successCount,
-    $skippedCount,
-    $errorCount,
-    $output["generatedAt"]
-], ",", '"', "\\");
+audit_row($fpSummary, ["recordCount", "successCount", "skippedCount", "errorCount", "generatedAt"]);
+audit_row($fpSummary, [
+    $out["count"],
+    $resultCounts["Success"],
+    $resultCounts["Skipped"],
+    $resultCounts["Error"],
+    date("c")
+]);
 fclose($fpSummary);
 
 fwrite(STDERR, "🧾 Summary written to $summaryFile\n");
-fwrite(STDERR, "🧾 Payload written to $payloadFile\n");
 fwrite(STDERR, "🧾 Audit log written to $auditFile\n");
-
-echo json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
-fwrite(STDERR, "✅ Adapter completed with {$output['recordCount']} records\n");
\ No newline at end of file
+fwrite(STDERR, "✅ Adapter completed with {$out['count']} records\n");
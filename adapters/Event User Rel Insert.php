@@ -1,7 +1,14 @@
 <?php
+/**
+ * @adapter_key event_user_relationship
+ * @entity eventUserRelationshipUpdate
+ * @modes insert, update
+ * @headers event, user
+ */
 error_reporting(E_ALL & ~E_DEPRECATED);
 ini_set('display_errors', 1);
 fwrite(STDERR, "🛠 EventUserRel Adapter started\n");
+require_once __DIR__ . "/lib/csv_stream.php";
 $endpointBase = getenv('ENDPOINT_BASE') ?: '';
 fwrite(STDERR, "🔗 Final endpointBase: $endpointBase\n");
 // === Helpers ===
@@ -14,29 +21,19 @@ $inputPath = trim($argv[1] ?? '', " \t\n\r\0\x0B\"'");
 $migrationType = strtolower(trim($argv[2] ?? 'insert'));
 fwrite(STDERR, "🔧 Migration mode: $migrationType\n");
 
-if (!is_readable($inputPath)) {
-    echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
-    exit(1);
-}
-
-// === Load CSV ===
-$lines = file($inputPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-if (count($lines) < 2) {
-    echo json_encode(["error" => "CSV file is empty or malformed"]);
-    exit(1);
-}
+// === Open CSV ===
+$fh = open_csv_input($inputPath);
 
 // === Normalize Header ===
-$rawHeader = array_map('trim', str_getcsv(array_shift($lines), ",", '"', "\\"));
-$rawHeader[0] = preg_replace('/^\xEF\xBB\xBF/', '', $rawHeader[0]); // Strip BOM
+$rawHeader = read_csv_header($fh);
 fwrite(STDERR, "🧾 Raw header: " . implode(", ", $rawHeader) . "\n");
 
 $normalizedHeader = array_map('strtolower', $rawHeader);
-$records = [];
+// Streamed: each record is written out as soon as it is built
+$out = open_output(["adapter_key" => "event_user_relationship"]);
 $skipped = 0;
 
-foreach ($lines as $rowIndex => $line) {
-    $fields = array_map('trim', str_getcsv($line, ",", '"', "\\"));
+foreach (csv_rows($fh) as $rowIndex => $fields) {
 
     if (count($fields) !== count($normalizedHeader)) {
         fwrite(STDERR, "⚠️ Skipping row with mismatched column count: " . json_encode($fields) . "\n");
@@ -70,11 +67,14 @@ foreach ($lines as $rowIndex => $line) {
                 "description" => "",
                 "LeftHandId" => intval($eventId),
                 "RightHandId" => intval($userId),
-                "rowIndex" => $rowIndex + 2
+                "rowIndex" => $rowIndex
             ]
         ];
 
-        $records[] = $record;
+        if (!emit_record($out, $record)) {
+            $skipped++;
+            continue;
+        }
 
         if (getenv('ADAPTER_DEBUG') === '1') {
             fwrite(STDERR, "📦 Packet debug: " . json_encode($record, JSON_UNESCAPED_SLASHES | JSON_PRETTY_PRINT) . "\n");
@@ -86,18 +86,8 @@ foreach ($lines as $rowIndex => $line) {
     }
 }
 
-// === Emit Output ===
-$output = [
-    "recordCount" => count($records),
-    "generatedAt" => date("c"),
-    "adapter_key"=> "event_user_relationship",
-    "records" => $records
-];
+fclose($fh);
 
+// === Finish Output ===
+close_output($out);
 fwrite(STDERR, "⚠️ Skipped {$skipped} invalid rows\n");
-$json = json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
-if ($json === false) {
-    fwrite(STDERR, "❌ JSON encoding failed: " . json_last_error_msg() . "\n");
-    exit(1);
-}
-echo $json . "\n";
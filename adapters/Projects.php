@@ -1,8 +1,17 @@
 <?php
+/**
+ * @adapter_key projects
+ * @entity project
+ * @modes insert, update
+ * @headers Name
+ * @headers update: Id
+ * @reference_data projectGroups
+ */
 ini_set('display_errors', 0);
 ini_set('log_errors', 1);
 ini_set('error_log', 'php://stderr');
 error_reporting(E_ALL & ~E_DEPRECATED & ~E_WARNING);
+require_once __DIR__ . "/lib/csv_stream.php";
 
 $mode = strtolower($argv[2] ?? 'insert');
 
@@ -10,21 +19,11 @@ function normalizeEmpty($value) {
     return is_null($value) || (is_string($value) && trim($value) === "") ? "" : $value;
 }
 function hasColumn($key, $normalizedHeader) { return in_array($key, $normalizedHeader); }
-function log_audit($fp,$idx,$name,$group,$msg,$result){ fputcsv($fp,[$idx,$name??"",$group??"",$msg,$result]); }
+function log_audit($fp,$idx,$name,$group,$msg,$result){ audit_row($fp,[$idx,$name??"",$group??"",$msg,$result]); }
 
 // Input path
 $inputPath = trim($argv[1] ?? '', " \t\n\r\0\x0B\"'");
-if (!is_readable($inputPath)) {
-    echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
-    exit(1);
-}
-
-// Load CSV
-$lines = file($inputPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-if (count($lines) < 2) {
-    echo json_encode(["error" => "CSV file is empty or malformed"]);
-    exit(1);
-}
+$fh = open_csv_input($inputPath);
 
 // Lookup map
 $lookup_map = [
@@ -32,6 +31,9 @@ $lookup_map = [
     "South:Project Group2" => 5337,
     "North:Project Group3" => 5341
 ];
+// Live project groups ("Parent:Group" and plain names) take precedence over the entries above
+$referenceMaps = load_reference_maps();
+$lookup_map = ($referenceMaps["projectGroups"] ?? []) + $lookup_map;
 
 // Header mapping
 $headerMap = [
@@ -51,12 +53,7 @@ $headerMap = [
 ];
 
 // Normalize header
-$rawHeader = array_map('trim', str_getcsv(array_shift($lines), ",", '"', "\\"));
-$rawHeader[0] = preg_replace('/^\xEF\xBB\xBF/', '', $rawHeader[0]);
-$normalizedHeader = array_map(function ($col) use ($headerMap) {
-    $mapped = $headerMap[$col] ?? $col;
-    return is_array($mapped) ? implode('.', $mapped) : $mapped;
-}, $rawHeader);
+$normalizedHeader = normalize_header(read_csv_header($fh), $headerMap);
 
 // Validate columns
 $expected = array_map(function ($v) { return is_array($v) ? implode('.', $v) : $v; }, array_values($headerMap));
@@ -65,30 +62,18 @@ if ($missing) {
     fwrite(STDERR, "⚠️ Warning: Missing expected columns: " . implode(", ", $missing) . "\n");
 }
 
-// Build records
-$records = [];
+// Build records, streamed out as they are built
 $timestamp = date("Y-m-d\TH:i:s");
+$adapterName = "projects";
+[$fp, $auditFile] = open_audit_log($adapterName, ["rowIndex", "name", "projectGroup", "message", "result"]);
+$out = open_output(["adapter_key" => "projects"], report_file("payload_projects", "json"));
 
 try {
-    $adapterName = "projects";
-    // Resolve repo root as the parent of the current script folder
-    $repoRoot = dirname(__DIR__);  // one level up from adapters folder
-    $reportDir = $repoRoot . "/auditreports";
-
-    if (!is_dir($reportDir)) {
-        mkdir($reportDir, 0777, true);
-    }
-    if (!is_dir($reportDir)) { mkdir($reportDir, 0777, true); }
-    $auditFile = $reportDir . "/migration_log_" . $adapterName . "_" . date("Ymd_His") . ".csv";
-    $fp = fopen($auditFile, "w");
-    fputcsv($fp, ["rowIndex", "name", "projectGroup", "message", "result"]);
-
-    foreach ($lines as $lineIndex => $line) {
-        $fields = array_map('trim', str_getcsv($line, ",", '"', "\\"));
+    foreach (csv_rows($fh) as $rowIndex => $fields) {
         if (count($fields) !== count($normalizedHeader)) {
             $msg = "Skipping row with mismatched column count";
             fwrite(STDERR, "⚠️ $msg: " . json_encode($fields) . "\n");
-            log_audit($fp, $lineIndex+2, "", "", $msg, "Skipped");
+            log_audit($fp, $rowIndex, "", "", $msg, "Skipped");
             continue;
         }
 
@@ -96,7 +81,7 @@ try {
         if (!$row) {
             $msg = "Invalid row";
             fwrite(STDERR, "⚠️ $msg\n");
-            log_audit($fp, $lineIndex+2, "", "", $msg, "Skipped");
+            log_audit($fp, $rowIndex, "", "", $msg, "Skipped");
             continue;
         }
 
@@ -119,7 +104,7 @@ try {
         $projectGroupIntegers = array_unique($projectGroupIntegers);
 
         if ($invalidGroup) {
-            log_audit($fp, $lineIndex+2, $row["name"] ?? "", $row["projectGroup"] ?? "", implode("; ", $warnings), "Skipped");
+            log_audit($fp, $rowIndex, $row["name"] ?? "", $row["projectGroup"] ?? "", implode("; ", $warnings), "Skipped");
             continue;
         }
 
@@ -171,7 +156,7 @@ try {
 
         // Skip record creation if missing name (optional)
         if (empty($values["name"])) {
-            log_audit($fp, $lineIndex+2, "", implode(",", $projectGroupIntegers), "Missing mandatory field (name)", "Skipped");
+            log_audit($fp, $rowIndex, "", implode(",", $projectGroupIntegers), "Missing mandatory field (name)", "Skipped");
             continue;
         }
 
@@ -180,42 +165,26 @@ try {
         if ($mode === "update" && hasColumn("id", $normalizedHeader)) {
             $record["meta"] = ["id" => normalizeEmpty($row["id"] ?? "")];
         }
-        $records[] = $record;
+        if (!emit_record($out, $record, $rowIndex)) {
+            log_audit($fp, $rowIndex, $values["name"] ?? "", implode(",", $projectGroupIntegers), "JSON encoding failed", "Skipped");
+            continue;
+        }
 
         // Log success
-        log_audit($fp, $lineIndex+2, $values["name"] ?? "", implode(",", $projectGroupIntegers), "", "Success");
+        log_audit($fp, $rowIndex, $values["name"] ?? "", implode(",", $projectGroupIntegers), "", "Success");
     }
 
     fclose($fp);
+    fclose($fh);
     fwrite(STDERR, "🧾 Audit log written to $auditFile\n");
 
 } catch (Throwable $e) {
+    // Records are already on stdout, so the failure is reported on stderr and through the exit code
     fwrite(STDERR, "❌ Fatal error: " . $e->getMessage() . "\n");
-    echo json_encode(["error" => "Adapter execution failed", "details" => $e->getMessage()]);
-    exit(1);
-}
-
-// Emit output
-$output = [
-    "recordCount" => count($records),
-    "generatedAt" => date("c"),
-    "adapter_key"=> "projects",
-    "records" => $records
-];
-
-$json = json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
-if ($json === false) {
-    $error = json_last_error_msg();
-    fwrite(STDERR, "❌ JSON encoding failed: $error\n");
-    echo json_encode(["error" => "JSON encoding failed", "details" => $error]);
     exit(1);
 }
-if (!is_array($records) || empty($records)) { fwrite(STDERR, "❌ No valid records generated\n"); }
-
-// Save JSON payload into auditreports with timestamped name
-$payloadFile = $reportDir . "/payload_projects_" . date("Ymd_His") . ".json";
-file_put_contents($payloadFile, $json);
 
-echo $json . "\n";
-fwrite(STDERR, "🧾 Payload written to $payloadFile\n");
-fwrite(STDERR, "🧾 Writing detailed audit to $auditFile\n");
\ No newline at end of file
+// Finish output
+if ($out["count"] === 0) { fwrite(STDERR, "❌ No valid records generated\n"); }
+close_output($out);
+fwrite(STDERR, "🧾 Writing detailed audit to $auditFile\n");
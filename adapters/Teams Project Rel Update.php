@@ -1,7 +1,14 @@
 <?php
+/**
+ * @adapter_key teams_projects_relationship
+ * @entity teamProjectRelationship
+ * @modes insert, update
+ * @headers team, project
+ */
 error_reporting(E_ALL & ~E_DEPRECATED);
 ini_set('display_errors', 1);
 fwrite(STDERR, "🛠 TeamProject Adapter started\n");
+require_once __DIR__ . "/lib/csv_stream.php";
 
 // === Helpers ===
 function normalizeEmpty($value) {
@@ -13,29 +20,19 @@ $inputPath = trim($argv[1] ?? '', " \t\n\r\0\x0B\"'");
 $migrationType = strtolower(trim($argv[2] ?? 'update'));
 fwrite(STDERR, "🔧 Migration mode: $migrationType\n");
 
-if (!is_readable($inputPath)) {
-    echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
-    exit(1);
-}
-
-// === Load CSV ===
-$lines = file($inputPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-if (count($lines) < 2) {
-    echo json_encode(["error" => "CSV file is empty or malformed"]);
-    exit(1);
-}
+// === Open CSV ===
+$fh = open_csv_input($inputPath);
 
 // === Normalize Header ===
-$rawHeader = array_map('trim', str_getcsv(array_shift($lines), ",", '"', "\\"));
-$rawHeader[0] = preg_replace('/^\xEF\xBB\xBF/', '', $rawHeader[0]); // Strip BOM
+$rawHeader = read_csv_header($fh);
 fwrite(STDERR, "🧾 Raw header: " . implode(", ", $rawHeader) . "\n");
 
 $normalizedHeader = array_map('strtolower', $rawHeader);
-$records = [];
+// Streamed: each record is written out as soon as it is built
+$out = open_output(["adapter_key" => "teams_projects_relationship"]);
 $skipped = 0;
 
-foreach ($lines as $line) {
-    $fields = array_map('trim', str_getcsv($line, ",", '"', "\\"));
+foreach (csv_rows($fh) as $fields) {
 
     if (count($fields) !== count($normalizedHeader)) {
         fwrite(STDERR, "⚠️ Skipping row with mismatched column count: " . json_encode($fields) . "\n");
@@ -64,14 +61,17 @@ foreach ($lines as $line) {
             "values" => new stdClass(), // empty object
             "meta" => [
                 "id" => $teamId,  // 👈 Required for PATCH
-                "rowIndex" => count($records) + 2, // +2 accounts for 0-based index + header row
+                "rowIndex" => $out["count"] + 2, // +2 accounts for 0-based index + header row
                 "team" => $teamId,
                 "project" => $projectId,
                 "source" => $row
                 ]
         ];
 
-        $records[] = $record;
+        if (!emit_record($out, $record)) {
+            $skipped++;
+            continue;
+        }
 
         if (getenv('ADAPTER_DEBUG') === '1') {
             fwrite(STDERR, "📦 Packet debug: " . json_encode($record, JSON_UNESCAPED_SLASHES | JSON_PRETTY_PRINT) . "\n");
@@ -82,20 +82,8 @@ foreach ($lines as $line) {
         continue;
     }
 }
-// === Emit Output ===
-$output = [
-    "recordCount" => count($records),
-    "generatedAt" => date("c"),
-    "adapter_key"=> "teams_projects_relationship",
-    "skippedCount" => $skipped,
-    "recordIndex" => count($records) + 1,
-    "records" => $records
-];
+fclose($fh);
 
+// === Finish Output ===
+close_output($out, ["skippedCount" => $skipped, "recordIndex" => $out["count"] + 1]);
 fwrite(STDERR, "⚠️ Skipped {$skipped} invalid rows\n");
-$json = json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
-if ($json === false) {
-    fwrite(STDERR, "❌ JSON encoding failed: " . json_last_error_msg() . "\n");
-    exit(1);
-}
-echo $json . "\n";
@@ -1,7 +1,14 @@
 <?php
+/**
+ * @adapter_key users_teams_unrelate
+ * @entity users_teams_unrelate
+ * @modes insert, update
+ * @headers user, team
+ */
 error_reporting(E_ALL & ~E_DEPRECATED);
 ini_set('display_errors', 1);
 fwrite(STDERR, "🛠 UserTeam Adapter started\n");
+require_once __DIR__ . "/lib/csv_stream.php";
 
 // === Helpers ===
 function normalizeEmpty($value) {
@@ -13,30 +20,21 @@ $inputPath = trim($argv[1] ?? '', " \t\n\r\0\x0B\"'");
 $migrationType = strtolower(trim($argv[2] ?? 'update'));
 fwrite(STDERR, "🔧 Migration mode: $migrationType\n");
 
-if (!is_readable($inputPath)) {
-    echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
-    exit(1);
-}
-
-// === Load CSV ===
-$lines = file($inputPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-if (count($lines) < 2) {
-    echo json_encode(["error" => "CSV file is empty or malformed"]);
-    exit(1);
-}
+// === Open CSV ===
+$fh = open_csv_input($inputPath);
 
 // === Normalize Header ===
-$rawHeader = array_map('trim', str_getcsv(array_shift($lines), ",", '"', "\\"));
-$rawHeader[0] = preg_replace('/^\xEF\xBB\xBF/', '', $rawHeader[0]); // Strip BOM
+$rawHeader = read_csv_header($fh);
 fwrite(STDERR, "🧾 Raw header: " . implode(", ", $rawHeader) . "\n");
 
 $normalizedHeader = array_map('strtolower', $rawHeader);
-$records = [];
+// Streamed: each record is written out as soon as it is built
+$out = open_output(["adapter_key" => "users_teams_unrelate"]);
+[$fp, $auditFile] = open_audit_log("users_teams_unrelate", ["rowIndex", "user", "team", "status", "message"]);
 $skipped = 0;
 fwrite(STDERR, "🛠 TeamUser Adapter started\n");
 
-foreach ($lines as $line) {
-    $fields = array_map('trim', str_getcsv($line, ",", '"', "\\"));
+foreach (csv_rows($fh) as $fields) {
 
     if (count($fields) !== count($normalizedHeader)) {
         fwrite(STDERR, "⚠️ Skipping row with mismatched column count: " . json_encode($fields) . "\n");
@@ -72,12 +70,17 @@ foreach ($lines as $line) {
                 "id" => $userId,
                 "user_id" => $userId,
                 "team_id" => $teamId,
-                "rowIndex" => count($records) + 2,
+                "rowIndex" => $out["count"] + 2,
                 "source" => $row
             ]
         ];
 
-        $records[] = $record;
+        if (!emit_record($out, $record)) {
+            audit_row($fp, [$record["meta"]["rowIndex"], $row["user"], $row["team"], "Skipped", "JSON encoding failed"]);
+            $skipped++;
+            continue;
+        }
+        audit_row($fp, [$record["meta"]["rowIndex"], $row["user"], $row["team"], "Pending", ""]);
 
         if (getenv('ADAPTER_DEBUG') === '1') {
             fwrite(STDERR, "📦 Packet debug: " . json_encode($record, JSON_UNESCAPED_SLASHES | JSON_PRETTY_PRINT) . "\n");
@@ -88,34 +91,11 @@ foreach ($lines as $line) {
         continue;
     }
 }
-$auditRows = [];
-foreach ($records as $record) {
-    $source = $record["meta"]["source"];
-    $auditRows[] = [
-        "rowIndex" => $record["meta"]["rowIndex"],
-        "user" => normalizeEmpty($source["user"] ?? ""),
-        "team" => normalizeEmpty($source["team"] ?? ""),
-        "status" => "Pending",
-        "message" => ""
-
-    ];
-}
-
-// === Emit Output ===
-$output = [
-    "recordCount" => count($records),
-    "generatedAt" => date("c"),
-    "adapter_key"=> "users_teams_unrelate",
-    "records" => $records,
-    "auditRows" => $auditRows
-];
+fclose($fh);
+fclose($fp);
+fwrite(STDERR, "🧾 Audit log written to $auditFile\n");
 
+// === Finish Output ===
+close_output($out);
 fwrite(STDERR, "⚠️ Skipped {$skipped} invalid rows\n");
-$json = json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
-if ($json === false) {
-    fwrite(STDERR, "❌ JSON encoding failed: " . json_last_error_msg() . "\n");
-    exit(1);
-}
-fwrite(STDERR, "📋 AuditRows preview: " . json_encode($auditRows) . "\n");
-echo $json . "\n";
-fwrite(STDERR, "📊 Built " . count($records) . " records, skipped $skipped\n");
\ No newline at end of file
+fwrite(STDERR, "📊 Built {$out['count']} records, skipped $skipped\n");
@@ -1,8 +1,16 @@
 <?php
+/**
+ * @adapter_key teams
+ * @entity teams
+ * @modes insert, update
+ * @headers insert: Name
+ * @headers update: Id, Name
+ */
 ini_set('display_errors', 0);
 ini_set('log_errors', 1);
 ini_set('error_log', 'php://stderr');
 error_reporting(E_ALL & ~E_DEPRECATED & ~E_WARNING);
+require_once __DIR__ . "/lib/csv_stream.php";
 
 $mode = strtolower($argv[2] ?? 'insert'); // insert | update
 
@@ -40,31 +48,21 @@ function transformProjects($rawProjects, $projectIds, $projectsTransform) {
 
 // === Input Path ===
 $inputPath = trim($argv[1] ?? '', " \t\n\r\0\x0B\"'");
-if (!is_readable($inputPath)) {
-    echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
-    exit(1);
-}
 
-// === Load CSV ===
-$lines = file($inputPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-if (count($lines) < 2) {
-    echo json_encode(["error" => "CSV file is empty or malformed"]);
-    exit(1);
-}
+// === Open CSV ===
+$fh = open_csv_input($inputPath);
 
 // === Load Project IDs for Team assignment ===
 $projectIdPath = "C:\\Users\\steve\\OneDrive\\Documents\\Social Pinpoint\\Project\\SWC\\CM ID Lookup\\Project.csv";
 $projectIds = [];
 if (is_readable($projectIdPath)) {
-    $projectLines = file($projectIdPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-    foreach ($projectLines as $line) {
-        $parts = str_getcsv($line, ",", '"', "\\");
+    $projectFh = fopen($projectIdPath, "r");
+    while (($parts = csv_next_row($projectFh)) !== null) {
         if (count($parts) >= 2) {
-            $id = trim($parts[0]);
-            $name = trim($parts[1]);
-            $projectIds[$name] = $id;
+            $projectIds[$parts[1]] = $parts[0];
         }
     }
+    fclose($projectFh);
 } else {
     fwrite(STDERR, "⚠️ Warning: Project ID lookup file not found\n");
 }
@@ -86,9 +84,7 @@ $projectsTransform = [
 ];
 
 // === Normalize Header ===
-$rawHeader = array_map('trim', str_getcsv(array_shift($lines), ",", '"', "\\"));
-$rawHeader[0] = preg_replace('/^\xEF\xBB\xBF/', '', $rawHeader[0]);
-$normalizedHeader = array_map(function ($col) use ($headerMap) { return $headerMap[$col] ?? $col; }, $rawHeader);
+$normalizedHeader = normalize_header(read_csv_header($fh), $headerMap);
 
 // === Validate Columns (warn-only)
 $expected = array_values($headerMap);
@@ -99,26 +95,15 @@ if ($missing) {
 
 // === Audit setup ===
 $adapterName = "teams";
-$repoRoot = dirname(__DIR__);              // one level up from adapters folder
-$reportDir = $repoRoot . "/auditreports";  // same auditreports folder
-if (!is_dir($reportDir)) { mkdir($reportDir, 0777, true); }
-
-$auditFile = $reportDir . "/migration_log_" . $adapterName . "_" . date("Ymd_His") . ".csv";
-$fp = fopen($auditFile, "w");
-if ($fp === false) {
-    fwrite(STDERR, "❌ Could not open audit log file: $auditFile\n");
-    exit(1);
-}
-fputcsv($fp, ["rowIndex","mode","id","teamssourceid","name","description","projectsRelate"]);
+[$fp, $auditFile] = open_audit_log($adapterName, ["rowIndex","mode","id","teamssourceid","name","description","projectsRelate"]);
 
 // === Build Records ===
-$records = [];
-$rowIndex = 0;
+// Streamed: each record is written out as soon as it is built
+$out = open_output(["adapter_key" => "teams"], report_file("payload_" . $adapterName, "json"));
 
 try {
-    foreach ($lines as $line) {
-        $rowIndex++;
-        $fields = array_map('trim', str_getcsv($line, ",", '"', "\\"));
+    foreach (csv_rows($fh) as $line => $fields) {
+        $rowIndex = $line - 1; // this adapter numbers data rows from 1
         if (count($fields) !== count($normalizedHeader)) {
             fwrite(STDERR, "⚠️ Skipping row {$rowIndex}: mismatched column count\n");
             continue;
@@ -169,10 +154,13 @@ try {
         }
 
         fwrite(STDERR, "🔧 Row {$rowIndex} built (mode={$mode}): " . json_encode($record) . "\n");
-        $records[] = $record;
+        if (!emit_record($out, $record, $rowIndex)) {
+            fwrite(STDERR, "⚠️ Skipping row {$rowIndex}: JSON encoding failed\n");
+            continue;
+        }
 
         // Write to CSV audit log
-        fputcsv($fp, [
+        audit_row($fp, [
             $rowIndex,
             $mode,
             $id ?? "",
@@ -183,37 +171,17 @@ try {
         ]);
     }
 } catch (Throwable $e) {
+    // Records are already on stdout, so the failure is reported on stderr and through the exit code
     fwrite(STDERR, "❌ Fatal error: " . $e->getMessage() . "\n");
-    echo json_encode(["error" => "Adapter execution failed", "details" => $e->getMessage()]);
     exit(1);
 }
 
 fclose($fp);
+fclose($fh);
 fwrite(STDERR, "🧾 Audit log written to $auditFile\n");
 
-// === Emit Output ===
-$output = [
-    "recordCount" => count($records),
-    "generatedAt" => date("c"),
-    "adapter_key"=> "teams",
-    "records" => $records
-];
-
-$json = json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
-if ($json === false) {
-    $error = json_last_error_msg();
-    fwrite(STDERR, "❌ JSON encoding failed: $error\n");
-    echo json_encode(["error" => "JSON encoding failed", "details" => $error]);
-    exit(1);
-}
-
-if (!is_array($records) || empty($records)) {
+// === Finish Output ===
+if ($out["count"] === 0) {
     fwrite(STDERR, "❌ No valid records generated\n");
 }
-
-// Save JSON payload into auditreports with timestamped name
-$payloadFile = $reportDir . "/payload_" . $adapterName . "_" . date("Ymd_His") . ".json";
-file_put_contents($payloadFile, $json);
-fwrite(STDERR, "🧾 Payload written to $payloadFile\n");
-
-echo $json . "\n";
\ No newline at end of file
+close_output($out);
@@ -1,14 +1,23 @@
 <?php
+/**
+ * @adapter_key users
+ * @entity users
+ * @modes insert, update
+ * @headers insert: First Name, Email
+ * @headers update: Id
+ * @reference_data roles
+ */
 error_reporting(E_ALL & ~E_DEPRECATED);
 ini_set('display_errors', 1);
 fwrite(STDERR, "🛠 Adapter started\n");
+require_once __DIR__ . "/lib/csv_stream.php";
 
 // === Helpers ===
 function normalizeEmpty($value) {
     return is_null($value) || (is_string($value) && trim($value) === "") ? "" : $value;
 }
 function log_audit($fp,$idx,$first,$last,$email,$msg,$result){
-    fputcsv($fp,[$idx,$first??"", $last??"", $email??"", $msg, $result]);
+    audit_row($fp,[$idx,$first??"", $last??"", $email??"", $msg, $result]);
 }
 
 // === Input Path and Mode ===
@@ -16,26 +25,12 @@ $inputPath = trim($argv[1] ?? '', " \t\n\r\0\x0B\"'");
 $migrationType = strtolower(trim($argv[2] ?? 'insert'));
 fwrite(STDERR, "🔧 Migration mode: $migrationType\n");
 
-if (!is_readable($inputPath)) {
-    echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
-    exit(1);
-}
-
-// === Load CSV ===
-$lines = file($inputPath, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES);
-if (count($lines) < 2) {
-    echo json_encode(["error" => "CSV file is empty or malformed"]);
-    exit(1);
-}
+// === Open CSV ===
+$fh = open_csv_input($inputPath);
 
 // === Audit setup ===
 $adapterName = "users";
-$repoRoot = dirname(__DIR__);
-$reportDir = $repoRoot . "/auditreports";
-if (!is_dir($reportDir)) { mkdir($reportDir, 0777, true); }
-$auditFile = $reportDir . "/migration_log_" . $adapterName . "_" . date("Ymd_His") . ".csv";
-$fp = fopen($auditFile, "w");
-fputcsv($fp, ["rowIndex","firstName","lastName","email","message","result"]);
+[$fp, $auditFile] = open_audit_log($adapterName, ["rowIndex","firstName","lastName","email","message","result"]);
 
 // === Header Mapping ===
 $headerMap = [
@@ -60,32 +55,24 @@ $roleMap = [
     "Admin"                   => "EnterpriseAdministrator",
     "User"                    => "StandardUser"
 ];
+// Every role the tenant defines resolves to itself; the aliases above still apply
+$referenceMaps = load_reference_maps();
+$roleMap = ($referenceMaps["roles"] ?? []) + $roleMap;
 
 // === Normalize Header ===
-$rawHeader = array_map('trim', str_getcsv(array_shift($lines), ",", '"', "\\"));
-$rawHeader[0] = preg_replace('/^\xEF\xBB\xBF/', '', $rawHeader[0]);
-$lcHeaderMap = array_change_key_case($headerMap, CASE_LOWER);
-
-$normalizedHeader = [];
-foreach ($rawHeader as $idx => $col) {
-    $lk = strtolower(trim($col));
-    if ($lk === 'id') {
-        $normalizedHeader[] = '__ID__';
-        continue;
-    }
-    $normalizedHeader[] = $lcHeaderMap[$lk] ?? trim($col);
-}
+// Matched case-insensitively; the ID column is kept apart as __ID__
+$normalizedHeader = normalize_header(read_csv_header($fh), ["id" => "__ID__"] + $headerMap, true);
 
 // === Build Records ===
-$records = [];
+// Streamed: each record is written out as soon as it is built
+$out = open_output(["adapter_key" => "users"], report_file("payload_users", "json"));
 $skipped = 0;
 
-foreach ($lines as $lineIndex => $line) {
-    $fields = array_map('trim', str_getcsv($line, ",", '"', "\\"));
+foreach (csv_rows($fh) as $rowIndex => $fields) {
     if (count($fields) !== count($normalizedHeader)) {
         $msg = "Mismatched column count";
         fwrite(STDERR, "⚠️ $msg: " . json_encode($fields) . "\n");
-        log_audit($fp,$lineIndex+2,"","","",$msg,"Skipped");
+        log_audit($fp,$rowIndex,"","","",$msg,"Skipped");
         $skipped++;
         continue;
     }
@@ -95,7 +82,7 @@ foreach ($lines as $lineIndex => $line) {
     if ($migrationType === "update" && empty($row["__ID__"])) {
         $msg = "Missing ID for update";
         fwrite(STDERR, "⚠️ $msg\n");
-        log_audit($fp,$lineIndex+2,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
+        log_audit($fp,$rowIndex,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
         $skipped++;
         continue;
     }
@@ -105,7 +92,7 @@ foreach ($lines as $lineIndex => $line) {
     )) {
         $msg = "Missing mandatory fields (firstName/email)";
         fwrite(STDERR, "⚠️ $msg\n");
-        log_audit($fp,$lineIndex+2,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
+        log_audit($fp,$rowIndex,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
         $skipped++;
         continue;
     }
@@ -127,7 +114,7 @@ foreach ($lines as $lineIndex => $line) {
     if (!empty($unknownRoles)) {
         $msg = "Unknown role(s): " . implode(", ", $unknownRoles);
         fwrite(STDERR, "❌ $msg\n");
-        log_audit($fp,$lineIndex+2,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
+        log_audit($fp,$rowIndex,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
         $skipped++;
         continue;
     }
@@ -145,7 +132,7 @@ foreach ($lines as $lineIndex => $line) {
             "values" => [],
             "meta" => [
                 "id" => $row["__ID__"] ?? null,
-                "rowIndex" => count($records) + 2,
+                "rowIndex" => $out["count"] + 2,
                 "source" => $row
             ]
         ];
@@ -170,40 +157,24 @@ foreach ($lines as $lineIndex => $line) {
                 $record["values"][$key] = normalizeEmpty($row[$key]);
             }
         }
-        $records[] = $record;
-        log_audit($fp,$lineIndex+2,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"","Success","Success");
+        if (!emit_record($out, $record, $rowIndex)) {
+            throw new Exception("JSON encoding failed");
+        }
+        log_audit($fp,$rowIndex,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"","Success","Success");
 
     } catch (Exception $e) {
         $msg = "Exception: " . $e->getMessage();
         fwrite(STDERR, "❌ $msg\n");
-        log_audit($fp,$lineIndex+2,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
+        log_audit($fp,$rowIndex,$row["firstName"]??"",$row["lastName"]??"",$row["email"]??"",$msg,"Skipped");
         $skipped++;
         continue;
     }
 }
 
 fclose($fp);
+fclose($fh);
 fwrite(STDERR, "🧾 Audit log written to $auditFile\n");
 
-// === Emit Output ===
-$output = [
-    "recordCount" => count($records),
-    "generatedAt" => date("c"),
-    "adapter_key" => "users",
-    "records" => $records
-];
-
-fwrite(STDERR, "⚠️ Skipped {$skipped} invalid rows\n");
-$json = json_encode($output, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
-if ($json === false) {
-    fwrite(STDERR, "❌ JSON encoding failed: " . json_last_error_msg() . "\n");
-    exit(1);
-}
-
-// Save JSON payload into auditreports with timestamped name
-$payloadFile = $reportDir . "/payload_users_" . date("Ymd_His") . ".json";
-file_put_contents($payloadFile, $json);
-
-echo $json . "\n";
-fwrite(STDERR, "🧾 Payload written to $payloadFile\n");
-fwrite(STDERR, "🧾 Writing detailed audit to $auditFile\n");
\ No newline at end of file
+// === Finish Output ===
+close_output($out);
+fwrite(STDERR, "⚠️ Skipped {$skipped} invalid rows\n");
\ No newline at end of file
@@ -0,0 +1,139 @@
+<?php
+// adapters/lib/csv_stream.php
+// Shared by every adapter: the input CSV is read one record at a time with
+// fgetcsv (quoted cells may span lines), and the output JSON is written one
+// record at a time, so an adapter's memory does not grow with the file.
+//
+//   $fh = open_csv_input($inputPath);
+//   $normalizedHeader = normalize_header(read_csv_header($fh), $headerMap);
+//   $out = open_output(["adapter_key" => "users"], report_file("payload_users", "json"));
+//   foreach (csv_rows($fh) as $rowIndex => $fields) { ... emit_record($out, $record); }
+//   close_output($out);
+
+// Tenant lookups prefetched by the runner (helpers/reference_data.py); empty when run standalone
+function load_reference_maps() {
+    $path = getenv("MIGRATION_REFERENCE_FILE");
+    if (!$path || !is_readable($path)) return [];
+    $document = json_decode(file_get_contents($path), true);
+    return is_array($document["maps"] ?? null) ? $document["maps"] : [];
+}
+
+// === Input ===
+// Opens the CSV past any UTF-8 BOM, or prints the error document and exits
+function open_csv_input($inputPath) {
+    $fh = is_readable($inputPath) ? fopen($inputPath, "r") : false;
+    if ($fh === false) {
+        echo json_encode(["error" => "File not found or unreadable", "path" => $inputPath]);
+        exit(1);
+    }
+    if (fread($fh, 3) !== "\xEF\xBB\xBF") rewind($fh);
+    return $fh;
+}
+
+// Next non-blank record as trimmed cells, or null at the end of the file
+function csv_next_row($fh) {
+    while (($cells = fgetcsv($fh, 0, ",", '"', "\\")) !== false) {
+        if ($cells === [null]) continue; // blank line
+        return array_map('trim', $cells);
+    }
+    return null;
+}
+
+// The header cells; exits like the adapters always have when there is no data row after it
+function read_csv_header($fh) {
+    $header = csv_next_row($fh);
+    $dataStart = ftell($fh);
+    if ($header === null || csv_next_row($fh) === null) {
+        echo json_encode(["error" => "CSV file is empty or malformed"]);
+        exit(1);
+    }
+    fseek($fh, $dataStart);
+    return $header;
+}
+
+// Yields rowIndex => cells for each data row; the header is row 1 and blank lines are not counted
+function csv_rows($fh) {
+    $rowIndex = 1;
+    while (($cells = csv_next_row($fh)) !== null) {
+        $rowIndex++;
+        yield $rowIndex => $cells;
+    }
+}
+
+// Maps header cells through $headerMap; ["address", "suburb"] targets become "address.suburb"
+function normalize_header(array $rawHeader, array $headerMap, $caseInsensitive = false) {
+    $lookup = $caseInsensitive ? array_change_key_case($headerMap, CASE_LOWER) : $headerMap;
+    return array_map(function ($col) use ($lookup, $caseInsensitive) {
+        $mapped = $lookup[$caseInsensitive ? strtolower($col) : $col] ?? $col;
+        return is_array($mapped) ? implode('.', $mapped) : $mapped;
+    }, $rawHeader);
+}
+
+// === Audit files ===
+// auditreports/<prefix>_<timestamp>_<pid>.<extension>; one stamp per adapter process
+function report_file($prefix, $extension) {
+    static $stamp = null;
+    $stamp = $stamp ?? date("Ymd_His") . "_" . getmypid();
+    $reportDir = dirname(__DIR__, 2) . "/auditreports";
+    if (!is_dir($reportDir)) { mkdir($reportDir, 0777, true); }
+    return "{$reportDir}/{$prefix}_{$stamp}.{$extension}";
+}
+
+// Returns [handle, path] of a new audit CSV with its header row written
+function open_audit_log($adapterName, array $columns) {
+    $auditFile = report_file("migration_log_" . $adapterName, "csv");
+    $fp = fopen($auditFile, "w");
+    if ($fp === false) {
+        fwrite(STDERR, "❌ Could not open audit log file: $auditFile\n");
+        exit(1);
+    }
+    audit_row($fp, $columns);
+    return [$fp, $auditFile];
+}
+
+function audit_row($fp, array $cells) {
+    fputcsv($fp, $cells, ",", '"', "\\");
+}
+
+// === Output ===
+// Starts the output document on stdout (and in $payloadFile when given) with
+// $fields, then "records" as they are emitted. $out["count"] is the number
+// of records emitted so far, $out["dropped"] the rows that could not be.
+function open_output(array $fields, $payloadFile = null) {
+    $out = ["handles" => [STDOUT], "count" => 0, "dropped" => [], "payloadFile" => $payloadFile];
+    if ($payloadFile) {
+        $payload = fopen($payloadFile, "w");
+        if ($payload !== false) $out["handles"][] = $payload;
+    }
+    $head = json_encode(["generatedAt" => date("c")] + $fields, JSON_UNESCAPED_SLASHES);
+    output_write($out, substr($head, 0, -1) . ",\"records\":[\n");
+    return $out;
+}
+
+function output_write(array $out, $text) {
+    foreach ($out["handles"] as $handle) fwrite($handle, $text);
+}
+
+// Writes one record. A record that cannot be encoded is left out and listed
+// in "droppedRecords", which the runner logs as skipped rows; the caller
+// writes its own audit row when this returns false.
+function emit_record(array &$out, $record, $rowIndex = null) {
+    $json = json_encode($record, JSON_UNESCAPED_SLASHES);
+    if ($json === false) {
+        $reason = "JSON encoding failed: " . json_last_error_msg();
+        fwrite(STDERR, "❌ $reason\n");
+        $out["dropped"][] = ["rowIndex" => $rowIndex ?? ($record["meta"]["rowIndex"] ?? null), "reason" => $reason];
+        return false;
+    }
+    output_write($out, ($out["count"] > 0 ? ",\n" : "") . $json);
+    $out["count"]++;
+    return true;
+}
+
+// Closes "records" and the document, adding recordCount, droppedRecords and any $fields known only at the end
+function close_output(array &$out, array $fields = []) {
+    $tail = json_encode(["recordCount" => $out["count"], "droppedRecords" => $out["dropped"]] + $fields, JSON_UNESCAPED_SLASHES);
+    output_write($out, "\n]," . substr($tail, 1) . "\n");
+    foreach (array_slice($out["handles"], 1) as $handle) fclose($handle);
+    if ($out["payloadFile"]) fwrite(STDERR, "🧾 Payload written to {$out['payloadFile']}\n");
+}
@@ -1,20 +1,31 @@
 from flask import Flask, request, jsonify, render_template, send_from_directory, make_response
 from flask_cors import CORS
-from helpers.adapter_loader import run_php_adapter
+from helpers.adapter_cache import open_adapter_output
+from helpers.adapter_registry import adapters, get_adapter_names, check_adapter, check_headers, AdapterMismatch
+from helpers.preview import preview
+from helpers.encoding_utils import normalize_csv
 from helpers.endpoints import ENTITY_ENDPOINTS
 from dispatcher import dispatch
-from helpers.shared_logic import fetch_entity_definition
+from helpers.shared_logic import fetch_entity_definition, get_bearer_token
+from helpers.dedup import DEDUP_MODES
+from helpers.uploads import spool_upload, discard_upload, UploadTooLarge
+from helpers.run_manifest import new_run_id, record_run, load_run_manifest
+from helpers.run_context import run_dir, set_run_dir, artifact_path
+from helpers.run_history import record_history, query_runs, get_run, FILTERS as RUN_FILTERS
+from helpers.replay import replay_run, REPLAY_FIELDS
+from helpers.reference_data import load_reference_data, adapter_env
+from helpers.row_log import read_rows, response_summary, ROW_FILTERS
+from config import MAX_UPLOAD_BYTES, RUN_HISTORY_PAGE_SIZE, PREVIEW_MAX_BYTES, PREVIEW_ROWS, ROW_PAGE_SIZE
+from helpers.result_sinks import check_formats, available_formats
 from reports.report_writer import generate_report_files
 from datetime import datetime
-from urllib.parse import urlparse
 import json
 import sys
-import os
-import tempfile
-import requests
 import logging
 
 app = Flask(__name__, static_folder='static')
+# Werkzeug rejects larger request bodies with 413 before they are read
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES + 1024 * 1024
 logging.basicConfig(
     level=logging.INFO,  # or DEBUG for more verbosity
     format="%(asctime)s [%(levelname)s] %(message)s"
@@ -23,46 +34,23 @@ logger = logging.getLogger(__name__)
 
 CORS(app)
 
-def run_migration_dispatch(payload, migration_type, api_url, auth_token, entity, adapter_key):
+def run_migration_dispatch(payload, migration_type, api_url, auth_token, entity, adapter_key, delta=False, dedup="off", reconcile=False):
     print(f"🚀 Migration started for adapter: {adapter_key}")
-    summary, stats = dispatch(adapter_key, payload, migration_type, api_url, auth_token, entity)
+    summary, stats = dispatch(adapter_key, payload, migration_type, api_url, auth_token, entity, delta=delta, dedup=dedup, reconcile=reconcile)
     return summary, stats
 
 
 @app.route('/')
 def home():
     adapter_names = get_adapter_names()
-    return render_template("index.html", adapter_names=adapter_names)
-
-def get_bearer_token(email, password, base_url):
-    parsed = urlparse(base_url)
-    tenant = parsed.hostname.split(".")[0]  # e.g. 'shenderdemo'
-    region = "australia-east"
-    token_url = "https://auth.mysite-preview.com.au/connect/token"
-
-    client_id = f"xxxxxxxxxx:{region}:{tenant}:xxxxxxxxxxxx"
-    payload = {
-        "grant_type": "password",
-        "client_id": client_id,
-        "scope": "openid profile mysite.xxxxxxxxxxxxxxxxxx.api",
-        "username": email,
-        "password": password
-    }
-
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(token_url, data=payload, headers=headers)
-    response.raise_for_status()
-    token = response.json()["access_token"]
-    return token
+    adapter_entities = {name: info.entity for name, info in adapters().items() if info.entity}
+    return render_template("index.html", adapter_names=adapter_names, adapter_entities=adapter_entities,
+                           result_formats=available_formats())
 
 # === Adapter Discovery ===
-def get_adapter_names():
-    adapter_dir = os.path.join(os.path.dirname(__file__), "adapters")
-    return [
-        os.path.splitext(f)[0]
-        for f in os.listdir(adapter_dir)
-        if f.endswith(".php") and os.path.isfile(os.path.join(adapter_dir, f))
-    ]
+@app.route('/adapters', methods=['GET'])
+def list_adapters():
+    return jsonify({name: info.as_dict() for name, info in adapters().items()})
 
 # === Classification Flattening ===
 def flatten_classifications(records):
@@ -78,11 +66,17 @@ def flatten_classifications(records):
             flat.append(subgroup_copy)
     return flat
 
-# === Home Page ===
-@app.route('/reports/<path:filename>')
-def serve_report(filename):
-    return send_from_directory(app.static_folder, filename)
+# === Debug Dump ===
+def debug_rows(records, f, output_path):
+    # Passes the records through, writing each one to the debug dump on the way
+    f.write(f"📄 Raw PHP Adapter Output: {output_path}\n\n")
+    for i, record in enumerate(records, start=1):
+        f.write(f"🔍 Raw Row {i}:\n")
+        json.dump(record, f, indent=2)
+        f.write("\n\n")
+        yield record
 
+# === Home Page ===
 def index():
     adapter_names = get_adapter_names()
     return render_template('index.html', adapter_names=adapter_names)
@@ -101,12 +95,38 @@ def entity_schema():
     schema = fetch_entity_definition(definition_url, headers)
     return jsonify(schema)
 
+# === CSV Preview ===
+@app.route('/preview', methods=['POST'])
+def preview_csv():
+    if 'input_file' not in request.files:
+        return jsonify({"status": "error", "message": "No file uploaded"}), 400
+    try:
+        migration_type = request.form.get('migration_type', 'insert').strip().lower()
+        info = check_adapter(request.form.get('adapter_name'), request.form.get('entity'), migration_type)
+        rows = min(int(request.form.get('rows', PREVIEW_ROWS)), 100)
+
+        # The UI sends file.slice(); a full upload is cut at the same size
+        stream = request.files['input_file'].stream
+        head = stream.read(PREVIEW_MAX_BYTES)
+        truncated = request.form.get('truncated') == '1' or bool(stream.read(1))
+
+        result = preview(info, head, rows=rows, migration_type=migration_type,
+                         packets=request.form.get('packets') == 'on', truncated=truncated)
+        return jsonify({"status": "success", **result})
+    except (AdapterMismatch, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
 # === Migration Execution ===
 @app.route('/run_migration', methods=['POST'])
 def run_migration():
     debug_logs = []
-    
+    upload_path = None
+    run_id = new_run_id()
+
     try:
+        # Everything this request writes (audits, row logs, debug dumps) goes to runs/<run_id>/
+        set_run_dir(run_dir(run_id))
+
         # === File Upload ===
         if 'input_file' not in request.files:
             return jsonify({"status": "error", "message": "No file uploaded"}), 400
@@ -115,8 +135,6 @@ def run_migration():
         if file.filename == '':
             return jsonify({"status": "error", "message": "Empty filename"}), 400
 
-        content = file.read().decode("utf-8", errors="replace")
-
         # === Parse Form Data ===
         base_url = request.form.get('short_api_url')
         adapter_name = request.form.get('adapter_name')
@@ -126,76 +144,113 @@ def run_migration():
         migration_type = request.form.get('migration_type', 'insert').strip().lower()
         if migration_type not in ['insert', 'update', 'upsert']:
             migration_type = 'insert'
+
+        # === Adapter / Entity Check ===
+        # Declared in the adapter's docblock, so a wrong pairing fails before the upload is touched
+        adapter_info = check_adapter(adapter_name, entity, migration_type)
+        # Row log formats ticked on the form; none ticked means the configured default
+        try:
+            result_formats = check_formats(request.form.getlist('result_formats'))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e), "debug": debug_logs}), 400
+
+        upload_path = spool_upload(file)
+        # Latin-1 / Windows-1252 / UTF-16 and ; or tab delimited exports become plain UTF-8 CSV
+        upload_path, ingest = normalize_csv(upload_path, in_place=True)
+        debug_logs.append(f"🔤 Upload encoding: {ingest['encoding']}, delimiter {ingest['delimiter']!r}, transcoded={ingest['transcoded']}")
+        check_headers(adapter_info, upload_path, migration_type)
         purge_existing = request.form.get('purge_existing') == 'on'
+        delta_only = request.form.get('delta_only') == 'on'
+        reconcile = request.form.get('reconcile') == 'on'
+        dedup_mode = request.form.get('dedup_mode', 'off')
+        if dedup_mode not in DEDUP_MODES:
+            dedup_mode = 'off'
 
         # === Resolve Endpoint ===
         if entity not in ENTITY_ENDPOINTS:
             raise ValueError(f"Unknown entity: {entity}")
         endpoint_path = ENTITY_ENDPOINTS[entity]["path"]
         api_url = f"{base_url}{endpoint_path}"
-        os.environ["ENDPOINT_BASE"] = api_url
 
         # === Auth ===
         token = get_bearer_token(email, password, base_url)
 
+        # === Reference Data ===
+        # Tenant lookups the adapter declares (@reference_data) for name → ID resolution; none for most adapters
+        reference_file = load_reference_data(base_url, token, adapter_info.reference_maps)
+
         # === Adapter Execution ===
-        adapter_path = f"adapters/{adapter_name}.php"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".csv", mode="w", encoding="utf-8") as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        raw_output = run_php_adapter(adapter_path, temp_file_path, migration_type)
-        debug_logs.append("📄 Adapter Output:\n" + json.dumps(raw_output, indent=2))
-        records = raw_output.get("records", [])
+        adapter_path = adapter_info.path
+        # Handed to this adapter process only, never set on the shared web process environment
+        adapter_vars = {"ENDPOINT_BASE": api_url, **adapter_env(reference_file)}
+        # The adapter output is kept with the run (replay reads it) and is as large as the upload
+        output_path = artifact_path("adapter_output", "json", ".")
+        debug_path = artifact_path("debug_output", "txt", ".")
         debug_logs.append(f"🛠 Adapter path: {adapter_path}")
-        debug_logs.append(f"raw_output from php adapter: {raw_output.get('details')}")
-
-        with open("debug_output.txt", "w", encoding="utf-8") as f:
-            f.write("📄 Raw PHP Adapter Output:\n")
-            f.write(json.dumps(raw_output, indent=2))
-            f.write("\n\n")
-            for i, record in enumerate(raw_output.get("records", []), start=1):
-                f.write(f"🔍 Raw Row {i}:\n")
-                f.write(json.dumps(record, indent=2))
-                f.write("\n\n")
-
-        if "error" in raw_output:
-            raise ValueError(f"Adapter failed. Check Adapter Name -> matches Entity?: {raw_output['error']}")
-
-        # === Optional Classification Flattening ===
-        if entity == "classifications" and any("subgroups" in r for r in records):
-            records = flatten_classifications(records)
-
-        # === Run Migration ===
-        summary, stats = run_migration_dispatch(
-            payload=raw_output,
-            migration_type=migration_type,
-            api_url=api_url,
-            auth_token=token,
-            entity=entity,
-            adapter_key=raw_output.get("adapter_key")
-        )
+        with open_adapter_output(adapter_path, upload_path, migration_type, env=adapter_vars, output_path=output_path) as raw_output, \
+                open(debug_path, "w", encoding="utf-8") as debug_file:
+            debug_logs.append(f"raw_output from php adapter: {raw_output.get('details')}")
+            if "error" in raw_output:
+                raise ValueError(f"Adapter failed. Check Adapter Name -> matches Entity?: {raw_output['error']}")
+            records = raw_output.get("records", [])
+
+            # === Optional Classification Flattening ===
+            if entity == "classifications" and isinstance(records, list) and any("subgroups" in r for r in records):
+                records = flatten_classifications(records)
+
+            # Each row is dumped as it goes to the dispatcher, before dispatch fills in IDs
+            raw_output["records"] = debug_rows(raw_output["records"], debug_file, output_path)
+
+            # === Run Migration ===
+            summary, stats = run_migration_dispatch(
+                payload=raw_output,
+                migration_type=migration_type,
+                api_url=api_url,
+                auth_token=token,
+                entity=entity,
+                adapter_key=raw_output.get("adapter_key"),
+                delta=delta_only,
+                reconcile=reconcile,
+                dedup=dedup_mode
+            )
+        record_count = raw_output.get("recordCount", summary["total"])
+        debug_logs.append(f"📄 Adapter Output: {record_count} records (full output in {output_path}, rows in {debug_path})")
+
         # === Write Debug Log ===
-        with open("ui_debug_log.txt", "a", encoding="utf-8") as f:
+        with open(artifact_path("debug_log", "txt", "."), "w", encoding="utf-8") as f:
             for line in debug_logs:
                 f.write(line + "\n")
             for err in stats.errors:
                 f.write(f"❌ {err}\n")
 
         # === Generate Reports ===
-        report_files = generate_report_files(summary, adapter_name, entity, migration_type)
-        report_paths = {
-            "csv": f"/reports/{report_files['csv']}"
-        }
+        summary["run_id"] = run_id
+        report_files = generate_report_files(summary, adapter_name, entity, migration_type, formats=result_formats)
+        report_paths = {fmt: f"/runs/{run_id}/files/{report_files[fmt]}" for fmt in report_files["paths"]}
+        record_run(
+            run_id, summary, report_files,
+            adapter_name=adapter_name,
+            adapter_key=raw_output.get("adapter_key"),
+            entity=entity,
+            migration_type=migration_type,
+            api_url=api_url,
+            base_url=base_url,
+            cache_key=raw_output.get("cache_key"),
+            adapter_output=output_path
+        )
 
         # === Return Response ===
+        # Counters only; rows are paged from the row log via /runs/<run_id>/rows
         response = make_response(jsonify({
             "status": "success",
-            "summary": summary,
+            "run_id": run_id,
+            "summary": response_summary(summary),
             "success_count": summary["success"],
             "skipped_count": summary["skipped"],
+            "unchanged_count": summary.get("unchanged", 0),
+            "duplicate_count": summary.get("duplicates", 0),
             "total_count": summary["total"],
-            "rows": stats.rows,
-            "errors": stats.errors,
+            "rows_url": f"/runs/{run_id}/rows",
             "debug": debug_logs,
             "report_paths": report_paths
         }))
@@ -203,25 +258,140 @@ def run_migration():
 
         print(f"🚀 Migration started for entity: {entity}")
         print(f"📡 Posting to: {api_url}")
-        print(f"📦 Records received: {len(raw_output.get('records', []))}")
+        print(f"📦 Records received: {record_count}")
         print(f"✅ Migration complete: {summary['success']} written, {summary['skipped']} skipped")
         print(f"🕒 Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
         return response
 
+    except UploadTooLarge as e:
+        return jsonify({"status": "error", "message": str(e), "debug": debug_logs}), 413
+    except AdapterMismatch as e:
+        return jsonify({"status": "error", "message": str(e), "debug": debug_logs}), 400
     except Exception as e:
+        record_history(
+            run_id, status="error", message=e,
+            adapter_name=request.form.get('adapter_name'),
+            entity=request.form.get('entity'),
+            migration_type=request.form.get('migration_type'),
+            base_url=request.form.get('short_api_url')
+        )
         error_response = make_response(jsonify({
             "status": "error",
             "message": str(e),
             "debug": debug_logs
         }))
         error_response.headers["Content-Type"] = "application/json; charset=utf-8"
-        return error_response, 500 
+        return error_response, 500
+    finally:
+        set_run_dir(None)
+        discard_upload(upload_path)
+
+# === Replay Failed Rows ===
+@app.route('/replay', methods=['POST'])
+def replay():
+    try:
+        run_id = request.form.get('run_id')
+        email = request.form.get('email')
+        password = request.form.get('password')
+
+        base_url = load_run_manifest(run_id)["base_url"]
+        token = get_bearer_token(email, password, base_url)
+        replay_id = new_run_id()
+        set_run_dir(run_dir(replay_id))
+        manifest, payload, summary, stats = replay_run(run_id, token)
+
+        summary["run_id"] = replay_id
+        report_files = generate_report_files(summary, manifest["adapter_name"], manifest["entity"], manifest["migration_type"],
+                                             formats=manifest.get("result_formats"))
+        # The replay gets its own manifest so a second replay only resends what failed again
+        record_run(
+            replay_id, summary, report_files,
+            **{k: manifest.get(k) for k in REPLAY_FIELDS},
+            replay_of=run_id
+        )
+
+        return jsonify({
+            "status": "success",
+            "run_id": replay_id,
+            "replay_of": run_id,
+            "summary": response_summary(summary),
+            "success_count": summary["success"],
+            "skipped_count": summary["skipped"],
+            "unchanged_count": summary.get("unchanged", 0),
+            "duplicate_count": summary.get("duplicates", 0),
+            "total_count": summary["total"],
+            "rows_url": f"/runs/{replay_id}/rows",
+            "report_paths": {fmt: f"/runs/{replay_id}/files/{report_files[fmt]}" for fmt in report_files["paths"]}
+        })
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        set_run_dir(None)
+
+# === Run History ===
+@app.route('/runs', methods=['GET'])
+def list_runs():
+    args = request.args
+    try:
+        page = int(args.get('page', 1))
+        per_page = int(args.get('per_page', RUN_HISTORY_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"status": "error", "message": "page and per_page must be integers"}), 400
+
+    runs, total = query_runs(
+        page=page,
+        per_page=per_page,
+        since=args.get('since'),
+        until=args.get('until'),
+        **{field: args.get(field) for field in RUN_FILTERS}
+    )
+    return jsonify({"status": "success", "runs": runs, "total": total, "page": page, "per_page": per_page})
+
+@app.route('/runs/<run_id>', methods=['GET'])
+def show_run(run_id):
+    run = get_run(run_id)
+    if run is None:
+        return jsonify({"status": "error", "message": f"Unknown run: {run_id}"}), 404
+    return jsonify({"status": "success", "run": run})
+
+@app.route('/runs/<run_id>/rows', methods=['GET'])
+def run_rows(run_id):
+    args = request.args
+    try:
+        page = int(args.get('page', 1))
+        per_page = int(args.get('per_page', ROW_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"status": "error", "message": "page and per_page must be integers"}), 400
+    try:
+        manifest = load_run_manifest(run_id)
+    except (ValueError, FileNotFoundError):
+        return jsonify({"status": "error", "message": f"Unknown run: {run_id}"}), 404
+
+    rows, total = read_rows(
+        manifest.get("row_log"),
+        page=page,
+        per_page=per_page,
+        q=args.get('q'),
+        **{field: args.get(field) for field in ROW_FILTERS}
+    )
+    return jsonify({"status": "success", "run_id": run_id, "rows": rows, "total": total, "page": page, "per_page": per_page})
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = MAX_UPLOAD_BYTES // (1024 * 1024)
+    return jsonify({"status": "error", "message": f"Upload exceeds the {limit_mb} MB limit"}), 413
          
-# === Serve Report Downloads ===
-@app.route('/reports/<path:filename>')
-def download_report(filename):
-    return send_from_directory('reports', filename)
+# === Serve Run Files ===
+@app.route('/runs/<run_id>/files/<path:filename>')
+def download_run_file(run_id, filename):
+    try:
+        directory = run_dir(run_id)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return send_from_directory(directory, filename, as_attachment=True)
 
 # === Security Tightening after ===
 @app.after_request
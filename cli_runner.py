@@ -1,40 +1,219 @@
 import argparse
 import json
-from helpers.adapter_loader import run_php_adapter
-from helpers.shared_logic import get_bearer_token
-from dispatcher import dispatch
-from reports.report_writer import generate_report_files
+import sys
+from config import PREVIEW_ROWS
+from helpers.adapter_registry import check_adapter, check_headers
+from helpers.dedup import DEDUP_MODES
+from helpers.result_sinks import SINKS
 
-def main():
-    parser = argparse.ArgumentParser(description="Run migration from CLI")
-    parser.add_argument("--adapter", required=True)
-    parser.add_argument("--csv", required=True)
-    parser.add_argument("--base_url", required=True)
-    parser.add_argument("--entity", required=True)
-    parser.add_argument("--email", required=True)
-    parser.add_argument("--password", required=True)
-    parser.add_argument("--migration_type", default="insert")
-    parser.add_argument("--dry_run", action="store_true")
-    args = parser.parse_args()
-
-    adapter_path = f"adapters/{args.adapter}.php"
-    raw_output = run_php_adapter(adapter_path, args.csv, args.migration_type)
-    token = get_bearer_token(args.email, args.password, args.base_url)
+# Each subcommand imports what it needs when it runs, so a preview or --help
+# never loads the request stack, the dispatcher or the report writers
+COMMANDS = ("run", "replay", "preview", "importtime", "batch")
+
+
+def run_csv(args):
+    """Runs one adapter/CSV/entity and returns its summary (with run_id)."""
+    from helpers.adapter_cache import run_php_adapter_cached
+    from helpers.encoding_utils import normalize_csv
+    from helpers.uploads import discard_upload
+    from helpers.shared_logic import get_bearer_token
+    from helpers.reference_data import load_reference_data, adapter_env
+    from helpers.run_context import run_scope, artifact_path
+    from helpers.run_manifest import new_run_id, record_run
+    from dispatcher import dispatch
+    from reports.report_writer import generate_report_files
+
+    adapter_info = check_adapter(args.adapter, migration_type=args.migration_type)
     api_url = f"{args.base_url}/entities/{args.entity}"
+    run_id = new_run_id()
+
+    # Audits and row logs go to runs/<run_id>/, so batch entries running side by side never share a file
+    with run_scope(run_id):
+        # Non-UTF-8 or non-comma exports are transcoded to a temp copy; the original is left alone
+        csv_path, ingest = normalize_csv(args.csv)
+        try:
+            check_headers(adapter_info, csv_path, args.migration_type)
+            token = get_bearer_token(args.email, args.password, args.base_url)
+            reference_file = load_reference_data(args.base_url, token, adapter_info.reference_maps,
+                                                 force=args.refresh_reference)
+            raw_output = run_php_adapter_cached(adapter_info.path, csv_path, args.migration_type,
+                                                use_cache=False if args.no_cache else None,
+                                                env={"ENDPOINT_BASE": api_url, **adapter_env(reference_file)})
+        finally:
+            if ingest["transcoded"]:
+                discard_upload(csv_path)
+        adapter_key = raw_output.get("adapter_key") or adapter_info.adapter_key
+        # Kept with the run so a replay does not depend on the adapter cache (or --no_cache)
+        output_path = artifact_path("adapter_output", "json", ".")
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(raw_output, f)
+
+        summary, stats = dispatch(
+            adapter_key=adapter_key,
+            payload=raw_output,
+            migration_type=args.migration_type,
+            api_url=api_url,
+            auth_token=token,
+            entity=args.entity,
+            delta=args.delta,
+            reconcile=args.reconcile,
+            workers=args.workers,
+            rate_limit=args.rate,
+            dedup=args.dedup
+        )
+        summary["run_id"] = run_id
+
+        report_files = generate_report_files(summary, args.adapter, args.entity, args.migration_type, formats=args.format)
+        print("Reports generated:", report_files)
+        record_run(
+            run_id, summary, report_files,
+            adapter_name=args.adapter,
+            adapter_key=adapter_key,
+            entity=args.entity,
+            migration_type=args.migration_type,
+            api_url=api_url,
+            base_url=args.base_url,
+            cache_key=raw_output.get("cache_key"),
+            adapter_output=output_path
+        )
+    return summary
+
+
+def run(args):
+    print(json.dumps(run_csv(args), indent=2))
+
+
+def batch(args):
+    from helpers.batch import load_batch_manifest, run_batch
+
+    entries = load_batch_manifest(args.manifest, base_url=args.base_url, email=args.email, password=args.password)
+    # Every entry runs in this process: the token, connection pools and entity
+    # definitions fetched by the first entry are reused by the rest
+    combined = run_batch(entries, lambda entry: run_csv(argparse.Namespace(**entry)), parallel=args.parallel)
+    print(json.dumps(combined, indent=2))
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(combined, f, indent=2)
+    if combined["failed_entries"]:
+        sys.exit(1)
+
+
+def replay(args):
+    from helpers.shared_logic import get_bearer_token
+    from helpers.run_context import run_scope
+    from helpers.run_manifest import new_run_id, record_run
+    from helpers.replay import replay_run, REPLAY_FIELDS
+    from reports.report_writer import generate_report_files
+
+    token = get_bearer_token(args.email, args.password, args.base_url)
+    run_id = new_run_id()
+    with run_scope(run_id):
+        manifest, payload, summary, stats = replay_run(
+            args.run_id, token,
+            row_log_path=args.row_log,
+            workers=args.workers,
+            rate_limit=args.rate
+        )
+
+        summary["run_id"] = run_id
+        print(json.dumps(summary, indent=2))
+
+        report_files = generate_report_files(summary, manifest["adapter_name"], manifest["entity"], manifest["migration_type"],
+                                             formats=args.format or manifest.get("result_formats"))
+        print("Reports generated:", report_files)
+        # The replay gets its own manifest so a second replay only resends what failed again
+        record_run(
+            run_id, summary, report_files,
+            **{k: manifest.get(k) for k in REPLAY_FIELDS},
+            replay_of=args.run_id
+        )
+
+
+def preview_csv(args):
+    from helpers.encoding_utils import sniff_file
+    from helpers.preview import preview
+
+    info = check_adapter(args.adapter, migration_type=args.migration_type)
+    # Only the header and the first rows are read, however large the file is
+    encoding, dialect = sniff_file(args.csv)
+    with open(args.csv, "r", encoding=encoding, errors="replace", newline="") as f:
+        result = preview(info, f, rows=args.rows, migration_type=args.migration_type, packets=args.packets,
+                         encoding=encoding, dialect=dialect)
+    print(json.dumps(result, indent=2))
+
+
+def import_times(args):
+    from helpers.import_timing import benchmark, format_report
+
+    print(format_report(benchmark(args.modules, repeat=args.repeat), top=args.top))
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Older invocations pass flags straight away: treat them as "run"
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv.insert(0, "run")
+
+    parser = argparse.ArgumentParser(description="Run migration from CLI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run an adapter over a CSV and send the records")
+    run_parser.add_argument("--adapter", required=True)
+    run_parser.add_argument("--csv", required=True)
+    run_parser.add_argument("--base_url", required=True)
+    run_parser.add_argument("--entity", required=True)
+    run_parser.add_argument("--email", required=True)
+    run_parser.add_argument("--password", required=True)
+    run_parser.add_argument("--migration_type", default="insert")
+    run_parser.add_argument("--dry_run", action="store_true")
+    run_parser.add_argument("--delta", action="store_true", help="Only send rows changed since the last successful run")
+    run_parser.add_argument("--reconcile", action="store_true",
+                            help="Treat the CSV as each team's complete relationship set and send only the relates/unrelates needed")
+    run_parser.add_argument("--dedup", choices=DEDUP_MODES, default="off", help="Reject or coalesce duplicate keys before sending")
+    run_parser.add_argument("--no_cache", action="store_true", help="Always re-run the PHP adapter")
+    run_parser.add_argument("--refresh_reference", action="store_true", help="Re-fetch the tenant lookup maps even if the cached copy is fresh")
+    run_parser.add_argument("--workers", type=int, default=1, help="Split the records across N worker processes")
+    run_parser.add_argument("--rate", type=float, default=0, help="Global request budget per second across all workers (0 = unlimited)")
+    run_parser.add_argument("--format", action="append", choices=SINKS,
+                            help="Row log format, repeatable: csv, ndjson, parquet (needs pyarrow), sqlite; default MIGRATION_RESULT_FORMATS")
+    run_parser.set_defaults(func=run)
+
+    replay_parser = commands.add_parser("replay", help="Resend only the rows that failed with a retryable status in an earlier run")
+    replay_parser.add_argument("--run_id", required=True)
+    replay_parser.add_argument("--base_url", required=True)
+    replay_parser.add_argument("--email", required=True)
+    replay_parser.add_argument("--password", required=True)
+    replay_parser.add_argument("--row_log", help="Row log (any format) to read failures from (defaults to the run's own)")
+    replay_parser.add_argument("--workers", type=int, default=1)
+    replay_parser.add_argument("--rate", type=float, default=0)
+    replay_parser.add_argument("--format", action="append", choices=SINKS, help="Row log format(s) of the replay (defaults to the original run's)")
+    replay_parser.set_defaults(func=replay)
+
+    preview_parser = commands.add_parser("preview", help="Check a CSV's header and first rows against an adapter without sending anything")
+    preview_parser.add_argument("--adapter", required=True)
+    preview_parser.add_argument("--csv", required=True)
+    preview_parser.add_argument("--migration_type", default="insert")
+    preview_parser.add_argument("--rows", type=int, default=PREVIEW_ROWS)
+    preview_parser.add_argument("--packets", action="store_true", help="Run the adapter on the sampled rows and show the packets it would send")
+    preview_parser.set_defaults(func=preview_csv)
 
-    summary, stats = dispatch(
-        adapter_key=args.adapter,
-        payload=raw_output,
-        migration_type=args.migration_type,
-        api_url=api_url,
-        auth_token=token,
-        entity=args.entity
-    )
+    batch_parser = commands.add_parser("batch", help="Run every entry of a JSON batch manifest in one process")
+    batch_parser.add_argument("--manifest", required=True, help="JSON file listing adapter, csv, entity and migration_type per entry")
+    batch_parser.add_argument("--base_url", help="Default for entries that do not set their own")
+    batch_parser.add_argument("--email")
+    batch_parser.add_argument("--password")
+    batch_parser.add_argument("--parallel", type=int, default=4, help="Entries of one stage run at the same time")
+    batch_parser.add_argument("--summary", help="Also write the combined summary to this file")
+    batch_parser.set_defaults(func=batch)
 
-    print(json.dumps(summary, indent=2))
+    timing_parser = commands.add_parser("importtime", help="Measure cold-start import time of the runner's modules")
+    timing_parser.add_argument("modules", nargs="*", default=["cli_runner", "dispatcher", "handlers.generic", "app"])
+    timing_parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module; the median is reported")
+    timing_parser.add_argument("--top", type=int, default=10, help="Slowest imports listed per module")
+    timing_parser.set_defaults(func=import_times)
 
-    report_files = generate_report_files(summary, args.adapter, args.entity, args.migration_type)
-    print("Reports generated:", report_files)
+    args = parser.parse_args(argv)
+    args.func(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,97 @@
+# config.py
+import os
+
+# === Request Engine ===
+# Requests in flight per run (per worker process when --workers is used)
+MAX_WORKERS = int(os.environ.get("MIGRATION_MAX_WORKERS", "8"))
+# Rows allowed between the prepare stage and the result sink; bounds pending
+# futures and memory, and makes the prepare stage wait when the sink falls behind
+PIPELINE_DEPTH = int(os.environ.get("MIGRATION_PIPELINE_DEPTH", "500"))
+# (connect, read) seconds: a dead host fails in CONNECT_TIMEOUT instead of
+# holding a worker for minutes; specs can set their own pair
+CONNECT_TIMEOUT = float(os.environ.get("MIGRATION_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.environ.get("MIGRATION_READ_TIMEOUT", "60"))
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# === Circuit Breaker ===
+# Trips after this many failures (5xx, timeouts, connection errors) in a row...
+CIRCUIT_CONSECUTIVE_FAILURES = int(os.environ.get("MIGRATION_CIRCUIT_FAILURES", "10"))
+# ...or when this share of the last CIRCUIT_WINDOW requests failed (after CIRCUIT_MIN_CALLS)
+CIRCUIT_ERROR_RATE = float(os.environ.get("MIGRATION_CIRCUIT_ERROR_RATE", "0.5"))
+CIRCUIT_WINDOW = 50
+CIRCUIT_MIN_CALLS = 20
+# While open, one probe request is let through after 5s, 10s, 20s ... up to the max interval
+CIRCUIT_PROBE_INITIAL = 5
+CIRCUIT_PROBE_MAX = 300
+# Seconds the circuit may stay open before the run gives up; unsent rows are left for replay
+CIRCUIT_MAX_PAUSE = int(os.environ.get("MIGRATION_CIRCUIT_MAX_PAUSE", "900"))
+# Seconds an entity definition fetched with one token is reused in-process
+DEFINITION_CACHE_TTL = int(os.environ.get("MIGRATION_DEFINITION_CACHE_TTL", "300"))
+
+# === Uploads ===
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("MIGRATION_MAX_UPLOAD_MB", "1024")) * 1024 * 1024
+# None → the system temp directory
+UPLOAD_DIR = os.environ.get("MIGRATION_UPLOAD_DIR") or None
+
+# === Adapter Output Cache ===
+ADAPTER_CACHE_ENABLED = os.environ.get("MIGRATION_ADAPTER_CACHE", "1") != "0"
+ADAPTER_CACHE_MAX_ENTRIES = int(os.environ.get("MIGRATION_ADAPTER_CACHE_ENTRIES", "32"))
+
+# === Run History ===
+RUN_HISTORY_DB = os.environ.get("MIGRATION_HISTORY_DB") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_history", "history.sqlite")
+RUN_HISTORY_PAGE_SIZE = 50
+# Rows per page served from a run's row log (/runs/<id>/rows)
+ROW_PAGE_SIZE = 200
+ROW_PAGE_MAX = 1000
+
+# === Async Transport ===
+# Specs with transport="async" use one event loop with this many requests in flight
+ASYNC_MAX_IN_FLIGHT = int(os.environ.get("MIGRATION_ASYNC_IN_FLIGHT", "200"))
+# "0" forces every entity back onto the threaded requests path
+ASYNC_TRANSPORT_ENABLED = os.environ.get("MIGRATION_ASYNC_TRANSPORT", "1") != "0"
+
+# === Tenant Governor ===
+# Total requests per second one tenant receives once two or more runs overlap on it (a lone run
+# is held only to its own --rate); 0 turns the governor off
+TENANT_RATE_LIMIT = float(os.environ.get("MIGRATION_TENANT_RATE", "25"))
+# Share the budget with runs in other processes (CLI, other app workers) through a lease table
+TENANT_LEASE_SHARED = os.environ.get("MIGRATION_TENANT_LEASE_SHARED", "1") != "0"
+TENANT_LEASE_DB = os.environ.get("MIGRATION_TENANT_LEASE_DB") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_history", "leases.sqlite")
+
+# === Reference Data ===
+# Lookup maps prefetched from the tenant and handed to adapters as a JSON sidecar
+REFERENCE_DATA_ENABLED = os.environ.get("MIGRATION_REFERENCE_DATA", "1") != "0"
+# Seconds a tenant's cached lookups are reused before being fetched again
+REFERENCE_TTL = int(os.environ.get("MIGRATION_REFERENCE_TTL", "900"))
+# The classification the project groups sit under; only its subtree goes into projectGroups
+PROJECT_GROUP_ROOT = os.environ.get("MIGRATION_PROJECT_GROUP_ROOT", "Project Groups")
+# map name -> where it comes from: API path, optional key holding the list,
+# label field, value field, (for trees) the parent field for "Parent:Label" keys
+# and the root classification whose subtree is kept
+REFERENCE_SOURCES = {
+    "classifications": {"path": "/classifications", "key": "name", "value": "id", "parent": "parentId"},
+    "projectGroups": {"path": "/classifications", "key": "name", "value": "id", "parent": "parentId",
+                      "root": PROJECT_GROUP_ROOT},
+    "teams": {"path": "/entities/team", "key": "name", "value": "id"},
+    "roles": {"path": "/definition/entity/user", "items": "stereotypes", "key": "name", "value": "name"},
+}
+
+# === Reconcile ===
+# Where the current relationships of one team are read from, per adapter key:
+# URL template, optional key holding the list, and the fields compared
+RECONCILE_SOURCES = {
+    "teams_projects_relationship": {"url": "{api_url}/{team}", "items": "projects", "id": "id"},
+    "users_teams_role": {"url": "{api_url}/{team}/users", "user": "userId", "stereotype": "stereotype"},
+}
+
+# === Preview ===
+# Bytes of an upload read for /preview; the UI only sends this much of the file
+PREVIEW_MAX_BYTES = 256 * 1024
+# Data rows read and shown by a preview
+PREVIEW_ROWS = 10
+
+# === Result Sinks ===
+# Formats a run's row log is written in: csv, ndjson, parquet (needs pyarrow)
+# or sqlite. The first is the one the row viewer and replay read back.
+RESULT_FORMATS = [fmt.strip() for fmt in os.environ.get("MIGRATION_RESULT_FORMATS", "csv").split(",") if fmt.strip()]
@@ -1,34 +1,166 @@
 # dispatcher.py
+import importlib
+from functools import partial
+from helpers.dedup import dedupe, log_duplicates
+from helpers.delta_store import DeltaStore
+from helpers.record_store import RecordStore
+from helpers.hierarchy import has_local_parents, run_tree, TREE_FIELDS
+from helpers.reconcile import supports_reconcile, run_reconcile, UNRELATE_KEYS
+from helpers.request_engine import set_rate_limiter, set_circuit_breaker, CircuitBreaker
+from helpers.tenant_governor import tenant_lease
+from helpers.entity_specs import ENTITY_SPECS
 
-# === Entity handlers ===
-from handlers import users, classifications, projects, teams
-
-# === Relationship handlers ===
-from handlers.relationships import (
-    event_user,
-    teams_users,
-    teams_users_unrelate,
-    teams_projects,
-    teams_projects_unrelate
-)
 print("✅ dispatcher.py loaded — expecting 7 args")
 
 # === Adapter key → handler mapping ===
-ADAPTER_HANDLERS = {
-    "users": users.handle,
-    "classifications": classifications.handle,
-    "projects": projects.handle,
-    "teams": teams.handle,
-    "event_user_relationship": event_user.handle,
-    "users_teams_role": teams_users.handle,
-    "users_teams_unrelate": teams_users_unrelate.handle,
-    "teams_projects_relationship": teams_projects.handle,
-    "teams_projects_unrelate": teams_projects_unrelate.handle
-}
+# Every adapter key runs through the generic handler with its own spec. The
+# handler module (thread pool, event loop, transports) is imported on the
+# first dispatch rather than with the dispatcher.
+HANDLER_MODULE = "handlers.generic"
+_handlers = {}
+
+
+def get_handler(adapter_key):
+    if adapter_key not in _handlers:
+        spec = ENTITY_SPECS.get(adapter_key)
+        if spec is None:
+            return None
+        _handlers[adapter_key] = partial(importlib.import_module(HANDLER_MODULE).handle, spec=spec)
+    return _handlers[adapter_key]
+
+# === Record Index Stamp ===
+def stamp_record_index(records):
+    for _ in stamped(records):
+        pass
+
+
+def stamped(records):
+    # Position in the adapter output, stable across any filtering before the handler runs
+    for i, record in enumerate(records, start=1):
+        if isinstance(record, dict):
+            meta = record.setdefault("meta", {})
+            if isinstance(meta, dict):
+                meta.setdefault("recordIndex", i)
+        yield record
 
 # === Dispatcher entry point ===
-def dispatch(adapter_key, payload, migration_type, api_url, auth_token, entity):    
-    handler = ADAPTER_HANDLERS.get(adapter_key)
+def dispatch(adapter_key, payload, migration_type, api_url, auth_token, entity,
+             delta=False, workers=1, rate_limit=0, dedup="off", reconcile=False):
+    handler = get_handler(adapter_key)
     if not handler:
         raise ValueError(f"❌ No handler defined for adapter key: '{adapter_key}'")
-    return handler(payload, migration_type, api_url, auth_token, entity)
\ No newline at end of file
+    if reconcile and not supports_reconcile(adapter_key):
+        raise ValueError(f"❌ Reconcile is not available for adapter key: '{adapter_key}'")
+    records = payload.get("records", [])
+    streamed = not isinstance(records, list)
+    if streamed and (delta or reconcile or (dedup and dedup != "off") or (workers and workers > 1)
+                     or adapter_key in TREE_FIELDS):
+        # These need every record before the first request goes out
+        records = payload["records"] = list(records)
+        streamed = False
+    if streamed:
+        # Records read from a running adapter (stream_php_adapter) go straight to the handler
+        payload["records"] = stamped(records)
+        store = None
+    else:
+        stamp_record_index(records)
+        store = RecordStore(records, adapter_key)
+
+    # Duplicate keys are settled before any request is made
+    duplicates = []
+    if dedup and dedup != "off":
+        store, duplicates = dedupe(store, dedup)
+        payload = {**payload, "records": store.records}
+
+    # One request budget for the whole run, shared by every worker process and
+    # fairly divided with any other run on the same tenant
+    with tenant_lease(api_url, rate_limit) as rate_limiter:
+        set_rate_limiter(rate_limiter)
+        # Pauses the run while the tenant returns 5xx / times out, and gives up after CIRCUIT_MAX_PAUSE
+        breaker = CircuitBreaker(adapter_key)
+        set_circuit_breaker(breaker)
+        if workers and workers > 1:
+            from helpers.parallel_runner import run_partitioned  # process pool machinery only when asked for
+            handler = partial(run_partitioned, adapter_key, workers=workers, rate_limiter=rate_limiter)
+        # Children naming a parent by local id wait for that parent's level to be created
+        tree = store is not None and has_local_parents(store)
+        if tree and not delta:
+            handler = partial(run_tree, handler, adapter_key)
+        try:
+            if reconcile:
+                # Diffed against the live relationships, so the local delta store is not consulted
+                summary, stats = run_reconcile(handler, get_handler(UNRELATE_KEYS.get(adapter_key)), store, payload,
+                                               migration_type, api_url, auth_token, entity)
+            elif delta:
+                summary, stats = dispatch_delta(handler, store, payload, migration_type, api_url, auth_token, entity,
+                                                tree=tree)
+            else:
+                summary, stats = handler(payload, migration_type, api_url, auth_token, entity)
+        finally:
+            set_rate_limiter(None)
+            set_circuit_breaker(None)
+
+    if breaker.trips:
+        summary["circuit"] = breaker.snapshot()
+
+    # Rows the adapter could not encode never became records; they still count as skipped
+    dropped = payload.get("droppedRecords") or []
+    log_dropped(stats, dropped)
+    if duplicates:
+        log_duplicates(stats, duplicates)
+    if duplicates or dropped:
+        refresh_summary(summary, stats)
+    return summary, stats
+
+# === Adapter Drops ===
+def log_dropped(stats, dropped):
+    for drop in dropped:
+        if not isinstance(drop, dict):
+            continue
+        reason = f"Dropped by adapter: {drop.get('reason', '')}"
+        stats.total += 1
+        stats.log_skip(drop.get("rowIndex", ""), {"recordIndex": "", "sourceRow": drop.get("rowIndex", "")}, reason)
+
+# === Summary Refresh ===
+def refresh_summary(summary, stats):
+    # Counters logged after the handler returned are folded back into its summary
+    summary["total"] = stats.total
+    summary["skipped"] = stats.skipped
+    summary["unchanged"] = stats.unchanged
+    summary["duplicates"] = stats.duplicates
+    summary["errors"] = stats.errors
+    summary["rows"] = stats.rows
+
+# === Delta Dispatch ===
+def dispatch_delta(handler, store, payload, migration_type, api_url, auth_token, entity, tree=False):
+    adapter_key = store.adapter_key
+    delta_store = DeltaStore(adapter_key, api_url)
+    if tree:
+        # A changed child of an unchanged parent resolves it through the IDs saved by earlier runs
+        handler = partial(run_tree, handler, adapter_key, known_ids=delta_store.ids)
+    plan = delta_store.diff(store)
+    outgoing = plan["inserted"] + plan["changed"]
+    print(f"🔁 Delta for {adapter_key}: {len(plan['inserted'])} inserted, {len(plan['changed'])} changed, "
+          f"{len(plan['unchanged'])} unchanged, {len(plan['deleted'])} deleted")
+
+    delta_payload = {**payload, "records": [record for record, _, _ in outgoing]}
+    summary, stats = handler(delta_payload, migration_type, api_url, auth_token, entity)
+
+    # Unchanged rows are reported without any HTTP traffic
+    for record, key, _ in plan["unchanged"]:
+        meta = record.get("meta", {})
+        stats.log_unchanged(meta.get("recordIndex", ""), {
+            "name": meta.get("name", ""),
+            "id": meta.get("id", ""),
+            "delta_key": key,
+            "reason": "Unchanged since last run"
+        })
+
+    # Only rows the API accepted are remembered for the next run
+    accepted = [outgoing[i - 1] for i in stats.success_indices if 0 < i <= len(outgoing)]
+    delta_store.commit(accepted)
+
+    refresh_summary(summary, stats)
+    summary["deleted"] = len(plan["deleted"])
+    summary["deleted_keys"] = plan["deleted"]
+    return summary, stats
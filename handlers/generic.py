@@ -0,0 +1,364 @@
+# handlers/generic.py
+# One send loop for every entity. What differs per entity (packet shape,
+# route, validation, success statuses) lives in helpers/entity_specs.py.
+#
+# Rows flow through three stages that run at the same time:
+#   prepare (calling thread) → send (thread pool / event loop) → sink (record_outcome, in file order)
+# joined by a bounded queue, so a slow sink holds back preparation instead of growing memory.
+import asyncio
+import queue
+import sys
+import threading
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from config import MAX_WORKERS, PIPELINE_DEPTH, ASYNC_MAX_IN_FLIGHT
+from helpers.logger import MigrationStats, build_log_entry, write_detailed_audit_csv
+from helpers.request_engine import (send_request, send_request_async, async_available, async_client, get_rate_limiter,
+                                    get_circuit_breaker, CircuitOpen, never_sent)
+from helpers.shared_logic import build_auth_headers, fetch_entity_definition
+
+
+class RowJob:
+    def __init__(self, i, record):
+        self.i = i
+        self.record = record
+        self.meta = record.get("meta", {}) if isinstance(record, dict) else {}
+        self.method = None
+        self.endpoint = None
+        self.packet = None
+        self.log_entry = None
+        self.skip_reason = None
+        self.lock = None
+        self.status_code = None
+        self.message = ""
+        self.response_id = ""
+        self.attempts = 0
+        self.result = "Skipped"
+
+
+def _retry_after(response, default):
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return max(float(value), default)
+    except (TypeError, ValueError):
+        return default
+
+
+def prepare(job, spec, ctx):
+    """
+    Builds the packet, route and log entry for one row, or sets skip_reason.
+    Runs on the calling thread so validation failures never use a worker.
+    """
+    if not isinstance(job.record, dict):
+        job.skip_reason = "Invalid record format"
+        job.log_entry = {}
+        return job
+
+    try:
+        job.packet, params = spec.build_packet(job.record, ctx)
+    except Exception as e:
+        job.skip_reason = f"Packet build failed: {e}"
+        job.log_entry = dict(job.meta)
+        return job
+
+    method, template = spec.route(ctx["migration_type"])
+    job.method = method or params.get("method", "POST")
+    job.endpoint = template.format(api_url=ctx["api_url"], **{k: v if v is not None else "" for k, v in params.items()})
+
+    def get_log_field(field):
+        return job.meta.get(field, "")
+
+    def get_record_id():
+        return params.get("id") or ""
+
+    job.log_entry = build_log_entry(job.i, job.method, job.endpoint, job.record, get_log_field, get_record_id)
+    job.log_entry["recordIndex"] = job.meta.get("recordIndex", job.i)
+    job.log_entry["sourceRow"] = job.meta.get("rowIndex", "")
+    for field in spec.log_fields:
+        job.log_entry[field] = get_log_field(field)
+    if "projectOperations" in job.packet:
+        ops = job.packet["projectOperations"] or {}
+        job.log_entry["relate"] = ops.get("relate", ops.get("Relate", []))
+        job.log_entry["unrelate"] = ops.get("unrelate", ops.get("Unrelate", []))
+
+    if spec.validate:
+        job.skip_reason = spec.validate(job.record, job.packet, params, ctx)
+    return job
+
+
+def send(job, spec, headers, limiter=None, breaker=None):
+    if job.lock is not None:
+        with job.lock:
+            return _send(job, spec, headers, limiter, breaker)
+    return _send(job, spec, headers, limiter, breaker)
+
+
+def _accept(job, spec, response):
+    """
+    Applies one response to the job. Returns True when no retry is needed.
+    Shared by the threaded and async transports so both log the same outcomes.
+    """
+    job.status_code = response.status_code
+    job.message = response.text.strip() or "No response body"
+
+    if job.status_code in spec.success_statuses and (spec.response_ok is None or spec.response_ok(job.message)):
+        job.result = "Success"
+        try:
+            body = response.json()
+            job.response_id = body.get("id", "") if isinstance(body, dict) else ""
+        except ValueError:
+            job.response_id = ""
+        return True
+    if job.status_code in spec.permanent_statuses or job.status_code in spec.success_statuses:
+        job.result = "Skipped"
+        return True
+    job.result = "Error"
+    return False
+
+
+def _failed(job, error):
+    # CircuitOpen and NotSent rows never reached the server; their status marks them for replay
+    if isinstance(error, CircuitOpen):
+        job.status_code = "CircuitOpen"
+    else:
+        job.status_code = "NotSent" if never_sent(error) else "Exception"
+    job.message = str(error)
+    job.result = "Error"
+
+
+def _retry_delay(job, spec, response, attempt):
+    delay = _retry_after(response, spec.retry_delay * (2 ** (attempt - 1)))
+    print(f"⏳ Row {job.i} attempt {attempt} failed ({job.status_code}). Retrying in {delay}s...")
+    return delay
+
+
+IDEMPOTENT_METHODS = ("GET", "PUT", "PATCH", "DELETE")
+
+
+def _may_retry(job, spec, response, error):
+    """
+    PUT/PATCH (and specs marked resend_posts) retry on any failure. A POST
+    create that failed may already be committed, so it is only resent when
+    the server never took it: a connect error, 429, or 503 with Retry-After.
+    """
+    if spec.resend_posts or job.method in IDEMPOTENT_METHODS:
+        return True
+    if error is not None:
+        return never_sent(error)
+    return response.status_code == 429 or (response.status_code == 503 and "Retry-After" in response.headers)
+
+
+def _send(job, spec, headers, limiter=None, breaker=None):
+    for attempt in range(1, spec.max_retries + 1):
+        job.attempts = attempt
+        response = error = None
+        try:
+            response = send_request(job.method, job.endpoint, limiter=limiter, breaker=breaker,
+                                    json=job.packet, headers=headers, timeout=spec.timeout)
+            if _accept(job, spec, response):
+                return job
+        except CircuitOpen as e:
+            _failed(job, e)
+            return job
+        except Exception as e:
+            _failed(job, e)
+            error = e
+
+        if attempt == spec.max_retries or not _may_retry(job, spec, response, error):
+            return job
+        time.sleep(_retry_delay(job, spec, response, attempt))
+    return job
+
+
+async def send_async(job, spec, headers, client, in_flight, limiter=None, breaker=None):
+    if job.lock is not None:
+        async with job.lock:
+            return await _send_async(job, spec, headers, client, in_flight, limiter, breaker)
+    return await _send_async(job, spec, headers, client, in_flight, limiter, breaker)
+
+
+async def _send_async(job, spec, headers, client, in_flight, limiter=None, breaker=None):
+    for attempt in range(1, spec.max_retries + 1):
+        job.attempts = attempt
+        response = error = None
+        try:
+            async with in_flight:
+                response = await send_request_async(client, job.method, job.endpoint, limiter=limiter, breaker=breaker,
+                                                    json=job.packet, headers=headers, timeout=spec.timeout)
+            if _accept(job, spec, response):
+                return job
+        except CircuitOpen as e:
+            _failed(job, e)
+            return job
+        except Exception as e:
+            _failed(job, e)
+            error = e
+
+        if attempt == spec.max_retries or not _may_retry(job, spec, response, error):
+            return job
+        # Back off outside the semaphore so other rows keep flowing
+        await asyncio.sleep(_retry_delay(job, spec, response, attempt))
+    return job
+
+
+def record_outcome(job, spec, stats, ctx):
+    entry = job.log_entry
+    if job.skip_reason:
+        stats.log_skip(job.i, entry, job.skip_reason)
+        return
+
+    entry.update({
+        "entity": ctx["entity"],
+        "adapter_key": ctx["adapter_key"],
+        "timestamp": datetime.datetime.now().isoformat(),
+        "duration": round(stats.elapsed(), 2),
+        "attempts": job.attempts,
+        "status_code": job.status_code,
+        "message": job.message[:500],
+        "response_id": job.response_id,
+        "error": job.message if job.status_code in ("Exception", "NotSent") else "",
+        "result": job.result
+    })
+    print(f"📥 Row {job.i}: {job.method} {job.endpoint} → {job.status_code} — {job.message[:200]}")
+
+    if job.result == "Success":
+        stats.log_success(job.i, entry)
+    elif job.result == "Skipped":
+        stats.log_skip(job.i, entry, f"HTTP {job.status_code}: {job.message[:200]}")
+    elif job.status_code == "CircuitOpen":
+        stats.log_skip(job.i, entry, f"Not sent: {job.message[:200]} (replay this run once the tenant recovers)")
+    elif job.status_code == "NotSent":
+        stats.log_skip(job.i, entry, f"Not sent after {job.attempts} attempts: {job.message[:200]} (safe to replay)")
+    elif job.status_code == "Exception":
+        stats.log_skip(job.i, entry, f"Request failed after {job.attempts} attempts: {job.message[:200]}")
+    else:
+        stats.log_skip(job.i, entry, f"Failed after {job.attempts} attempts: HTTP {job.status_code}: {job.message[:200]}")
+
+
+def _prepared(records, spec, ctx):
+    serial_locks = {}
+    lock_type = asyncio.Lock if spec.transport == "async" and async_available() else threading.Lock
+    for i, record in enumerate(records, start=1):
+        job = prepare(RowJob(i, record), spec, ctx)
+        if spec.serial_key and not job.skip_reason:
+            job.lock = serial_locks.setdefault(job.meta.get(spec.serial_key), lock_type())
+        yield job
+
+
+_DONE = object()
+
+
+def _run_threaded(records, spec, ctx, headers, stats, workers):
+    pending = queue.Queue(maxsize=PIPELINE_DEPTH)
+    sink_errors = []
+
+    def sink():
+        # Takes futures in submission order, so row logs keep file order
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                return
+            job, future = item
+            try:
+                if future is not None:
+                    future.result()
+                stats.total += 1
+                record_outcome(job, spec, stats, ctx)
+            except Exception as e:
+                sink_errors.append(e)
+
+    sink_thread = threading.Thread(target=sink, name=f"{spec.name}-sink", daemon=True)
+    sink_thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for job in _prepared(records, spec, ctx):
+                future = None if job.skip_reason else pool.submit(send, job, spec, headers, ctx["limiter"], ctx["breaker"])
+                pending.put((job, future))   # blocks while the sink is PIPELINE_DEPTH rows behind
+    finally:
+        pending.put(_DONE)
+        sink_thread.join()
+        sys.stdout.flush()
+    if sink_errors:
+        raise sink_errors[0]
+
+
+async def _run_async(records, spec, ctx, headers, stats, in_flight):
+    pending = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+    semaphore = asyncio.Semaphore(in_flight)
+    sink_errors = []
+
+    async def sink():
+        while True:
+            item = await pending.get()
+            if item is _DONE:
+                return
+            job, task = item
+            try:
+                if task is not None:
+                    await task
+                stats.total += 1
+                record_outcome(job, spec, stats, ctx)
+            except Exception as e:
+                sink_errors.append(e)
+
+    async with async_client(in_flight) as client:
+        sink_task = asyncio.create_task(sink())
+        jobs = _prepared(records, spec, ctx)
+        while True:
+            # Streamed records are read off the adapter's stdout, which must not block the event loop
+            job = next(jobs, _DONE) if isinstance(records, list) else await asyncio.to_thread(next, jobs, _DONE)
+            if job is _DONE:
+                break
+            task = None if job.skip_reason else asyncio.create_task(send_async(job, spec, headers, client, semaphore, ctx["limiter"], ctx["breaker"]))
+            await pending.put((job, task))
+        await pending.put(_DONE)
+        await sink_task
+    sys.stdout.flush()
+    if sink_errors:
+        raise sink_errors[0]
+
+
+def handle(payload, migration_type, api_url, auth_token, entity, spec=None):
+    headers = build_auth_headers(auth_token)
+    stats = MigrationStats()
+    records = payload.get("records", [])
+    count = len(records) if isinstance(records, list) else "streamed"
+    ctx = {
+        "api_url": api_url,
+        "migration_type": migration_type,
+        "entity": entity,
+        "adapter_key": payload.get("adapter_key", spec.name),
+        "definition": None,
+        "limiter": get_rate_limiter(),
+        "breaker": get_circuit_breaker()
+    }
+
+    if spec.fetch_definition:
+        definition_url = api_url.replace("/entities/", "/definition/entity/")
+        ctx["definition"] = fetch_entity_definition(definition_url, headers)
+
+    if spec.transport == "async" and async_available():
+        in_flight = spec.concurrency or ASYNC_MAX_IN_FLIGHT
+        print(f"🚀 {spec.name}: {count} records, migration_type={migration_type}, {in_flight} in flight (async)")
+        sys.stdout.flush()
+        asyncio.run(_run_async(records, spec, ctx, headers, stats, in_flight))
+    else:
+        workers = spec.concurrency or MAX_WORKERS
+        print(f"🚀 {spec.name}: {count} records, migration_type={migration_type}, {workers} concurrent requests")
+        sys.stdout.flush()
+        _run_threaded(records, spec, ctx, headers, stats, workers)
+
+    write_detailed_audit_csv(stats, spec.name)
+    if spec.summary_csv:
+        stats.write_summary_csv(spec.summary_csv)
+
+    print(f"✅ {spec.name} complete: {stats.success} succeeded, {stats.skipped} skipped, {stats.total} total")
+    if stats.skipped:
+        print("⚠️ Skipped Reasons:")
+        for reason in stats.skip_reasons[:50]:
+            print(f"   - {reason}")
+
+    summary = stats.summary()
+    summary["generatedAt"] = datetime.datetime.now().isoformat()
+    return summary, stats
@@ -0,0 +1,145 @@
+# helpers/adapter_cache.py
+import glob
+import hashlib
+import json
+import os
+import threading
+import pickle
+from contextlib import contextmanager
+from config import ADAPTER_CACHE_ENABLED, ADAPTER_CACHE_MAX_ENTRIES
+from helpers.adapter_loader import run_php_adapter, stream_php_adapter
+
+# Repo root = parent of current script directory
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(repo_root, "cache", "adapter_output")
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def adapter_cache_key(adapter_path, input_file, migration_type, env=None):
+    parts = [
+        file_digest(adapter_path),
+        file_digest(input_file),
+        migration_type,
+    ]
+    # The shared adapter include (adapters/lib) is part of every adapter
+    lib_dir = os.path.join(os.path.dirname(adapter_path), "lib")
+    for lib_path in sorted(glob.glob(os.path.join(lib_dir, "*.php"))):
+        parts.append(file_digest(lib_path))
+    # Adapter variables count too: Event User bakes ENDPOINT_BASE into each record.
+    # Sidecar files (reference data) count by content, so refreshed lookups re-run the adapter
+    for name, value in sorted((env or {}).items()):
+        parts.append(f"{name}={file_digest(value) if os.path.isfile(value) else value}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.pickle")
+
+
+def load_cached_output(key):
+    path = _entry_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            output = pickle.load(f)
+    except FileNotFoundError:
+        return None     # evicted by another worker since the exists() check
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        print(f"⚠️ [adapter_cache] Dropping unreadable entry {path}: {e}")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return None
+    try:
+        os.utime(path)  # mtime doubles as the LRU clock
+    except FileNotFoundError:
+        pass            # evicted while being read; the output is still good
+    return output
+
+
+def store_output(key, output):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"  # one per writer: other workers may be writing too
+    with open(tmp_path, "wb") as f:
+        pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    evict(ADAPTER_CACHE_MAX_ENTRIES)
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0      # already gone; sorts first and is skipped below
+
+
+def evict(max_entries):
+    entries = [
+        os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith(".pickle")
+    ]
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=_mtime)
+    for path in entries[:len(entries) - max_entries]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue    # another worker evicted it first
+        print(f"🧹 [adapter_cache] Evicted {os.path.basename(path)}")
+
+
+def run_php_adapter_cached(adapter_path, input_file, migration_type, use_cache=None, env=None):
+    """
+    run_php_adapter behind a content-addressed cache keyed by the adapter
+    source, the input file and the migration type. Failed runs are never cached.
+    """
+    if use_cache is None:
+        use_cache = ADAPTER_CACHE_ENABLED
+    if not use_cache:
+        return run_php_adapter(adapter_path, input_file, migration_type, env=env)
+
+    key = adapter_cache_key(adapter_path, input_file, migration_type, env=env)
+    output = load_cached_output(key)
+    if output is not None:
+        print(f"⚡ [adapter_cache] Hit for {os.path.basename(adapter_path)} — skipping adapter run")
+    else:
+        output = run_php_adapter(adapter_path, input_file, migration_type, env=env)
+        if isinstance(output, dict) and "error" not in output:
+            store_output(key, output)
+    if isinstance(output, dict):
+        output["cache_key"] = key
+    return output
+
+
+@contextmanager
+def open_adapter_output(adapter_path, input_file, migration_type, env=None, output_path=None):
+    """
+    The adapter output for one run, written to `output_path` as well. A cached
+    output is used whole; otherwise the adapter is streamed (stream_php_adapter),
+    so its records reach the dispatcher while it is still running. Streamed
+    output is not cached: keeping it would mean holding every record again.
+    """
+    output = None
+    if ADAPTER_CACHE_ENABLED:
+        key = adapter_cache_key(adapter_path, input_file, migration_type, env=env)
+        output = load_cached_output(key)
+    if output is not None:
+        print(f"⚡ [adapter_cache] Hit for {os.path.basename(adapter_path)} — skipping adapter run")
+        output["cache_key"] = key
+        if output_path:
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(output, f)
+        yield output
+        return
+    with stream_php_adapter(adapter_path, input_file, migration_type, env=env, tee_path=output_path) as output:
+        yield output
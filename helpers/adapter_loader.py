@@ -2,45 +2,149 @@
 import subprocess
 import json
 import os
+import tempfile
+from contextlib import contextmanager
 
-def run_php_adapter(adapter_path, input_file, migration_type):
+# adapters/lib/csv_stream.php opens the document on one line ending in this,
+# writes each record on its own line and closes it with a "]," line
+RECORDS_OPEN = ',"records":['
+
+def run_php_adapter(adapter_path, input_file, migration_type, env=None):
     """
     Executes a PHP adapter script and returns parsed JSON output.
+    `env` adds variables for the adapter process only (e.g. the reference-data sidecar).
     """
     if not os.path.exists(adapter_path):
         raise FileNotFoundError(f"Adapter not found: {adapter_path}")
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Input file not found: {input_file}")
 
-    try:
-        result = subprocess.run(
-            ['php', adapter_path, input_file, migration_type],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            check=True
-        )
-       
-       
-        output = result.stdout.encode().decode("utf-8-sig").strip()
+    # stdout goes to a temp file and is parsed from there. json.load still reads
+    # the whole text once, but the captured string and its encode/decode/strip
+    # copies no longer sit next to it
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8-sig") as stdout:
         try:
-            return json.loads(output)
-        except json.JSONDecodeError as e:
+            result = subprocess.run(
+                ['php', adapter_path, input_file, migration_type],
+                stdout=stdout,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                env={**os.environ, **env} if env else None,
+                check=True
+            )
+
+            stdout.seek(0)
+            try:
+                return json.load(stdout)
+            except json.JSONDecodeError as e:
+                stdout.seek(0)
+                return {
+                    "error": "Adapter did not return valid JSON",
+                    "details": str(e),
+                    "stdout": stdout.read().strip(),
+                    "stderr": result.stderr
+                }
+
+        except subprocess.CalledProcessError as e:
+            print("❌ STDERR from adapter:")
+            print(e.stderr)
+            stdout.seek(0)
             return {
-                "error": "Adapter did not return valid JSON",
+                "error": "Adapter execution failed",
                 "details": str(e),
-                "stdout": output,
-                "stderr": result.stderr
+                "stdout": stdout.read(),
+                "stderr": e.stderr
             }
 
-    except subprocess.CalledProcessError as e:
+@contextmanager
+def stream_php_adapter(adapter_path, input_file, migration_type, env=None, tee_path=None):
+    """
+    Runs a PHP adapter and yields its output with "records" as an iterator that
+    reads stdout one record at a time, so the records can be sent while the
+    adapter is still converting the rest of the file. The fields written after
+    the records (recordCount, droppedRecords) are added to the output when the
+    iterator is exhausted. Output that does not open with the streamed document
+    (an error, or an adapter printing one JSON value) is parsed whole, like
+    run_php_adapter. stdout is copied to `tee_path` as it is read. The adapter
+    is stopped if the block exits before the records are all read.
+    """
+    if not os.path.exists(adapter_path):
+        raise FileNotFoundError(f"Adapter not found: {adapter_path}")
+    if not os.path.exists(input_file):
+        raise FileNotFoundError(f"Input file not found: {input_file}")
+
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as stderr, \
+            open(tee_path or os.devnull, "w", encoding="utf-8") as tee:
+        process = subprocess.Popen(
+            ['php', adapter_path, input_file, migration_type],
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            text=True,
+            encoding="utf-8-sig",
+            env={**os.environ, **env} if env else None
+        )
+        try:
+            head = process.stdout.readline()
+            tee.write(head)
+            if head.rstrip("\n").endswith(RECORDS_OPEN):
+                output = json.loads(head.rstrip("\n")[:-len(RECORDS_OPEN)] + "}")
+                output["records"] = _streamed_records(process, output, tee, stderr)
+            else:
+                rest = process.stdout.read()
+                tee.write(rest)
+                output = _whole_output(head + rest, process.wait(), stderr)
+            yield output
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            process.stdout.close()
+
+
+def _streamed_records(process, output, tee, stderr):
+    closed = False
+    count = 0
+    for line in process.stdout:
+        tee.write(line)
+        line = line.strip()
+        if line.startswith("],"):
+            output.update(json.loads("{" + line[2:]))
+            closed = True
+            break
+        if line:
+            count += 1
+            yield json.loads(line.rstrip(","))
+    tee.write(process.stdout.read())
+    returncode = process.wait()
+    if returncode or not closed:
+        stderr.seek(0)
         print("❌ STDERR from adapter:")
-        print(e.stderr)
+        print(stderr.read())
+        raise RuntimeError(f"Adapter execution failed after {count} records "
+                           f"(exit status {returncode}, output {'complete' if closed else 'cut short'})")
+
+
+def _whole_output(text, returncode, stderr):
+    stderr.seek(0)
+    details = stderr.read()
+    if returncode:
+        print("❌ STDERR from adapter:")
+        print(details)
         return {
             "error": "Adapter execution failed",
+            "details": f"Command returned non-zero exit status {returncode}.",
+            "stdout": text,
+            "stderr": details
+        }
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        return {
+            "error": "Adapter did not return valid JSON",
             "details": str(e),
-            "stdout": e.stdout,
-            "stderr": e.stderr
+            "stdout": text.strip(),
+            "stderr": details
         }
 
 def validate_adapter_output(parsed_output):
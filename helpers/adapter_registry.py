@@ -0,0 +1,175 @@
+# helpers/adapter_registry.py
+# What each PHP adapter declares about itself, read from the docblock at the
+# top of the file:
+#   /**
+#    * @adapter_key users
+#    * @entity users
+#    * @modes insert, update
+#    * @headers insert: First Name, Email
+#    * @headers update: Id
+#    * @reference_data roles
+#    */
+# A @headers line without a mode prefix applies to every mode. @reference_data
+# lists the tenant lookup maps (REFERENCE_SOURCES) the adapter reads.
+# Cached in memory and re-read only when an adapter file changes.
+import csv
+import os
+import re
+import threading
+import time
+
+# Repo root = parent of current script directory
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADAPTER_DIR = os.path.join(repo_root, "adapters")
+CHECK_INTERVAL = 2      # seconds between mtime checks of the adapter directory
+
+_DOCBLOCK = re.compile(r"/\*\*(.*?)\*/", re.S)
+_TAG = re.compile(r"@(\w+)[ \t]+([^\r\n]+)")
+_HEADER_MAP = re.compile(r"\$headerMap\s*=\s*\[(.*?)\];", re.S)
+_HEADER_PAIR = re.compile(r"[\"']([^\"']+)[\"']\s*=>\s*(\[[^\]]*\]|[\"'][^\"']*[\"'])")
+
+_cache = {}             # file name -> AdapterInfo
+_lock = threading.Lock()
+_last_check = 0.0
+
+
+class AdapterMismatch(ValueError):
+    pass
+
+
+class AdapterInfo:
+    def __init__(self, name, path, mtime, tags, header_tags, header_map):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.adapter_key = tags.get("adapter_key")
+        self.entity = tags.get("entity")
+        self.modes = _split(tags.get("modes"))
+        self.headers, self.mode_headers = _split_headers(header_tags, self.modes)
+        self.header_map = header_map        # raw CSV column → field the adapter emits
+        self.reference_maps = _split(tags.get("reference_data"))
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "adapter_key": self.adapter_key,
+            "entity": self.entity,
+            "modes": self.modes,
+            "headers": self.headers,
+            "mode_headers": self.mode_headers,
+            "header_map": self.header_map,
+            "reference_maps": self.reference_maps
+        }
+
+    def required_headers(self, migration_type=None):
+        """Columns the adapter cannot do without in this mode (every mode's, plus the mode's own)."""
+        return self.headers + self.mode_headers.get(migration_type, [])
+
+
+def _split(value):
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def _split_headers(values, modes):
+    # "insert: First Name, Email" applies to that mode only; a prefix that is not a declared mode is part of a column name
+    common, per_mode = [], {}
+    for value in values:
+        mode, _, rest = value.partition(":")
+        if rest and mode.strip() in modes:
+            per_mode.setdefault(mode.strip(), []).extend(_split(rest))
+        else:
+            common.extend(_split(value))
+    return common, per_mode
+
+
+def _parse(name, path, mtime):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        source = f.read()
+    docblock = _DOCBLOCK.search(source[:2000])
+    found = _TAG.findall(docblock.group(1)) if docblock else []
+    tags = dict(found)
+    header_tags = [value for tag, value in found if tag == "headers"]
+
+    header_map = {}
+    block = _HEADER_MAP.search(source)
+    if block:
+        for column, target in _HEADER_PAIR.findall(block.group(1)):
+            if target.startswith("["):
+                # "Suburb" => ["address", "suburb"] is emitted as address.suburb
+                target = ".".join(re.findall(r"[\"']([^\"']*)[\"']", target))
+            header_map[column] = target.strip("\"'")
+
+    if not tags:
+        print(f"⚠️ [adapter_registry] {name} has no @adapter_key/@entity docblock — entity checks are skipped for it")
+    return AdapterInfo(os.path.splitext(name)[0], path, mtime, tags, header_tags, header_map)
+
+
+def _refresh(force=False):
+    global _last_check
+    now = time.time()
+    if not force and now - _last_check < CHECK_INTERVAL and _cache:
+        return
+    _last_check = now
+
+    seen = set()
+    for name in os.listdir(ADAPTER_DIR):
+        path = os.path.join(ADAPTER_DIR, name)
+        if not name.endswith(".php") or not os.path.isfile(path):
+            continue
+        seen.add(name)
+        mtime = os.path.getmtime(path)
+        cached = _cache.get(name)
+        if cached is None or cached.mtime != mtime:
+            _cache[name] = _parse(name, path, mtime)
+    for name in set(_cache) - seen:
+        del _cache[name]
+
+
+def adapters(force=False):
+    with _lock:
+        _refresh(force)
+        return {info.name: info for info in _cache.values()}
+
+
+def get_adapter_names():
+    return sorted(adapters())
+
+
+def get_adapter(name):
+    return adapters().get(name)
+
+
+def check_adapter(name, entity=None, migration_type=None):
+    """
+    Rejects an adapter/entity/mode combination before any file is processed.
+    Adapters without a docblock are let through unchecked.
+    """
+    info = get_adapter(name)
+    if info is None:
+        raise AdapterMismatch(f"Unknown adapter: {name}")
+    if entity and info.entity and entity != info.entity:
+        raise AdapterMismatch(f"Adapter '{name}' loads entity '{info.entity}', not '{entity}'")
+    if migration_type and info.modes and migration_type not in info.modes:
+        raise AdapterMismatch(f"Adapter '{name}' supports {', '.join(info.modes)}, not '{migration_type}'")
+    return info
+
+
+def read_header(csv_path):
+    # Only the first line is read; utf-8-sig drops a BOM the same way the adapters do
+    with open(csv_path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        return [column.strip() for column in next(csv.reader(f), [])]
+
+
+def check_headers(info, csv_path, migration_type=None):
+    """
+    Compares the CSV's first line against the adapter's @headers for this
+    mode (case-insensitive) so a wrong file fails before PHP runs.
+    """
+    required = info.required_headers(migration_type)
+    if not required:
+        return
+    header = {column.lower() for column in read_header(csv_path)}
+    missing = [column for column in required if column.lower() not in header]
+    if missing:
+        mode = f" in {migration_type} mode" if migration_type in info.mode_headers else ""
+        raise AdapterMismatch(f"CSV is missing column(s) required by '{info.name}'{mode}: {', '.join(missing)}")
@@ -0,0 +1,114 @@
+# helpers/batch.py
+# Runs many CSVs in one process: one token per tenant, shared connection
+# pools and definition cache, and independent entries sent concurrently.
+#
+# A batch manifest is JSON:
+#   {
+#     "base_url": "https://tenant.example.com/api",      (defaults for every entry)
+#     "entries": [
+#       {"adapter": "Users", "csv": "users.csv", "entity": "users"},
+#       {"adapter": "Teams", "csv": "teams.csv", "entity": "teams", "migration_type": "update"},
+#       {"adapter": "TeamsUsers", "csv": "team_users.csv", "entity": "users_teams_role", "stage": 1,
+#        "format": ["csv", "sqlite"]}
+#     ]
+#   }
+# Entries run stage by stage (ascending "stage", default 0); entries in one
+# stage are independent and run concurrently.
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from helpers.result_sinks import check_formats
+
+REQUIRED_FIELDS = ("adapter", "csv", "entity", "base_url", "email", "password")
+ENTRY_DEFAULTS = {
+    "migration_type": "insert",
+    "delta": False,
+    "reconcile": False,
+    "dedup": "off",
+    "no_cache": False,
+    "refresh_reference": False,
+    "workers": 1,
+    "rate": 0,
+    "dry_run": False,
+    "format": None,
+    "stage": 0,
+}
+COUNTERS = ("total", "success", "skipped", "unchanged", "duplicates")
+
+
+def load_batch_manifest(path, **overrides):
+    """
+    Reads a batch manifest and returns its entries with defaults filled in.
+    Top-level keys (and `overrides`, e.g. credentials from the command line)
+    apply to every entry that does not set its own; relative CSV paths are
+    resolved against the manifest's directory.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"entries": manifest}
+    shared = {key: value for key, value in manifest.items() if key != "entries"}
+    shared.update({key: value for key, value in overrides.items() if value is not None})
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    entries = []
+    for position, entry in enumerate(manifest.get("entries", []), start=1):
+        entry = {**ENTRY_DEFAULTS, **shared, **entry}
+        missing = [field for field in REQUIRED_FIELDS if not entry.get(field)]
+        if missing:
+            raise ValueError(f"Batch entry {position} is missing {', '.join(missing)}")
+        entry["csv"] = os.path.join(base_dir, entry["csv"])
+        # "format": "ndjson" means ["ndjson"]; unknown or unavailable formats fail here, not after the run
+        if isinstance(entry["format"], str):
+            entry["format"] = [entry["format"]]
+        if entry["format"] is not None:
+            if not isinstance(entry["format"], list) or not all(isinstance(fmt, str) for fmt in entry["format"]):
+                raise ValueError(f"Batch entry {position}: format must be a format name or a list of them")
+            try:
+                entry["format"] = check_formats(entry["format"]) or None
+            except ValueError as e:
+                raise ValueError(f"Batch entry {position}: {e}") from None
+        entry.setdefault("name", f"{position}:{entry['adapter']}:{os.path.basename(entry['csv'])}")
+        entries.append(entry)
+    return entries
+
+
+def _run_entry(run_one, entry):
+    started = time.time()
+    try:
+        summary = run_one(entry)
+        result = {"status": "success", **{key: summary.get(key, 0) for key in COUNTERS}, "run_id": summary.get("run_id")}
+    except Exception as e:
+        print(f"❌ [batch] {entry['name']} failed: {e}")
+        result = {"status": "error", "message": str(e)}
+    return {"name": entry["name"], "stage": entry["stage"], "duration": round(time.time() - started, 2), **result}
+
+
+def run_batch(entries, run_one, parallel=4):
+    """
+    Calls run_one(entry) for every entry, stage by stage, up to `parallel` at
+    a time within a stage. A failed entry is reported and does not stop the
+    others. Returns the combined summary.
+    """
+    started = time.time()
+    results = []
+    ordered = sorted(entries, key=lambda entry: entry["stage"])
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        for stage, group in groupby(ordered, key=lambda entry: entry["stage"]):
+            group = list(group)
+            print(f"📦 [batch] Stage {stage}: {len(group)} entr{'y' if len(group) == 1 else 'ies'}")
+            results.extend(pool.map(lambda entry: _run_entry(run_one, entry), group))
+    return combine(results, time.time() - started)
+
+
+def combine(results, duration):
+    combined = {key: sum(result.get(key, 0) for result in results) for key in COUNTERS}
+    combined.update({
+        "entries": len(results),
+        "failed_entries": sum(1 for result in results if result["status"] != "success"),
+        "duration": round(duration, 2),
+        "results": results,
+    })
+    return combined
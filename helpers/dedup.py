@@ -0,0 +1,100 @@
+# helpers/dedup.py
+from helpers.record_store import RecordStore
+
+DEDUP_MODES = ("off", "reject", "coalesce")
+
+# Each entry is a list of alternatives; the first alternative with every field filled wins
+DEDUP_KEYS = {
+    "users": [[("values", "email")]],
+    "teams": [[("values", "teamssourceid")], [("values", "name")]],
+    "projects": [[("values", "projectsourceid")], [("values", "name")]],
+    "classifications": [[("values", "parentId"), ("values", "name")]],
+    "event_user_relationship": [[("values", "LeftHandId"), ("values", "RightHandId")]],
+    "users_teams_role": [[("meta", "id"), ("record", "userId")]],
+    "users_teams_unrelate": [[("meta", "team_id"), ("meta", "user_id")]],
+    "teams_projects_relationship": [[("meta", "id"), ("meta", "project")]],
+    "teams_projects_unrelate": [[("meta", "id"), ("meta", "project")]],
+}
+
+
+def _normalise(value):
+    return str(value).strip().lower()
+
+
+def duplicate_keys(store):
+    alternatives = DEDUP_KEYS.get(store.adapter_key)
+    if not alternatives:
+        return [None] * len(store)
+
+    lookups = [[(store.rows(source), field) for source, field in fields] for fields in alternatives]
+    keys = []
+    for i in range(len(store)):
+        key = None
+        if store.valid[i]:
+            for fields, sources in zip(alternatives, lookups):
+                parts = [rows[i].get(field) for rows, field in sources]
+                if all(p not in ("", None) for p in parts):
+                    key = tuple([f for _, f in fields] + [_normalise(p) for p in parts])
+                    break
+        keys.append(key)
+    return keys
+
+
+def _coalesce(target, source):
+    # Later copies only fill gaps; list operations (relate/assign) are unioned
+    for key, value in source.items():
+        if key == "meta":
+            continue
+        current = target.get(key)
+        if current in ("", None, [], {}):
+            target[key] = value
+        elif isinstance(current, dict) and isinstance(value, dict):
+            _coalesce(current, value)
+        elif isinstance(current, list) and isinstance(value, list):
+            current.extend(v for v in value if v not in current)
+
+
+def dedupe(store, mode="reject"):
+    """
+    Hash-indexes the entity key of every row. Returns a RecordStore holding
+    the first copy of each key plus a report of the later copies, which are
+    merged into the first ("coalesce") or dropped ("reject").
+    """
+    first_seen = {}
+    kept, duplicates = [], []
+    record_indexes = store.record_indexes()
+
+    for position, key in enumerate(duplicate_keys(store)):
+        if key is None or key not in first_seen:
+            if key is not None:
+                first_seen[key] = position
+            kept.append(position)
+            continue
+
+        original = first_seen[key]
+        if mode == "coalesce":
+            _coalesce(store.records[original], store.records[position])
+        duplicates.append({
+            "recordIndex": record_indexes[position],
+            "duplicateOf": record_indexes[original],
+            "key": "|".join(str(k) for k in key),
+            "action": "Coalesced" if mode == "coalesce" else "Rejected"
+        })
+
+    deduped = store.subset(kept)
+    if mode == "coalesce" and duplicates:
+        # Merged records no longer match the resolved rows, keys and hashes
+        deduped = RecordStore(deduped.records, store.adapter_key)
+    if duplicates:
+        print(f"🧬 Dedup ({mode}) for {store.adapter_key}: {len(duplicates)} duplicate rows removed, {len(kept)} kept")
+    return deduped, duplicates
+
+
+def log_duplicates(stats, duplicates):
+    for dup in duplicates:
+        entry = {**dup, "reason": f"Duplicate of record {dup['duplicateOf']} ({dup['key']})"}
+        if dup["action"] == "Rejected":
+            stats.total += 1
+            stats.log_skip(dup["recordIndex"], entry, f"{dup['action']}: {entry['reason']}")
+        else:
+            stats.log_duplicate(dup["recordIndex"], entry)
@@ -0,0 +1,74 @@
+# helpers/delta_store.py
+import json
+import os
+import threading
+from datetime import datetime
+from helpers.shared_logic import tenant_from_url
+
+# Repo root = parent of current script directory
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELTA_DIR = os.path.join(repo_root, "migrations", "delta")
+
+class DeltaStore:
+    def __init__(self, adapter_key, api_url=""):
+        tenant = tenant_from_url(api_url)
+        self.adapter_key = adapter_key
+        self.path = os.path.join(DELTA_DIR, f"{tenant}_{adapter_key}.json")
+        document = self._load()
+        self.hashes = document.get("records", {})
+        self.ids = document.get("ids", {})     # local id -> API ID, so unchanged tree parents resolve later runs' children
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ [delta_store] Ignoring unreadable store {self.path}: {e}")
+            return {}
+
+    def diff(self, store):
+        """
+        Splits a RecordStore into inserted / changed / unchanged entries of
+        (record, key, hash), plus the stored keys missing from this file.
+        """
+        plan = {"inserted": [], "changed": [], "unchanged": [], "deleted": []}
+        keys, hashes = store.keys(), store.hashes()
+        for record, key, digest in zip(store.records, keys, hashes):
+            if key is None:
+                # Let the handler log the invalid row as it always has
+                plan["inserted"].append((record, None, None))
+                continue
+            previous = self.hashes.get(key)
+            if previous is None:
+                plan["inserted"].append((record, key, digest))
+            elif previous != digest:
+                plan["changed"].append((record, key, digest))
+            else:
+                plan["unchanged"].append((record, key, digest))
+        seen = set(keys)
+        plan["deleted"] = [key for key in self.hashes if key not in seen]
+        return plan
+
+    def commit(self, entries):
+        updated = 0
+        for _, key, digest in entries:
+            if key is None:
+                continue
+            self.hashes[key] = digest
+            updated += 1
+        if not updated:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}-{threading.get_ident()}.tmp"  # one per writer: other workers may be writing too
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "adapter_key": self.adapter_key,
+                "updatedAt": datetime.now().isoformat(),
+                "records": self.hashes,
+                "ids": self.ids
+            }, f)
+        os.replace(tmp_path, self.path)
+        print(f"🧾 [delta_store] {updated} record hashes saved to {self.path}")
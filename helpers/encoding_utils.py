@@ -1,11 +1,29 @@
 #encoding_utils.py
-import requests
+import codecs
+import csv
+import os
+import tempfile
+
+SNIFF_BYTES = 64 * 1024
+CHECK_CHUNK = 1024 * 1024
+DELIMITERS = ",;\t|"
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
 
 def validate_credentials(email: str, password: str, base_url: str) -> bool:
     """
     Validates credentials by attempting a harmless API call.
     Returns True if successful, False otherwise.
     """
+    import requests
+
     url = f"{base_url}/classifications"
 
     try:
@@ -15,4 +33,155 @@ def validate_credentials(email: str, password: str, base_url: str) -> bool:
         return True
     except requests.exceptions.RequestException as e:
         print(f"❌ Credential validation failed: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def _cp1252_fallback(error):
+    # Bytes that are not valid UTF-8 in an otherwise UTF-8 file are read as Windows-1252 (an Excel edit or paste)
+    return error.object[error.start:error.end].decode("cp1252", errors="replace"), error.end
+
+
+codecs.register_error("cp1252_fallback", _cp1252_fallback)
+
+
+def _decodes(sample, encoding):
+    # Incremental so a multi-byte character cut at the end of the sample is not an error
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(sample):
+    """
+    Picks the encoding of a byte sample: a BOM wins, then strict UTF-8, then
+    Windows-1252 (what Excel writes for "CSV"), then a charset_normalizer guess.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if _decodes(sample, "utf-8"):
+        return "utf-8"
+    if _decodes(sample, "cp1252"):
+        return "cp1252"
+    try:
+        # Only reached for bytes cp1252 cannot decode, so its import cost is rarely paid
+        from charset_normalizer import from_bytes
+    except ImportError:  # optional — the latin-1 fallback still applies
+        from_bytes = None
+    if from_bytes is not None:
+        best = from_bytes(sample).best()
+        if best is not None:
+            return best.encoding
+    return "latin-1"
+
+
+def sniff_dialect(text, max_lines=50):
+    """
+    Picks the delimiter whose split gives the header more than one column and
+    the most rows with the header's width. csv.Sniffer is too easily fooled by
+    delimiters inside quoted values. Quoting is always Excel-style double quotes.
+    """
+    lines = text.splitlines(keepends=True)[:max_lines]
+    best, best_score = ",", (0, 0)
+    for delimiter in DELIMITERS:
+        rows = list(csv.reader(lines, delimiter=delimiter))
+        if not rows or len(rows[0]) < 2:
+            continue
+        width = len(rows[0])
+        score = (sum(1 for row in rows if len(row) == width), width)
+        if score > best_score:
+            best, best_score = delimiter, score
+    return type("SniffedDialect", (csv.excel,), {"delimiter": best})
+
+
+def sniff_file(path):
+    """Returns (encoding, dialect) from the first SNIFF_BYTES of a file."""
+    with open(path, "rb") as f:
+        sample = f.read(SNIFF_BYTES)
+    encoding = detect_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(sample, final=False)
+    # Sniff on whole lines only; the last one may be cut mid-row
+    text = text[:text.rfind("\n") + 1] or text
+    return encoding, sniff_dialect(text)
+
+
+def first_invalid_utf8(path):
+    """
+    Decodes the whole file as strict UTF-8, a chunk at a time, and returns the
+    byte offset of the first invalid sequence, or None when the file is clean.
+    The sniffed sample only covers the start of the file.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    offset = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHECK_CHUNK), b""):
+            try:
+                decoder.decode(chunk, final=False)
+            except UnicodeDecodeError as e:
+                pending = len(decoder.getstate()[0])
+                return offset - pending + e.start
+            offset += len(chunk)
+        try:
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return offset - len(decoder.getstate()[0])
+    return None
+
+
+def describe(encoding, dialect):
+    return {"encoding": encoding, "delimiter": dialect.delimiter, "quotechar": dialect.quotechar}
+
+
+def is_plain_csv(encoding, dialect):
+    # What the PHP adapters read natively: UTF-8, comma-separated, double quotes
+    return encoding == "utf-8" and dialect.delimiter == "," and dialect.quotechar == '"'
+
+
+def transcode_csv(src_path, dest_path, errors="replace"):
+    """
+    Rewrites a CSV as UTF-8 (no BOM), comma-delimited with standard quoting,
+    row by row so the file is never held in memory.
+    """
+    encoding, dialect = sniff_file(src_path)
+    with open(src_path, "r", encoding=encoding, errors=errors, newline="") as src, \
+            open(dest_path, "w", encoding="utf-8", newline="") as dest:
+        writer = csv.writer(dest, lineterminator="\n")
+        # utf-8-sig / utf-16 / utf-32 decoders already drop the BOM
+        for row in csv.reader(src, dialect):
+            writer.writerow(row)
+    return describe(encoding, dialect)
+
+
+def normalize_csv(path, in_place=False):
+    """
+    Makes a CSV safe for the adapters. Plain UTF-8 comma files are returned as
+    they are; anything else is transcoded to a temp file (or over `path` when
+    in_place). Returns (path_to_use, details).
+    """
+    encoding, dialect = sniff_file(path)
+    details = describe(encoding, dialect)
+    errors = "replace"
+    if is_plain_csv(encoding, dialect):
+        invalid_at = first_invalid_utf8(path)
+        if invalid_at is None:
+            return path, {**details, "transcoded": False}
+        # UTF-8 up to here; the rows with other bytes are transcoded instead of reaching the adapter (which drops them)
+        print(f"🔤 {os.path.basename(path)} is not valid UTF-8 at byte {invalid_at}; reading those bytes as Windows-1252")
+        details["invalid_utf8_at"] = invalid_at
+        errors = "cp1252_fallback"
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv", prefix="utf8_", dir=os.path.dirname(path) if in_place else None)
+    os.close(fd)
+    try:
+        transcode_csv(path, tmp_path, errors=errors)
+        if in_place:
+            os.replace(tmp_path, path)
+            tmp_path = path
+    except BaseException:
+        if os.path.exists(tmp_path) and tmp_path != path:
+            os.remove(tmp_path)
+        raise
+    print(f"🔤 Transcoded {os.path.basename(path)} from {encoding} (delimiter {dialect.delimiter!r}) to UTF-8")
+    return tmp_path, {**details, "transcoded": True}
@@ -0,0 +1,315 @@
+# helpers/entity_specs.py
+# Per-entity description of what handlers/generic.py sends: packet shape,
+# route per migration type, validation and which statuses count as success.
+from config import REQUEST_TIMEOUT, CONNECT_TIMEOUT
+from helpers.shared_logic import auto_map_fields
+
+PERMANENT_STATUSES = (400, 403, 404, 405, 409)
+
+
+class EntitySpec:
+    def __init__(self, name, build_packet, routes, validate=None,
+                 success_statuses=(200, 201, 204), permanent_statuses=PERMANENT_STATUSES,
+                 max_retries=3, retry_delay=1, resend_posts=False, response_ok=None, fetch_definition=False,
+                 serial_key=None, log_fields=(), summary_csv=None, concurrency=None, transport="sync",
+                 timeout=REQUEST_TIMEOUT):
+        self.name = name
+        self.build_packet = build_packet          # (record, ctx) -> (packet, params)
+        self.routes = routes                      # migration_type or "*" -> (method, url template)
+        self.validate = validate                  # (record, packet, params, ctx) -> skip reason or None
+        self.success_statuses = success_statuses
+        self.permanent_statuses = permanent_statuses
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.resend_posts = resend_posts          # POSTs are safe to resend on any failure (not a create)
+        self.response_ok = response_ok            # (response_text) -> bool, on top of the status check
+        self.fetch_definition = fetch_definition
+        self.serial_key = serial_key              # meta field; rows sharing it are never sent concurrently
+        self.log_fields = log_fields              # meta fields copied onto each row log
+        self.summary_csv = summary_csv
+        self.concurrency = concurrency
+        self.transport = transport                # "sync" (threads + requests) or "async" (httpx event loop)
+        self.timeout = timeout                    # (connect, read) seconds
+
+    def route(self, migration_type):
+        return self.routes.get(migration_type) or self.routes.get("*") or self.routes["insert"]
+
+
+def _flatten_source(meta):
+    # Relationship adapters nest the raw CSV row under meta["source"]; the CSV logs need it flat
+    source = meta.get("source", {})
+    if isinstance(source, dict):
+        meta["user"] = source.get("user", "")
+        meta["team"] = source.get("team", "")
+    meta.pop("source", None)
+    return meta
+
+
+def _update_id_required(record, packet, params, ctx):
+    if ctx["migration_type"] == "update" and not params.get("id"):
+        return "Missing ID for update"
+    return None
+
+
+# === Users ===
+# {
+#   "DataVersion": 1,
+#   "SendOnboardingEmail": false,
+#   "stereotypeOperations": {"Relate": ["StandardUser"], "Unrelate": []},
+#   "Values": {"userssourceid": "196", "email": "...", "firstName": "", ...}
+# }
+def _users_packet(record, ctx):
+    meta = record.get("meta", {})
+    values = record.get("values", {})
+    packet = {
+        "dataVersion": record.get("DataVersion", 1),
+        "SendOnboardingEmail": record.get("SendOnboardingEmail", False),
+        "stereotypeOperations": record.get("stereotypeOperations", {}),
+        "values": auto_map_fields(values, ctx["definition"], operation_mode=ctx["migration_type"])
+    }
+    if ctx["migration_type"] == "update":
+        # The API has a rule, you cannot UPDATE a record with an email address found in the database means whole update is rejected
+        packet["values"].pop("email", None)
+        return packet, {"id": meta.get("id") or values.get("id")}
+    return packet, {"id": values.get("id") or values.get("userssourceid", "")}
+
+
+# === Classifications ===
+# {"values": {"classificationType": 0, "dataVersion": 0, "deleted": true, "description": "string", "name": "string", "parentId": 0}}
+def _classifications_packet(record, ctx):
+    values = record.get("values", {})
+    if values:
+        values["description"] = str(values.get("description") or "")
+    return {"values": values}, {"id": record.get("meta", {}).get("id") or values.get("id", "")}
+
+
+def _classifications_validate(record, packet, params, ctx):
+    values = packet["values"]
+    if not values.get("name") or not values.get("parentId"):
+        return "Missing required fields: name or parentId"
+    return None
+
+
+# === Projects ===
+# {"dataVersion": 1, "values": {"name": "...", "projectsourceid": "36", "projectGroup": {"assign": [5337], "unassign": []}, ...}}
+def _projects_packet(record, ctx):
+    meta = record.get("meta", {})
+    values = record.get("values", {})
+    packet = {
+        "dataVersion": record.get("DataVersion", 1),
+        "values": auto_map_fields(values, ctx["definition"], operation_mode=ctx["migration_type"]),
+        "projectOperations": record.get("projectOperations", {})
+    }
+    if ctx["migration_type"] == "update":
+        return packet, {"id": meta.get("id") or values.get("id")}
+    return packet, {"id": values.get("id", "")}
+
+
+def _projects_validate(record, packet, params, ctx):
+    if not record.get("values", {}).get("name"):
+        return "Missing required field: name"
+    return _update_id_required(record, packet, params, ctx)
+
+
+# === Teams ===
+# {"DataVersion": 1, "ProjectOperations": {"Relate": [0], "Unrelate": [0]}, "Values": {"description": "", "name": "", "teamssourceid": ""}}
+def _teams_packet(record, ctx):
+    meta = record.get("meta", {})
+    # Adapter emits capitalized keys; we map to the packet keys expected by the API
+    packet = {
+        "dataVersion": record.get("DataVersion", 1),
+        "projectOperations": record.get("ProjectOperations", {}),
+        "values": record.get("Values", {})
+    }
+    values = packet["values"]
+    if ctx["migration_type"] == "update":
+        return packet, {"id": meta.get("id") or values.get("id") or values.get("teamssourceid")}
+    return packet, {"id": values.get("id") or values.get("teamssourceid", "")}
+
+
+def _teams_validate(record, packet, params, ctx):
+    if str(packet["values"].get("name", "")).strip() == "":
+        return "Missing required field: name"
+    return _update_id_required(record, packet, params, ctx)
+
+
+# === Event User Relationship ===
+# {"DataVersion": 1, "Values": {"LeftHandId": 0, "RightHandId": 0}}
+def _event_user_packet(record, ctx):
+    packet = record.get("payload", {})
+    values = packet.get("values", {})
+    return packet, {
+        "id": values.get("id", ""),
+        "method": record.get("method", "PUT"),
+        "endpoint": record.get("endpoint") or ctx["api_url"]
+    }
+
+
+def _left_right_validate(record, packet, params, ctx):
+    values = packet.get("values", {})
+    if ctx["migration_type"] == "update":
+        return None if values.get("id") else "Missing ID for update"
+    if not values.get("LeftHandId") or not values.get("RightHandId"):
+        return "Missing LeftHandId or RightHandId"
+    return None
+
+
+# === Stakeholder User Relationship ===
+# {"DataVersion": 1, "Values": {"LeftHandId": 0, "RightHandId": 0}}   # User, Team
+def _stakeholder_user_packet(record, ctx):
+    meta = _flatten_source(record.get("meta", {}))
+    packet = {
+        "dataVersion": record.get("DataVersion", 1),
+        "values": record.get("values", {})
+    }
+    return packet, {"id": meta.get("id") or packet["values"].get("id", "")}
+
+
+def _stakeholder_user_validate(record, packet, params, ctx):
+    values = packet["values"]
+    if not values.get("LeftHandId") or not values.get("RightHandId"):
+        return "Missing LeftHandId or RightHandId"
+    return None
+
+
+# === Teams Users Role ===
+# /security/186/assignusertoteam
+# {"userId": 370, "stereotype": "Viewer"}
+def _teams_users_packet(record, ctx):
+    meta = _flatten_source(record.get("meta", {}))
+    packet = {
+        "userId": record.get("userId"),
+        "stereotype": record.get("stereotype")
+    }
+    return packet, {"id": meta.get("id") or record.get("id", "")}
+
+
+def _teams_users_validate(record, packet, params, ctx):
+    if not packet.get("userId") or not str(packet.get("stereotype") or "").strip():
+        return "Missing userId or stereotype"
+    return None
+
+
+# === Teams Users Unrelate ===
+# /security/{teamId}/{userId}/removeuserfromteam
+def _teams_users_unrelate_packet(record, ctx):
+    meta = _flatten_source(record.get("meta", {}))
+    packet = {"userId": record.get("userId")}
+    return packet, {
+        "id": meta.get("id") or record.get("id", ""),
+        "team_id": meta.get("team_id"),
+        "user_id": meta.get("user_id")
+    }
+
+
+def _teams_users_unrelate_validate(record, packet, params, ctx):
+    if not params.get("team_id") or not params.get("user_id"):
+        return "Missing team_id or user_id"
+    return None
+
+
+# === Teams Projects Relate / Unrelate ===
+# run as UPDATE .../entities/team/115  (team ID)
+# {"dataVersion": 1, "projectOperations": {"relate": [1012], "unrelate": []}, "values": {}}
+def _teams_projects_packet(record, ctx):
+    meta = record.get("meta", {})
+    packet = {
+        "dataVersion": record.get("dataVersion", 1),
+        "projectOperations": record.get("projectOperations", {}),
+        "values": record.get("values", {})
+    }
+    return packet, {"id": meta.get("id"), "endpoint": record.get("endpoint") or ctx["api_url"]}
+
+
+def _teams_projects_validate(record, packet, params, ctx):
+    if not params.get("id"):
+        return "Missing ID in header row for PATCH"
+    ops = packet["projectOperations"]
+    if not ops.get("relate") and not ops.get("unrelate"):
+        return "No relate or unrelate operations provided"
+    return None
+
+
+# === Adapter key → spec ===
+ENTITY_SPECS = {
+    "users": EntitySpec(
+        "users", _users_packet,
+        routes={"insert": ("POST", "{api_url}"), "update": ("PATCH", "{api_url}/{id}")},
+        validate=_update_id_required,
+        fetch_definition=True
+    ),
+    "classifications": EntitySpec(
+        "classifications", _classifications_packet,
+        routes={"*": ("POST", "{api_url}")},
+        validate=_classifications_validate,
+        success_statuses=(200, 201),
+        resend_posts=True
+    ),
+    "projects": EntitySpec(
+        "projects", _projects_packet,
+        routes={"insert": ("POST", "{api_url}"), "update": ("PATCH", "{api_url}/{id}")},
+        validate=_projects_validate,
+        response_ok=lambda text: "ErrorMessage" not in text,
+        fetch_definition=True
+    ),
+    "teams": EntitySpec(
+        "teams", _teams_packet,
+        routes={"insert": ("POST", "{api_url}"), "update": ("PATCH", "{api_url}/{id}")},
+        validate=_teams_validate
+    ),
+    "event_user_relationship": EntitySpec(
+        "event_user", _event_user_packet,
+        routes={"*": (None, "{endpoint}"), "update": ("PATCH", "{endpoint}/{id}")},
+        validate=_left_right_validate,
+        retry_delay=8,
+        resend_posts=True,
+        transport="async"
+    ),
+    "teams_users_relationship": EntitySpec(
+        "stakeholder_user", _stakeholder_user_packet,
+        routes={"*": ("POST", "{api_url}")},
+        validate=_stakeholder_user_validate,
+        success_statuses=(200, 201),
+        log_fields=("user", "team"),
+        transport="async"
+    ),
+    "users_teams_role": EntitySpec(
+        "users_teams_role", _teams_users_packet,
+        routes={"*": ("POST", "{api_url}/{id}/assignusertoteam")},
+        validate=_teams_users_validate,
+        success_statuses=(200, 201),
+        log_fields=("user", "team"),
+        transport="async"
+    ),
+    "users_teams_unrelate": EntitySpec(
+        "users_teams_unrelate", _teams_users_unrelate_packet,
+        routes={"*": ("POST", "{api_url}/{team_id}/{user_id}/removeuserfromteam")},
+        validate=_teams_users_unrelate_validate,
+        success_statuses=(200, 201),
+        resend_posts=True,
+        log_fields=("user", "team"),
+        summary_csv="audit/migration_summary_users_teams_unrelate.csv",
+        transport="async"
+    ),
+    "teams_projects_relationship": EntitySpec(
+        "teams_projects", _teams_projects_packet,
+        routes={"*": ("PATCH", "{endpoint}/{id}")},
+        validate=_teams_projects_validate,
+        success_statuses=(200, 204),
+        serial_key="id",
+        log_fields=("team", "project"),
+        summary_csv="audit/migration_summary.csv",
+        # One PATCH carries every project of a team; the API takes a while to apply large sets
+        timeout=(CONNECT_TIMEOUT, 120)
+    ),
+    "teams_projects_unrelate": EntitySpec(
+        "teams_projects_unrelate", _teams_projects_packet,
+        routes={"*": ("PATCH", "{endpoint}/{id}")},
+        validate=_teams_projects_validate,
+        success_statuses=(200, 204),
+        serial_key="id",
+        log_fields=("team", "project"),
+        summary_csv="audit/migration_summary_unrelate.csv",
+        timeout=(CONNECT_TIMEOUT, 120)
+    ),
+}
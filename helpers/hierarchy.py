@@ -0,0 +1,136 @@
+# helpers/hierarchy.py
+# Loads parent/child records (classification trees) in depth waves: every
+# record of one depth is sent concurrently, and the IDs the API returns for
+# them are written into their children before the next depth goes out.
+from datetime import datetime
+from helpers.logger import MigrationStats
+from helpers.record_store import RecordStore
+
+# adapter key -> (meta field holding the local id, meta field naming a local parent, values field to fill)
+TREE_FIELDS = {
+    "classifications": ("sourceId", "parentLocalId", "parentId"),
+}
+
+
+def has_local_parents(store):
+    fields = TREE_FIELDS.get(store.adapter_key)
+    return bool(fields) and any(meta.get(fields[1]) not in ("", None) for meta in store.meta)
+
+
+def tree_levels(store, known_ids=()):
+    """
+    Groups record positions by depth below the nearest existing (API) parent.
+    A local parent that is not in this payload but is in `known_ids` (created
+    by an earlier run) counts as existing. Returns (levels, unresolved) where
+    unresolved maps a position to the reason it can never be sent: a cycle,
+    or a local parent missing from the payload.
+    """
+    source_field, parent_field, _ = TREE_FIELDS[store.adapter_key]
+    by_source = {}
+    for position, meta in enumerate(store.meta):
+        source_id = str(meta.get(source_field) or "")
+        if source_id:
+            by_source.setdefault(source_id, position)
+
+    depth, unresolved = {}, {}
+    for start in range(len(store)):
+        path, on_path, cursor, base = [], set(), start, None
+        while cursor not in depth and cursor not in unresolved:
+            if cursor in on_path:
+                reason = "Cycle in local parent references"
+                base = None
+                break
+            parent = str(store.meta[cursor].get(parent_field) or "")
+            path.append(cursor)
+            on_path.add(cursor)
+            if not parent:
+                base = -1
+                break
+            if parent not in by_source and parent in known_ids:
+                base = -1
+                break
+            if parent not in by_source:
+                reason = f"Local parent '{parent}' is not in this payload"
+                base = None
+                break
+            cursor = by_source[parent]
+        else:
+            base = depth.get(cursor)
+            reason = unresolved.get(cursor)
+
+        for offset, position in enumerate(reversed(path), start=1):
+            if base is None:
+                unresolved[position] = reason
+            else:
+                depth[position] = base + offset
+
+    levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for position in sorted(depth):
+        levels[depth[position]].append(position)
+    return levels, unresolved
+
+
+def _skip_entry(meta, reason):
+    return {"name": meta.get("name", ""), "id": meta.get("id", ""), "recordIndex": meta.get("recordIndex", ""),
+            "sourceRow": meta.get("rowIndex", ""), "reason": reason}
+
+
+def run_tree(handler, adapter_key, payload, migration_type, api_url, auth_token, entity, known_ids=None):
+    """
+    `known_ids` (local id -> API ID from earlier runs, e.g. the delta store's)
+    resolves parents that are not re-sent; IDs created here are added to it.
+    """
+    records = payload.get("records", [])
+    store = RecordStore(records, adapter_key)
+    source_field, parent_field, value_field = TREE_FIELDS[adapter_key]
+    known_ids = {} if known_ids is None else known_ids
+    levels, unresolved = tree_levels(store, known_ids)
+    by_record_index = {meta.get("recordIndex"): position for position, meta in enumerate(store.meta)}
+    print(f"🌳 {adapter_key}: {len(records)} records in {len(levels)} levels {[len(level) for level in levels]}")
+
+    # local id -> ID returned by the API; parents sent again here wait for their new ID
+    sending = {str(meta.get(source_field) or "") for meta in store.meta}
+    created = {local_id: api_id for local_id, api_id in known_ids.items() if local_id not in sending}
+    parts = []
+    skipped = MigrationStats()
+    for position, reason in unresolved.items():
+        skipped.total += 1
+        skipped.log_skip(position + 1, _skip_entry(store.meta[position], reason), reason)
+
+    for depth, positions in enumerate(levels):
+        ready = []
+        for position in positions:
+            meta = store.meta[position]
+            parent = str(meta.get(parent_field) or "")
+            if parent:
+                if parent not in created:
+                    reason = f"Parent '{parent}' was not created"
+                    skipped.total += 1
+                    skipped.log_skip(position + 1, _skip_entry(meta, reason), reason)
+                    continue
+                store.values[position][value_field] = created[parent]
+            ready.append(position)
+        if not ready:
+            continue
+
+        print(f"🌳 Level {depth + 1}/{len(levels)}: sending {len(ready)} records")
+        _, stats = handler({**payload, "records": [records[p] for p in ready]}, migration_type, api_url, auth_token, entity)
+
+        for row in stats.rows:
+            position = by_record_index.get(row.get("recordIndex")) if isinstance(row, dict) else None
+            if position is None:
+                continue
+            row["level"] = depth + 1
+            source_id = str(store.meta[position].get(source_field) or "")
+            if row.get("status") == "Success" and source_id and row.get("response_id") not in ("", None):
+                created[source_id] = known_ids[source_id] = row["response_id"]
+        # Level-local row numbers are mapped back to positions in the full payload
+        stats.success_indices = [ready[i - 1] + 1 for i in stats.success_indices if 0 < i <= len(ready)]
+        parts.append(stats)
+
+    stats = MigrationStats.merge(parts + [skipped])
+    stats.rows.sort(key=lambda row: row.get("recordIndex") or 0 if isinstance(row, dict) else 0)
+    summary = stats.summary()
+    summary["levels"] = len(levels)
+    summary["generatedAt"] = datetime.now().isoformat()
+    return summary, stats
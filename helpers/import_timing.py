@@ -0,0 +1,83 @@
+# helpers/import_timing.py
+# Cold-start benchmark for the runner: imports each module in fresh
+# interpreters under `python -X importtime` and reports the wall time over a
+# bare interpreter plus the slowest imports it pulled in.
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Repo root = parent of current script directory
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=repo_root, capture_output=True, text=True)
+    return time.perf_counter() - started, result
+
+
+def _parse_importtime(stderr):
+    """
+    Returns (cumulative µs of the last top-level import, [(name, µs)] of its
+    direct imports). Lines look like "import time:  412 |  9731 |   requests.sessions",
+    children are printed before their parent and indented two spaces per level.
+    """
+    pending, total, children = [], 0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue
+        name = name[1:].rstrip()
+        if not name.startswith(" "):
+            # A top-level import closes the group of direct imports printed before it
+            total, children, pending = cumulative, pending, []
+        elif not name.startswith("   "):
+            pending.append((name.strip(), cumulative))
+    return total, children
+
+
+def benchmark(modules, repeat=5):
+    """
+    Returns one entry per module: median and best wall time in ms above a bare
+    interpreter, the module's own cumulative import time, its direct imports
+    (cumulative µs, slowest first) and any import error.
+    """
+    baseline = statistics.median(_run("pass")[0] for _ in range(repeat))
+    results = []
+    for module in modules:
+        times, result = [], None
+        for _ in range(repeat):
+            elapsed, result = _run(f"import {module}")
+            times.append(elapsed - baseline)
+        error = None
+        if result.returncode != 0:
+            error = (result.stderr.strip().splitlines() or ["import failed"])[-1]
+        total_us, imports = _parse_importtime(result.stderr)
+        results.append({
+            "module": module,
+            "median_ms": round(statistics.median(times) * 1000, 1),
+            "best_ms": round(min(times) * 1000, 1),
+            "importtime_ms": round(total_us / 1000, 1),
+            "imports": sorted(imports, key=lambda item: item[1], reverse=True),
+            "error": error,
+        })
+    return results
+
+
+def format_report(results, top=10):
+    lines = []
+    for entry in results:
+        lines.append(f"⏱ {entry['module']}: {entry['median_ms']} ms median, {entry['best_ms']} ms best "
+                     f"({entry['importtime_ms']} ms in imports)")
+        if entry["error"]:
+            lines.append(f"   ❌ {entry['error']}")
+        for name, us in entry["imports"][:top]:
+            lines.append(f"   {us / 1000:8.1f} ms  {name}")
+    return "\n".join(lines)
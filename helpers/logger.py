@@ -1,8 +1,10 @@
 #helpers/logger.py
+import os
 import time
 import csv
 from datetime import datetime
 from pathlib import Path
+from helpers.run_context import artifact_path
 
 def debug(msg):
     print(f"🐛 [debug] {datetime.now().isoformat()} — {msg}")
@@ -12,10 +14,13 @@ class MigrationStats:
         self.total = 0
         self.success = 0
         self.skipped = 0
+        self.unchanged = 0
+        self.duplicates = 0
         self.errors = []
         self.rows = []
         self.start_time = time.time()
         self.skip_reasons = []
+        self.success_indices = []
 
     def log_success(self, row_index, log_entry, message=""):
         self.success += 1
@@ -23,6 +28,7 @@ class MigrationStats:
         log_entry["rowIndex"] = row_index
         if message:
             log_entry["message"] = str(message)   # ensure string
+        self.success_indices.append(row_index)
         self.rows.append(log_entry)
 
     def log_skip(self, row_index, log_entry, reason):
@@ -34,11 +40,47 @@ class MigrationStats:
         self.skip_reasons.append(str(reason))
         self.rows.append(log_entry)
 
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    @classmethod
+    def merge(cls, parts):
+        merged = cls()
+        for part in parts:
+            merged.total += part.total
+            merged.success += part.success
+            merged.skipped += part.skipped
+            merged.unchanged += part.unchanged
+            merged.duplicates += part.duplicates
+            merged.errors.extend(part.errors)
+            merged.rows.extend(part.rows)
+            merged.skip_reasons.extend(part.skip_reasons)
+            merged.success_indices.extend(part.success_indices)
+            merged.start_time = min(merged.start_time, part.start_time)
+        merged.success_indices.sort()
+        return merged
+
+    def log_unchanged(self, row_index, log_entry):
+        self.total += 1
+        self.unchanged += 1
+        log_entry["status"] = "Unchanged"
+        log_entry["rowIndex"] = row_index
+        self.rows.append(log_entry)
+
+    def log_duplicate(self, row_index, log_entry):
+        self.total += 1
+        self.duplicates += 1
+        log_entry["status"] = "Duplicate"
+        log_entry["rowIndex"] = row_index
+        self.rows.append(log_entry)
+
     def summary(self):
         return {
             "total": self.total,
             "success": self.success,
             "skipped": self.skipped,
+            "unchanged": self.unchanged,
+            "duplicates": self.duplicates,
             "errors": self.errors,
             "duration": round(time.time() - self.start_time, 2),
             "rows": self.rows
@@ -51,9 +93,10 @@ class MigrationStats:
 
         fieldnames = sorted({key for row in self.rows if isinstance(row, dict) for key in row.keys()})
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        path = f"{base_path}_{timestamp}.csv"
-        
+        # runs/<run_id>/<name>.csv inside a run, a uniquely stamped copy beside base_path outside one
+        stem = os.path.splitext(os.path.basename(base_path))[0]
+        path = artifact_path(stem, "csv", os.path.dirname(base_path) or ".")
+
         try:
             with open(path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
@@ -91,9 +134,7 @@ def build_log_entry(i, method, endpoint, record, get_log_field, get_record_id):
     }
 
 def write_detailed_audit_csv(stats, entity):
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    audit_path = Path(f"audit/migration_log_{entity}_{timestamp}.csv")
-    audit_path.parent.mkdir(parents=True, exist_ok=True)
+    audit_path = Path(artifact_path(f"migration_log_{entity}", "csv", "audit"))
 
     # Dynamically collect all unique fieldnames across all rows
     fieldnames = sorted({key for row in stats.rows if isinstance(row, dict) for key in row.keys()})
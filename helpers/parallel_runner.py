@@ -0,0 +1,86 @@
+# helpers/parallel_runner.py
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from helpers.record_store import RecordStore
+from helpers.logger import MigrationStats
+from helpers import request_engine
+from helpers.run_context import current_run_dir, set_run_dir
+
+# Rows sharing a dependency key (team, user, parent) always land in the same partition
+DEPENDENCY_FIELDS = {
+    "users": ("values", "email"),
+    "teams": ("values", "teamssourceid"),
+    "projects": ("values", "projectsourceid"),
+    "classifications": ("values", "parentId"),
+    "event_user_relationship": ("values", "RightHandId"),
+    "users_teams_role": ("meta", "id"),
+    "users_teams_unrelate": ("meta", "team_id"),
+    "teams_projects_relationship": ("meta", "id"),
+    "teams_projects_unrelate": ("meta", "id"),
+}
+
+
+def dependency_keys(store):
+    source, field = DEPENDENCY_FIELDS.get(store.adapter_key, ("values", None))
+    values = [row.get(field) for row in store.rows(source)] if field else [None] * len(store)
+    keys = store.keys()
+    return [
+        str(value).strip().lower() if value not in ("", None) else (keys[i] or "")
+        for i, value in enumerate(values)
+    ]
+
+
+def partition_records(store, workers):
+    """
+    Returns up to `workers` lists of record positions (0-based). Key groups are
+    kept whole and placed largest-first on the lightest partition.
+    """
+    groups = {}
+    for position, key in enumerate(dependency_keys(store)):
+        groups.setdefault(key, []).append(position)
+
+    partitions = [[] for _ in range(max(1, workers))]
+    for positions in sorted(groups.values(), key=len, reverse=True):
+        min(partitions, key=len).extend(positions)
+    return [sorted(p) for p in partitions if p]
+
+
+def _init_worker(rate_limiter, circuit_name, run_dir):
+    request_engine.set_rate_limiter(rate_limiter)
+    # Partition audits land in the parent's run directory
+    set_run_dir(run_dir)
+    # Each worker process watches the tenant through its own breaker
+    request_engine.set_circuit_breaker(request_engine.CircuitBreaker(circuit_name))
+
+
+def _run_partition(adapter_key, payload, migration_type, api_url, auth_token, entity):
+    from dispatcher import get_handler  # imported in the child to avoid a cycle
+    _, stats = get_handler(adapter_key)(payload, migration_type, api_url, auth_token, entity)
+    return stats
+
+
+def run_partitioned(adapter_key, payload, migration_type, api_url, auth_token, entity, workers=2, rate_limiter=None):
+    records = payload.get("records", [])
+    partitions = partition_records(RecordStore(records, adapter_key), workers)
+    print(f"🧩 Split {len(records)} records into {len(partitions)} partitions: {[len(p) for p in partitions]}")
+
+    with ProcessPoolExecutor(max_workers=len(partitions) or 1, initializer=_init_worker, initargs=(rate_limiter, adapter_key, current_run_dir())) as pool:
+        futures = [
+            pool.submit(_run_partition, adapter_key, {**payload, "records": [records[i] for i in positions]},
+                        migration_type, api_url, auth_token, entity)
+            for positions in partitions
+        ]
+        parts = [future.result() for future in futures]
+
+    # Partition-local row numbers are mapped back to positions in the full payload
+    for number, (positions, stats) in enumerate(zip(partitions, parts), start=1):
+        stats.success_indices = [positions[i - 1] + 1 for i in stats.success_indices if 0 < i <= len(positions)]
+        for row in stats.rows:
+            if isinstance(row, dict):
+                row["partition"] = number
+
+    stats = MigrationStats.merge(parts)
+    summary = stats.summary()
+    summary["partitions"] = len(partitions)
+    summary["generatedAt"] = datetime.now().isoformat()
+    return summary, stats
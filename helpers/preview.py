@@ -0,0 +1,106 @@
+# helpers/preview.py
+# Checks a CSV against an adapter from its first few rows only: header map
+# applied, missing columns listed and, on request, sample packets built from
+# an adapter run over just those rows.
+import csv
+import io
+import itertools
+import os
+import tempfile
+from config import PREVIEW_ROWS
+from helpers.adapter_loader import run_php_adapter
+from helpers.encoding_utils import detect_encoding, sniff_dialect
+
+
+def read_sample(stream, rows=PREVIEW_ROWS, truncated=False, dialect=csv.excel):
+    """
+    Reads the header and up to `rows` rows from a text stream and stops there.
+    `truncated` marks a stream cut at an arbitrary byte (a browser file.slice),
+    whose last row may be partial and is dropped.
+    """
+    reader = csv.reader(stream, dialect)
+    header = [column.strip() for column in next(reader, [])]
+    if header:
+        header[0] = header[0].lstrip("\ufeff")
+    sample = list(itertools.islice(reader, rows + 1 if truncated else rows))
+    if truncated and sample:
+        sample = sample[:rows] if len(sample) > rows else sample[:-1]
+    return header, [row for row in sample if any(cell.strip() for cell in row)]
+
+
+def map_header(info, header, migration_type=None):
+    # Adapters differ in case handling; match the map case-insensitively
+    header_map = {column.lower(): target for column, target in info.header_map.items()}
+    mapped = [{"column": column, "maps_to": header_map.get(column.lower(), column),
+               "known": column.lower() in header_map} for column in header]
+    present = {column.lower() for column in header}
+    missing = [column for column in info.required_headers(migration_type) if column.lower() not in present]
+    return mapped, missing
+
+
+def _preview_ctx(info, migration_type, record):
+    values = record.get("values") or record.get("Values") or {}
+    # Without a token there is no entity definition; let every emitted field through
+    definition = {"fieldDefinitionSet": {name: {"alias": name} for name in values}}
+    return {"api_url": "{api_url}", "migration_type": migration_type, "entity": info.entity,
+            "adapter_key": info.adapter_key, "definition": definition}
+
+
+def sample_packets(info, header, rows, migration_type):
+    """
+    Runs the adapter over a temp file holding only the sampled rows and
+    builds the packets the handler would send for them.
+    """
+    fd, path = tempfile.mkstemp(suffix=".csv", prefix="preview_")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        output = run_php_adapter(info.path, path, migration_type)
+    finally:
+        os.remove(path)
+
+    from helpers.entity_specs import ENTITY_SPECS  # pulls in the request stack; only needed for packets
+
+    if "error" in output:
+        return [], [f"Adapter error: {output['error']} {output.get('details', '')}".strip()]
+
+    spec = ENTITY_SPECS.get(output.get("adapter_key") or info.adapter_key)
+    packets, errors = [], []
+    for record in output.get("records", []):
+        if spec is None:
+            packets.append(record)
+            continue
+        try:
+            packet, params = spec.build_packet(record, _preview_ctx(info, migration_type, record))
+            packets.append({"packet": packet, "params": params})
+        except Exception as e:
+            errors.append(f"Packet build failed for row {record.get('meta', {}).get('rowIndex', '?')}: {e}")
+    return packets, errors
+
+
+def preview(info, stream, rows=PREVIEW_ROWS, migration_type="insert", packets=False, truncated=False,
+            encoding=None, dialect=None):
+    if isinstance(stream, (bytes, bytearray)):
+        encoding = encoding or detect_encoding(bytes(stream))
+        text = bytes(stream).decode(encoding, errors="replace")
+        dialect = dialect or sniff_dialect(text)
+        stream = io.StringIO(text)
+    dialect = dialect or csv.excel
+    header, sample = read_sample(stream, rows, truncated, dialect)
+    mapped, missing = map_header(info, header, migration_type)
+    result = {
+        "adapter": info.as_dict(),
+        "encoding": encoding,
+        "delimiter": dialect.delimiter,
+        "header": header,
+        "mapped": mapped,
+        "unknown": [m["column"] for m in mapped if not m["known"]] if info.header_map else [],
+        "missing": missing,
+        "rows": [dict(zip(header, row)) for row in sample],
+        "errors": [],
+    }
+    if packets and header and sample:
+        result["packets"], result["errors"] = sample_packets(info, header, sample, migration_type)
+    return result
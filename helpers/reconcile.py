@@ -0,0 +1,191 @@
+# helpers/reconcile.py
+# Reconcile mode for relationship loads: the CSV is the complete desired set
+# of pairs for every team it names. The current pairs of those teams are read
+# once, diffed locally as sets, and only the missing relates and the surplus
+# unrelates are sent, grouped per team. Teams not named in the CSV are left alone.
+from concurrent.futures import ThreadPoolExecutor
+from config import MAX_WORKERS, RECONCILE_SOURCES, REQUEST_TIMEOUT
+from helpers.logger import MigrationStats
+from helpers.reference_data import list_items
+from helpers.request_engine import send_request, get_rate_limiter, get_circuit_breaker
+from helpers.shared_logic import build_auth_headers
+
+UNRELATE_KEYS = {"users_teams_role": "users_teams_unrelate"}
+
+
+def supports_reconcile(adapter_key):
+    return adapter_key in RECONCILE_SOURCES
+
+
+def _int_or_str(value):
+    text = str(value).strip()
+    return int(text) if text.isdigit() else text
+
+
+def _team_of(record):
+    meta = record.get("meta", {}) if isinstance(record, dict) else {}
+    return str(meta.get("id") or record.get("id") or "").strip()
+
+
+def fetch_current(adapter_key, teams, api_url, auth_token):
+    """
+    Reads the current relationships of each team concurrently. Returns
+    ({team: items}, {team: error}) where items is the raw list from the API.
+    """
+    source = RECONCILE_SOURCES[adapter_key]
+    headers = build_auth_headers(auth_token)
+    limiter, breaker = get_rate_limiter(), get_circuit_breaker()
+
+    def fetch(team):
+        try:
+            response = send_request("GET", source["url"].format(api_url=api_url, team=team),
+                                    limiter=limiter, breaker=breaker, headers=headers, timeout=REQUEST_TIMEOUT)
+            if response.status_code != 200:
+                return team, None, f"HTTP {response.status_code}"
+            return team, list_items(response.json(), source.get("items")), None
+        except Exception as e:
+            return team, None, str(e)
+
+    current, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, max(len(teams), 1))) as pool:
+        for team, items, error in pool.map(fetch, teams):
+            if error is None:
+                current[team] = items
+            else:
+                errors[team] = error
+    return current, errors
+
+
+# === Teams ↔ Projects ===
+def _project_ids(items, field):
+    return {str(item.get(field) if isinstance(item, dict) else item) for item in items} - {"None", ""}
+
+
+def plan_teams_projects(records, current, field):
+    """Returns {team: (relate, unrelate)} for every team with a desired set."""
+    desired = {}
+    for record in records:
+        team = _team_of(record)
+        for project in record.get("projectOperations", {}).get("relate", []):
+            desired.setdefault(team, set()).add(str(project))
+    plan = {}
+    for team, wanted in desired.items():
+        if team in current:
+            have = _project_ids(current[team], field)
+            plan[team] = (sorted(wanted - have), sorted(have - wanted))
+    return plan
+
+
+def generated_index(n):
+    """
+    recordIndex of a row reconcile computed rather than read from the CSV.
+    Not a number, so it never collides with a CSV record and replay (which
+    resends CSV records by index) leaves it alone; reconcile again instead.
+    """
+    return f"reconcile-{n}"
+
+
+def _teams_projects_records(plan):
+    records = []
+    for team, (relate, unrelate) in plan.items():
+        if not relate and not unrelate:
+            continue
+        record_index = generated_index(len(records) + 1)
+        records.append({
+            "id": team,
+            "dataVersion": 1,
+            "projectOperations": {"relate": [_int_or_str(p) for p in relate], "unrelate": [_int_or_str(p) for p in unrelate]},
+            "values": {},
+            "meta": {"id": team, "team": team, "recordIndex": record_index,
+                     "project": " ".join([f"+{p}" for p in relate] + [f"-{p}" for p in unrelate])}
+        })
+    return records
+
+
+# === Teams ↔ Users (with stereotype) ===
+def plan_teams_users(records, current, user_field, stereotype_field):
+    """
+    Returns {team: (assign [(user, stereotype, record)], remove [user])}. A user
+    whose stereotype differs is re-assigned with the desired one.
+    """
+    desired = {}
+    for record in records:
+        team = _team_of(record)
+        desired.setdefault(team, {})[str(record.get("userId"))] = (str(record.get("stereotype") or ""), record)
+    plan = {}
+    for team, wanted in desired.items():
+        if team not in current:
+            continue
+        have = {str(item.get(user_field)): str(item.get(stereotype_field) or "")
+                for item in current[team] if isinstance(item, dict) and item.get(user_field) not in (None, "")}
+        assign = [(user, stereotype, record) for user, (stereotype, record) in wanted.items() if have.get(user) != stereotype]
+        remove = sorted(set(have) - set(wanted))
+        plan[team] = (assign, remove)
+    return plan
+
+
+def _teams_users_records(plan):
+    # Assignments are the CSV's own records (replayable by their index); removals are generated
+    assign, remove = [], []
+    for team, (to_assign, to_remove) in plan.items():
+        assign.extend(record for _, _, record in to_assign)
+        for user in to_remove:
+            remove.append({
+                "userId": _int_or_str(user),
+                "meta": {"id": user, "user_id": user, "team_id": team, "team": team, "user": user,
+                         "recordIndex": generated_index(len(remove) + 1)}
+            })
+    return assign, remove
+
+
+# === Entry point ===
+def run_reconcile(handler, unrelate_handler, store, payload, migration_type, api_url, auth_token, entity):
+    """
+    Sends the minimal relate/unrelate operations for the teams in the payload.
+    `unrelate_handler` handles the removals when they go through another
+    adapter key (team users); teams whose current state could not be read are skipped.
+    """
+    adapter_key = store.adapter_key
+    source = RECONCILE_SOURCES[adapter_key]
+    records = [record for record in store.records if isinstance(record, dict)]
+    teams = sorted({_team_of(record) for record in records} - {""})
+    current, errors = fetch_current(adapter_key, teams, api_url, auth_token)
+
+    parts = []
+    untouched = MigrationStats()
+    for record in records:
+        team = _team_of(record)
+        if team in errors or not team:
+            meta = record.get("meta", {})
+            reason = f"Could not read current relationships of team {team}: {errors[team]}" if team else "Missing team ID"
+            untouched.total += 1
+            untouched.log_skip(meta.get("recordIndex", ""), {"team": team, "recordIndex": meta.get("recordIndex", "")}, reason)
+
+    if adapter_key == "teams_projects_relationship":
+        plan = plan_teams_projects(records, current, source.get("id", "id"))
+        outgoing = _teams_projects_records(plan)
+        removals = []
+        counts = {"relate": sum(len(p[0]) for p in plan.values()), "unrelate": sum(len(p[1]) for p in plan.values())}
+        unchanged = [team for team, (relate, unrelate) in plan.items() if not relate and not unrelate]
+    else:
+        plan = plan_teams_users(records, current, source.get("user", "userId"), source.get("stereotype", "stereotype"))
+        outgoing, removals = _teams_users_records(plan)
+        counts = {"relate": len(outgoing), "unrelate": len(removals)}
+        unchanged = [team for team, (assign, remove) in plan.items() if not assign and not remove]
+
+    for team in unchanged:
+        untouched.log_unchanged("", {"team": team, "reason": "Team already matches the CSV"})
+    print(f"🔀 Reconcile {adapter_key}: {len(plan)} teams read, {counts['relate']} to relate, "
+          f"{counts['unrelate']} to unrelate, {len(unchanged)} teams unchanged, {len(errors)} unreadable")
+
+    if outgoing:
+        parts.append(handler({**payload, "records": outgoing}, migration_type, api_url, auth_token, entity)[1])
+    if removals:
+        unrelate_key = UNRELATE_KEYS[adapter_key]
+        parts.append(unrelate_handler({**payload, "adapter_key": unrelate_key, "records": removals},
+                                      migration_type, api_url, auth_token, entity)[1])
+
+    stats = MigrationStats.merge(parts + [untouched])
+    summary = stats.summary()
+    summary["reconcile"] = {"teams": len(plan), "unchanged_teams": len(unchanged), "unreadable_teams": len(errors), **counts}
+    return summary, stats
@@ -0,0 +1,109 @@
+# helpers/record_store.py
+import hashlib
+import json
+
+# Records without a *sourceid fall back to a natural key before hashing the packet
+NATURAL_KEYS = {
+    "classifications": ("parentId", "name"),
+}
+
+
+def record_values(record):
+    if not isinstance(record, dict):
+        return {}
+    if isinstance(record.get("values"), dict):
+        return record["values"]
+    if isinstance(record.get("Values"), dict):
+        return record["Values"]
+    payload = record.get("payload")
+    if isinstance(payload, dict) and isinstance(payload.get("values"), dict):
+        return payload["values"]
+    return {}
+
+
+def content_hash(record):
+    """
+    Hash of everything the handler sends — meta is logging only and is ignored.
+    """
+    body = {k: v for k, v in record.items() if k != "meta"} if isinstance(record, dict) else record
+    encoded = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def record_key(record, adapter_key=""):
+    values = record_values(record)
+    meta = record.get("meta", {}) if isinstance(record, dict) else {}
+    for source in (values, meta if isinstance(meta, dict) else {}):
+        for field, value in source.items():
+            if field.lower().endswith("sourceid") and value not in ("", None):
+                return f"{field}:{value}"
+
+    natural = NATURAL_KEYS.get(adapter_key)
+    if natural and all(values.get(f) not in ("", None) for f in natural):
+        return "natural:" + "|".join(str(values.get(f)).strip().lower() for f in natural)
+
+    # Relationship packets have no identity beyond their contents
+    return "packet:" + content_hash(record)
+
+
+class RecordStore:
+    """
+    Row index over adapter output: each record's meta and values (from the
+    values / Values / payload.values shapes) resolved once, and its record
+    key and content hash computed on first use. Every list shares the row
+    position of `records`, so stages filter by position lists. The records
+    stay dicts and the lists hold references to them, not copies.
+    """
+    def __init__(self, records, adapter_key=""):
+        self.records = records
+        self.adapter_key = adapter_key
+        self.valid = []
+        self.meta = []
+        self.values = []
+        for record in records:
+            is_dict = isinstance(record, dict)
+            meta = record.get("meta", {}) if is_dict else {}
+            self.valid.append(is_dict)
+            self.meta.append(meta if isinstance(meta, dict) else {})
+            self.values.append(record_values(record))
+        self._keys = None
+        self._hashes = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def rows(self, source="values"):
+        """The per-row dicts a field is read from: the resolved values, meta, or the record itself."""
+        if source == "meta":
+            return self.meta
+        if source == "record":
+            return [r if ok else {} for r, ok in zip(self.records, self.valid)]
+        return self.values
+
+    def record_indexes(self):
+        return [meta.get("recordIndex", i) for i, meta in enumerate(self.meta, start=1)]
+
+    def keys(self):
+        if self._keys is None:
+            self._keys = [record_key(r, self.adapter_key) if ok else None for r, ok in zip(self.records, self.valid)]
+        return self._keys
+
+    def hashes(self):
+        if self._hashes is None:
+            self._hashes = [content_hash(r) if ok else None for r, ok in zip(self.records, self.valid)]
+        return self._hashes
+
+    def take(self, positions):
+        return [self.records[i] for i in positions]
+
+    def subset(self, positions):
+        # Shares the already-resolved rows instead of re-walking the records
+        sub = RecordStore.__new__(RecordStore)
+        sub.adapter_key = self.adapter_key
+        sub.records = self.take(positions)
+        sub.valid = [self.valid[i] for i in positions]
+        sub.meta = [self.meta[i] for i in positions]
+        sub.values = [self.values[i] for i in positions]
+        sub._keys = [self._keys[i] for i in positions] if self._keys is not None else None
+        sub._hashes = [self._hashes[i] for i in positions] if self._hashes is not None else None
+        return sub
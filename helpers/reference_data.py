@@ -0,0 +1,160 @@
+# helpers/reference_data.py
+# Label → ID lookup maps fetched from the tenant once per run (classifications,
+# project groups, roles, teams) so adapters resolve names locally instead of
+# carrying hand-edited maps. Only the maps an adapter declares (@reference_data
+# in its docblock) are fetched, through the request engine under the tenant's
+# rate lease and a circuit breaker. Cached on disk per tenant and map set for
+# REFERENCE_TTL seconds; adapters read the cache file as a JSON sidecar named
+# by the MIGRATION_REFERENCE_FILE environment variable.
+import json
+import os
+import threading
+import time
+import requests
+from config import REFERENCE_DATA_ENABLED, REFERENCE_SOURCES, REFERENCE_TTL, REQUEST_TIMEOUT
+from helpers.request_engine import send_request, CircuitBreaker, CircuitOpen
+from helpers.shared_logic import build_auth_headers, tenant_from_url
+from helpers.tenant_governor import tenant_lease
+
+# Repo root = parent of current script directory
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(repo_root, "cache", "reference_data")
+SIDECAR_ENV = "MIGRATION_REFERENCE_FILE"
+
+
+def reference_path(base_url, names):
+    tenant = "".join(c if c.isalnum() or c in "-_." else "_" for c in tenant_from_url(base_url))
+    return os.path.join(CACHE_DIR, f"{tenant}.{'.'.join(sorted(names))}.json")
+
+
+def list_items(body, items_key=None):
+    # Lists come back bare or wrapped, depending on the endpoint
+    if items_key:
+        body = body.get(items_key, []) if isinstance(body, dict) else []
+    if isinstance(body, dict):
+        for key in ("items", "data", "results", "records"):
+            if isinstance(body.get(key), list):
+                return body[key]
+        return []
+    return body if isinstance(body, list) else []
+
+
+def descendants(by_id, parent_field, root_ids):
+    """The items below any of root_ids, at any depth."""
+    below = {}
+
+    def is_below(item_id, seen=()):
+        if item_id not in below:
+            parent = by_id.get(item_id, {}).get(parent_field)
+            if parent in root_ids:
+                below[item_id] = True
+            elif parent is None or parent not in by_id or parent in seen:
+                below[item_id] = False      # a top-level item, an unknown parent or a cycle
+            else:
+                below[item_id] = is_below(parent, (*seen, item_id))
+        return below[item_id]
+
+    return {item_id: item for item_id, item in by_id.items() if is_below(item_id)}
+
+
+def build_map(items, source):
+    """
+    Hashes items into {label: value}. With a "parent" field, every item is
+    also keyed by its "Parent:Label" path, the form the adapters' group
+    columns use. With a "root", only the items below the classification of
+    that name are hashed, so a same-named item in another tree cannot win.
+    """
+    key_field, value_field, parent_field = source.get("key", "name"), source.get("value", "id"), source.get("parent")
+    by_id = {item.get("id"): item for item in items if isinstance(item, dict)}
+    parents = by_id
+    if source.get("root"):
+        root_ids = {item_id for item_id, item in by_id.items() if str(item.get(key_field, "")).strip() == source["root"]}
+        if not root_ids:
+            print(f"⚠️ [reference_data] No '{source['root']}' classification on this tenant — its map is empty")
+        by_id = descendants(by_id, parent_field, root_ids)
+    lookup = {}
+    for item in by_id.values():
+        label, value = item.get(key_field), item.get(value_field)
+        if label in (None, "") or value in (None, ""):
+            continue
+        label = str(label).strip()
+        lookup.setdefault(label, value)
+        parent = parents.get(item.get(parent_field)) if parent_field else None
+        if parent is not None and parent.get(key_field):
+            lookup[f"{str(parent[key_field]).strip()}:{label}"] = value
+    return lookup
+
+
+def fetch_reference_data(base_url, token, sources=None):
+    """
+    Bulk-fetches every source (each distinct path once) and returns
+    ({map_name: {label: value}}, errors). The requests count against the
+    tenant's rate like a run's, and stop while the tenant is failing.
+    """
+    sources = REFERENCE_SOURCES if sources is None else sources
+    headers = build_auth_headers(token)
+    responses, maps, errors = {}, {}, []
+    breaker = CircuitBreaker("reference_data")
+    with tenant_lease(base_url) as limiter:
+        for name, source in sources.items():
+            path = source["path"]
+            if path not in responses:
+                try:
+                    response = send_request("GET", f"{base_url}{path}", limiter=limiter, breaker=breaker,
+                                            headers=headers, timeout=REQUEST_TIMEOUT)
+                    response.raise_for_status()
+                    responses[path] = response.json()
+                except (requests.exceptions.RequestException, CircuitOpen, ValueError) as e:
+                    responses[path] = None
+                    errors.append(f"{path}: {e}")
+                    print(f"⚠️ [reference_data] Could not load {path}: {e}")
+            if responses[path] is not None:
+                maps[name] = build_map(list_items(responses[path], source.get("items")), source)
+    return maps, errors
+
+
+def load_reference_data(base_url, token, names, ttl=REFERENCE_TTL, force=False):
+    """
+    Returns the path of a sidecar holding the tenant's `names` maps (an
+    adapter's reference_maps), fetching it when the cached copy is missing or
+    older than ttl; None when the adapter reads no maps. A fetch with errors
+    is used for this run but not cached, so the next run tries again.
+    """
+    unknown = [name for name in names if name not in REFERENCE_SOURCES]
+    if unknown:
+        print(f"⚠️ [reference_data] No source for {', '.join(unknown)} in REFERENCE_SOURCES — skipped")
+    names = [name for name in names if name in REFERENCE_SOURCES]
+    if not REFERENCE_DATA_ENABLED or not names:
+        return None
+    path = reference_path(base_url, names)
+    if not force and os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl:
+        print(f"📚 [reference_data] Using cached lookups {os.path.basename(path)}")
+        return path
+
+    started = time.time()
+    maps, errors = fetch_reference_data(base_url, token, {name: REFERENCE_SOURCES[name] for name in names})
+    # No timestamp inside: unchanged lookups give an identical file, so adapter cache keys stay stable
+    document = {"tenant": tenant_from_url(base_url), "maps": maps, "errors": errors}
+    if errors:
+        # Written beside the cache, never over it, so the cache check above never picks it up
+        path = f"{path[:-len('.json')]}.partial.json"
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"  # one per writer: other workers may be writing too
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f)
+    os.replace(tmp_path, path)
+    sizes = ", ".join(f"{name}={len(lookup)}" for name, lookup in maps.items())
+    print(f"📚 [reference_data] Fetched {sizes} in {time.time() - started:.2f}s")
+    return path
+
+
+def read_reference_data(path):
+    """The in-process form: {map_name: {label: value}} from a sidecar path."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("maps", {})
+
+
+def adapter_env(path):
+    return {SIDECAR_ENV: path} if path else {}
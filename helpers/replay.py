@@ -0,0 +1,90 @@
+# helpers/replay.py
+import json
+import os
+from dispatcher import dispatch, stamp_record_index
+from helpers.adapter_cache import load_cached_output
+from helpers.result_sinks import iter_rows
+from helpers.run_manifest import load_run_manifest
+
+# Outcomes worth sending again: 429 and 5xx answers, and rows that never reached
+# the server (NotSent: refused / connect timeout, CircuitOpen: the run gave up on
+# a failing tenant). 4xx answers are permanent, and a request that failed after
+# it was sent (a read timeout, logged as Exception) may already be committed
+RETRYABLE_STATUSES = {"429", "NotSent", "CircuitOpen"}
+
+# Manifest fields a replay run copies from the run it replays
+REPLAY_FIELDS = ("adapter_name", "adapter_key", "entity", "migration_type", "api_url", "base_url", "cache_key",
+                 "adapter_output")
+
+
+def is_retryable(row):
+    if row.get("status") not in ("Skipped", "Error"):
+        return False
+    status_code = str(row.get("status_code", ""))
+    return status_code in RETRYABLE_STATUSES or (len(status_code) == 3 and status_code.startswith("5"))
+
+
+def failed_record_indexes(row_log_path):
+    """
+    Reads a run's row log and returns the recordIndex of every retryable failure.
+    """
+    failed, generated = set(), 0
+    for row in iter_rows(row_log_path):
+        if not is_retryable(row):
+            continue
+        if str(row.get("recordIndex", "")).isdigit():
+            failed.add(int(row["recordIndex"]))
+        elif str(row.get("recordIndex", "")).startswith("reconcile-"):
+            generated += 1
+    if generated:
+        print(f"⚠️ {generated} failed rows were computed by reconcile, not read from the CSV — reconcile again to retry them")
+    return failed
+
+
+def load_run_output(manifest):
+    """
+    The adapter output a run sent: the copy kept in its run directory, or the
+    adapter cache for runs recorded before that copy was written.
+    """
+    path = manifest.get("adapter_output")
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    output = load_cached_output(manifest.get("cache_key") or "")
+    if output is None:
+        raise ValueError(f"Run {manifest['run_id']} has no adapter output to replay from: {path or 'none kept'} "
+                         f"and no cache entry — re-run the CSV instead")
+    return output
+
+
+def build_replay_payload(manifest, row_log_path=None):
+    row_log_path = row_log_path or manifest.get("row_log")
+    if not row_log_path or not os.path.exists(row_log_path):
+        raise ValueError(f"Run {manifest['run_id']} has no row log to replay from: {row_log_path}")
+
+    output = load_run_output(manifest)
+    records = output.get("records", [])
+    stamp_record_index(records)
+    failed = failed_record_indexes(row_log_path)
+    selected = [r for r in records if isinstance(r, dict) and r.get("meta", {}).get("recordIndex") in failed]
+    print(f"🔁 Replay of {manifest['run_id']}: {len(selected)} of {len(records)} records failed with a retryable status")
+    # Adapter drops were counted by the original run; a replay resends records only
+    output.pop("droppedRecords", None)
+    return {**output, "records": selected}
+
+
+def replay_run(run_id, auth_token, row_log_path=None, workers=1, rate_limit=0):
+    manifest = load_run_manifest(run_id)
+    payload = build_replay_payload(manifest, row_log_path)
+    summary, stats = dispatch(
+        manifest["adapter_key"],
+        payload,
+        manifest["migration_type"],
+        manifest["api_url"],
+        auth_token,
+        manifest["entity"],
+        workers=workers,
+        rate_limit=rate_limit
+    )
+    summary["replayOf"] = run_id
+    return manifest, payload, summary, stats
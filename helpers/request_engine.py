@@ -0,0 +1,317 @@
+# helpers/request_engine.py
+import asyncio
+import collections
+import multiprocessing
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from config import (ASYNC_TRANSPORT_ENABLED, REQUEST_TIMEOUT, CIRCUIT_CONSECUTIVE_FAILURES, CIRCUIT_ERROR_RATE,
+                    CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_PROBE_INITIAL, CIRCUIT_PROBE_MAX, CIRCUIT_MAX_PAUSE)
+
+POOL_SIZE = 32
+
+_local = threading.local()
+
+
+class RateLimiter:
+    """
+    Spaces requests evenly at `rate` per second. The slot counter and interval
+    live in shared memory so one limiter can be handed to every worker process,
+    and a governor can change the rate while the run is in flight.
+    """
+    def __init__(self, rate):
+        self._interval = multiprocessing.Value("d", 1.0 / rate if rate and rate > 0 else 0, lock=False)
+        self.next_slot = multiprocessing.Value("d", 0.0, lock=False)
+        self.lock = multiprocessing.Lock()
+
+    @property
+    def interval(self):
+        return self._interval.value
+
+    def set_rate(self, rate):
+        self._interval.value = 1.0 / rate if rate and rate > 0 else 0
+
+    def reserve(self):
+        """Claims the next slot and returns how long to wait for it."""
+        if not self.interval:
+            return 0
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot.value)
+            self.next_slot.value = slot + self.interval
+        return slot - now
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of sending once the tenant has failed for longer than CIRCUIT_MAX_PAUSE."""
+
+
+# Statuses that count against the tenant; 4xx are the row's fault and 429 is the rate limiter's job
+FAILURE_STATUSES = (500, 502, 503, 504)
+
+
+class CircuitBreaker:
+    """
+    Pauses a run while the tenant is failing. Closed: everything is sent and
+    outcomes are counted. Open: nothing is sent until the next probe time,
+    then one request goes through (half-open); success closes the circuit,
+    failure re-opens it with the probe interval doubled. Only the probe's
+    outcome moves an open circuit: requests already in flight when it
+    tripped finish without closing it or doubling the interval. After max_pause
+    seconds open, every request raises CircuitOpen so the rest of the run
+    ends quickly and is left to replay.
+    """
+    def __init__(self, name="", consecutive=CIRCUIT_CONSECUTIVE_FAILURES, error_rate=CIRCUIT_ERROR_RATE,
+                 window=CIRCUIT_WINDOW, min_calls=CIRCUIT_MIN_CALLS, probe_initial=CIRCUIT_PROBE_INITIAL,
+                 probe_max=CIRCUIT_PROBE_MAX, max_pause=CIRCUIT_MAX_PAUSE):
+        self.name = name
+        self.consecutive = consecutive
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.probe_initial = probe_initial
+        self.probe_max = probe_max
+        self.max_pause = max_pause
+        self.lock = threading.Lock()
+        self.outcomes = collections.deque(maxlen=window)
+        self.failures_in_row = 0
+        self.state = "closed"
+        self.opened_at = None
+        self.next_probe = 0.0
+        self.probe_interval = probe_initial
+        self.probing = False
+        self.trips = 0
+        self.paused_seconds = 0.0
+
+    def _trip(self, now):
+        if self.state == "closed":
+            self.trips += 1
+            self.opened_at = now
+            self.probe_interval = self.probe_initial
+            print(f"🔌 [circuit] {self.name}: tripped after {self.failures_in_row} failures in a row "
+                  f"({sum(self.outcomes)}/{len(self.outcomes)} recent) — pausing {self.probe_interval}s")
+        else:
+            self.probe_interval = min(self.probe_interval * 2, self.probe_max)
+            print(f"🔌 [circuit] {self.name}: probe failed — next probe in {self.probe_interval}s")
+        self.state = "open"
+        self.probing = False
+        self.next_probe = now + self.probe_interval
+
+    def admit(self):
+        """
+        Returns (delay, probe): delay 0 when a request may be sent now, or the
+        seconds to wait before asking again; probe True for the half-open
+        request. Raises CircuitOpen once the run should give up.
+        """
+        with self.lock:
+            if self.state == "closed":
+                return 0, False
+            now = time.time()
+            if self.state == "abandoned" or now - self.opened_at > self.max_pause:
+                if self.state != "abandoned":
+                    print(f"⛔ [circuit] {self.name}: still failing after {self.max_pause}s — remaining rows are left for replay")
+                    self.state = "abandoned"
+                raise CircuitOpen(f"Circuit open: {self.name} failing since {time.strftime('%H:%M:%S', time.localtime(self.opened_at))}")
+            if self.probing or now < self.next_probe:
+                return max(self.next_probe - now, 0.5), False
+            self.probing = True     # this caller is the half-open probe
+            return 0, True
+
+    def record(self, failed, probe=False):
+        """`probe` is what wait() returned for this request."""
+        with self.lock:
+            now = time.time()
+            if self.state != "closed":
+                if not probe:
+                    return          # sent before the trip; only the probe decides
+                if failed:
+                    self._trip(now)
+                else:
+                    self.paused_seconds += now - self.opened_at
+                    print(f"🔌 [circuit] {self.name}: probe succeeded — resuming after {now - self.opened_at:.0f}s")
+                    self.state = "closed"
+                    self.probing = False
+                    self.failures_in_row = 0
+                    self.outcomes.clear()
+                return
+            self.outcomes.append(1 if failed else 0)
+            if not failed:
+                self.failures_in_row = 0
+                return
+            self.failures_in_row += 1
+            rate_tripped = (len(self.outcomes) >= self.min_calls
+                            and sum(self.outcomes) / len(self.outcomes) >= self.error_rate)
+            if self.failures_in_row >= self.consecutive or rate_tripped:
+                self._trip(now)
+
+    def cancel_probe(self, probe):
+        # The probe never got an answer to record (e.g. the caller was interrupted); let another request probe
+        if probe:
+            with self.lock:
+                self.probing = False
+
+    def wait(self):
+        """Blocks until a request may be sent; returns True when it is the half-open probe."""
+        while True:
+            delay, probe = self.admit()
+            if not delay:
+                return probe
+            time.sleep(min(delay, 1.0))
+
+    async def wait_async(self):
+        while True:
+            delay, probe = self.admit()
+            if not delay:
+                return probe
+            await asyncio.sleep(min(delay, 1.0))
+
+    def snapshot(self):
+        return {"state": self.state, "trips": self.trips, "paused_seconds": round(self.paused_seconds, 1)}
+
+
+def _failed_response(response):
+    return response.status_code in FAILURE_STATUSES
+
+
+def set_circuit_breaker(breaker):
+    # Per thread like the rate limiter: one breaker per run
+    _local.circuit_breaker = breaker
+
+
+def get_circuit_breaker():
+    return getattr(_local, "circuit_breaker", None)
+
+
+def set_rate_limiter(limiter):
+    # Per thread: concurrent runs in one web process each keep their own budget
+    _local.rate_limiter = limiter
+
+
+def get_rate_limiter():
+    return getattr(_local, "rate_limiter", None)
+
+
+_adapter = []
+_adapter_lock = threading.Lock()
+
+
+def shared_adapter():
+    # One connection pool per process (urllib3 pools are thread-safe), so
+    # sender threads of every run, including concurrent batch entries, reuse
+    # the same keep-alive connections; worker processes each build their own
+    with _adapter_lock:
+        if not _adapter:
+            _adapter.append(HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+        return _adapter[0]
+
+
+def get_session():
+    # Sessions stay per thread (cookies and state are not thread-safe); the pool underneath is shared
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = shared_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def send_request(method, url, limiter=None, breaker=None, **kwargs):
+    # Sender threads don't inherit the run's thread-local limiter or breaker, so callers pass them
+    limiter = limiter or get_rate_limiter()
+    breaker = breaker or get_circuit_breaker()
+    probe = breaker.wait() if breaker is not None else False
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    try:
+        if limiter is not None:
+            limiter.acquire()
+        response = get_session().request(method, url, **kwargs)
+    except requests.exceptions.RequestException:
+        if breaker is not None:
+            breaker.record(True, probe)
+        raise
+    except BaseException:
+        if breaker is not None:
+            breaker.cancel_probe(probe)
+        raise
+    if breaker is not None:
+        breaker.record(_failed_response(response), probe)
+    return response
+
+
+def never_sent(error):
+    """True when a request failed before reaching the server (refused, DNS, connect timeout), so resending cannot duplicate it."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    httpx = _load_httpx()
+    return httpx is not None and isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+# === Async transport ===
+_httpx = []
+
+
+def _load_httpx():
+    # Imported on first use: httpx (and h2) cost more start-up time than a short CLI run needs
+    if not _httpx:
+        try:
+            import httpx
+        except ImportError:  # httpx is optional — async specs fall back to the threaded path
+            httpx = None
+        _httpx.append(httpx)
+    return _httpx[0]
+
+
+def async_available():
+    return ASYNC_TRANSPORT_ENABLED and _load_httpx() is not None
+
+
+def async_timeout(timeout):
+    # requests takes (connect, read); httpx wants a Timeout object
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return _load_httpx().Timeout(read, connect=connect)
+
+
+def async_client(max_in_flight):
+    httpx = _load_httpx()
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    try:
+        # HTTP/2 multiplexes the in-flight requests over a few connections
+        return httpx.AsyncClient(http2=True, limits=limits, timeout=async_timeout(REQUEST_TIMEOUT))
+    except ImportError:  # the h2 extra is not installed
+        return httpx.AsyncClient(limits=limits, timeout=async_timeout(REQUEST_TIMEOUT))
+
+
+async def send_request_async(client, method, url, limiter=None, breaker=None, **kwargs):
+    limiter = limiter or get_rate_limiter()
+    breaker = breaker or get_circuit_breaker()
+    probe = await breaker.wait_async() if breaker is not None else False
+    if isinstance(kwargs.get("timeout"), tuple):
+        kwargs["timeout"] = async_timeout(kwargs["timeout"])
+    try:
+        if limiter is not None:
+            delay = limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        response = await client.request(method, url, **kwargs)
+    except _load_httpx().HTTPError:
+        if breaker is not None:
+            breaker.record(True, probe)
+        raise
+    except BaseException:   # includes cancellation
+        if breaker is not None:
+            breaker.cancel_probe(probe)
+        raise
+    if breaker is not None:
+        breaker.record(_failed_response(response), probe)
+    return response
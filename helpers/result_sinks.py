@@ -0,0 +1,239 @@
+# helpers/result_sinks.py
+# Where a run's row log is written, once the run has finished, from the rows
+# it collected. Every sink takes rows one at a time; NDJSON and SQLite write
+# them out as they come, CSV needs the union of all keys for its header and
+# Parquet a column schema, so those two hold rows until close. iter_rows()
+# reads any of them back as dicts. sqlite3 and pyarrow are imported by the
+# sinks that use them, so the CLI's --help stays cheap.
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+
+ROW_TABLE = "rows"
+SQLITE_BATCH = 1000
+INDEXED_COLUMNS = ("status", "status_code", "recordIndex")
+
+
+def _plain(value):
+    # Nested structures become JSON text so every format stores a scalar
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str, ensure_ascii=False)
+    return value
+
+
+class ResultSink(ABC):
+    extension = ""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+
+    @abstractmethod
+    def write(self, row):
+        """Takes one row (a dict) of the log."""
+
+    def write_all(self, rows):
+        for row in rows:
+            if isinstance(row, dict):
+                self.write(row)
+        return self
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(ResultSink):
+    extension = "csv"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        self.count += 1
+
+    def close(self):
+        fieldnames = sorted({key for row in self.rows for key in row.keys()})
+        with open(self.path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for row in self.rows:
+                writer.writerow({key: row.get(key, "") for key in fieldnames})
+        self.rows = []
+
+
+class NdjsonSink(ResultSink):
+    extension = "ndjson"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, row):
+        self.file.write(json.dumps(row, default=str, ensure_ascii=False))
+        self.file.write("\n")
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+class SqliteSink(ResultSink):
+    """
+    One `rows` table, columns added as new keys appear; values keep their
+    types (SQLite columns are untyped), nested values are stored as JSON text.
+    Column names are case-insensitive in SQLite, so keys differing only in
+    case (id / ID) share a column, and a "seq" key is stored as seq_value.
+    """
+    extension = "sqlite"
+
+    def __init__(self, path):
+        import sqlite3
+
+        super().__init__(path)
+        if os.path.exists(path):
+            os.remove(path)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(f"CREATE TABLE {ROW_TABLE} (seq INTEGER PRIMARY KEY)")
+        self.columns = []
+        self.column_for = {"seq": "seq"}      # case-folded name -> column
+        self.pending = []
+
+    def _column(self, key):
+        name = str(key).replace('"', "")
+        if name.casefold() == "seq":
+            name = "seq_value"                # the row number column
+        column = self.column_for.get(name.casefold())
+        if column is None:
+            self.flush()
+            self.conn.execute(f'ALTER TABLE {ROW_TABLE} ADD COLUMN "{name}"')
+            self.columns.append(name)
+            column = self.column_for[name.casefold()] = name
+        return column
+
+    def write(self, row):
+        mapped = {}
+        for key, value in row.items():
+            column = self._column(key)
+            # Keys folded onto one column keep the first non-empty value
+            if mapped.get(column) in ("", None):
+                mapped[column] = value
+        self.pending.append(mapped)
+        self.count += 1
+        if len(self.pending) >= SQLITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        names = ", ".join(f'"{column}"' for column in self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        self.conn.executemany(f"INSERT INTO {ROW_TABLE} ({names}) VALUES ({marks})",
+                              [[_plain(row.get(column)) for column in self.columns] for row in self.pending])
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        for column in INDEXED_COLUMNS:
+            if column in self.columns:
+                self.conn.execute(f'CREATE INDEX idx_rows_{column} ON {ROW_TABLE} ("{column}")')
+        self.conn.commit()
+        self.conn.close()
+
+
+class ParquetSink(ResultSink):
+    """Columnar output through pyarrow (optional). A column mixing types is stored as text."""
+    extension = "parquet"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        self.count += 1
+
+    def close(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        keys = sorted({key for row in self.rows for key in row.keys()})
+        columns = {}
+        for key in keys:
+            values = [_plain(row.get(key)) for row in self.rows]
+            kinds = {type(value) for value in values if value is not None and value != ""}
+            if len(kinds) > 1 or kinds - {int, float, bool}:
+                values = [None if value is None else str(value) for value in values]
+            else:
+                values = [None if value == "" else value for value in values]
+            columns[key] = values
+        pq.write_table(pa.table(columns), self.path)
+        self.rows = []
+
+
+SINKS = {sink.extension: sink for sink in (CsvSink, NdjsonSink, ParquetSink, SqliteSink)}
+
+
+def available_formats():
+    formats = ["csv", "ndjson", "sqlite"]
+    try:
+        import pyarrow  # noqa: F401 — optional, only needed for Parquet
+        formats.insert(2, "parquet")
+    except ImportError:
+        pass
+    return formats
+
+
+def check_formats(formats):
+    """Validates a list of sink names and returns it without duplicates, in order."""
+    formats = list(dict.fromkeys(fmt.strip().lower() for fmt in formats if fmt and fmt.strip()))
+    for fmt in formats:
+        if fmt not in SINKS:
+            raise ValueError(f"Unknown result format '{fmt}' (choose from {', '.join(SINKS)})")
+        if fmt not in available_formats():
+            raise ValueError(f"Result format '{fmt}' needs pyarrow, which is not installed")
+    return formats
+
+
+def write_rows(rows, path, fmt):
+    """Writes rows to `path` through the `fmt` sink and returns the path."""
+    with SINKS[fmt](path) as sink:
+        sink.write_all(rows)
+    return path
+
+
+def iter_rows(path):
+    """Reads a row log written by any sink, choosing the reader by extension."""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "ndjson":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == "sqlite":
+        import sqlite3
+
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            for row in conn.execute(f"SELECT * FROM {ROW_TABLE} ORDER BY seq"):
+                yield {key: row[key] for key in row.keys() if key != "seq" and row[key] is not None}
+        finally:
+            conn.close()
+    elif extension == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches():
+            for row in batch.to_pylist():
+                yield {key: value for key, value in row.items() if value is not None}
+    else:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
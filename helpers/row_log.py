@@ -0,0 +1,52 @@
+# helpers/row_log.py
+# Serves a finished run's rows from its row log (the audit file on disk, in
+# whichever sink format it was written) a page at a time, so responses carry
+# counters only and the browser never holds every row at once.
+import os
+from config import ROW_PAGE_SIZE, ROW_PAGE_MAX
+from helpers.result_sinks import iter_rows
+
+# Query parameters matched exactly against a row log column
+ROW_FILTERS = ("status", "status_code", "result", "level")
+# Columns searched by the free-text `q` filter
+SEARCH_FIELDS = ("name", "reason", "message", "response", "id", "sourceRow")
+
+
+def response_summary(summary):
+    """The summary without its row list and error messages, for JSON responses."""
+    slim = {key: value for key, value in summary.items() if key not in ("rows", "errors")}
+    slim["error_count"] = len(summary.get("errors") or [])
+    return slim
+
+
+def _matches(row, filters, q):
+    for field, value in filters.items():
+        if str(row.get(field, "")) != value:
+            return False
+    if q:
+        return any(q in str(row.get(field, "")).lower() for field in SEARCH_FIELDS)
+    return True
+
+
+def read_rows(path, page=1, per_page=ROW_PAGE_SIZE, q=None, **filters):
+    """
+    Streams the row log and returns (rows, total) for one page of the rows
+    that pass the filters. Only the requested page is kept in memory.
+    """
+    per_page = max(1, min(per_page, ROW_PAGE_MAX))
+    page = max(1, page)
+    filters = {field: str(value) for field, value in filters.items() if field in ROW_FILTERS and value not in (None, "")}
+    q = (q or "").strip().lower()
+    if not path or not os.path.exists(path):
+        # A run where every record was filtered out writes no row log
+        return [], 0
+
+    start = (page - 1) * per_page
+    rows, total = [], 0
+    for row in iter_rows(path):
+        if not _matches(row, filters, q):
+            continue
+        if start <= total < start + per_page:
+            rows.append(row)
+        total += 1
+    return rows, total
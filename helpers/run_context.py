@@ -0,0 +1,67 @@
+# helpers/run_context.py
+# Where the files of the run in progress go. Every run works in its own
+# directory, runs/<run_id>/ (manifest, row logs, handler audits, debug dumps).
+# The current run is kept per thread like the rate limiter, so concurrent runs
+# in one web process, or entries of one batch, never write to the same path.
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Repo root = parent of current script directory
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS_DIR = os.path.join(repo_root, "runs")
+
+_local = threading.local()
+
+
+def run_dir(run_id):
+    if not re.fullmatch(r"[\w-]+", str(run_id or "")):
+        raise ValueError(f"Invalid run id: {run_id!r}")
+    return os.path.join(RUNS_DIR, run_id)
+
+
+@contextmanager
+def run_scope(run_id):
+    """Artifacts written in this thread while inside go to runs/<run_id>/."""
+    path = run_dir(run_id)
+    os.makedirs(path, exist_ok=True)
+    previous = getattr(_local, "run_dir", None)
+    _local.run_dir = path
+    try:
+        yield path
+    finally:
+        _local.run_dir = previous
+
+
+def set_run_dir(path):
+    # For worker processes, which do not inherit the parent thread's scope
+    _local.run_dir = path
+
+
+def current_run_dir():
+    return getattr(_local, "run_dir", None)
+
+
+def artifact_path(stem, extension, fallback_dir):
+    """
+    Claims a new file for an artifact and returns its path: `stem.extension` in
+    the current run's directory (stem_2, stem_3 ... when the run writes it more
+    than once), or a timestamped name in fallback_dir outside a run. The file is
+    created exclusively, so two writers can never be handed the same path.
+    """
+    directory = current_run_dir()
+    if directory is None:
+        directory = fallback_dir
+        stem = f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    os.makedirs(directory, exist_ok=True)
+    attempt = 1
+    while True:
+        name = f"{stem}.{extension}" if attempt == 1 else f"{stem}_{attempt}.{extension}"
+        path = os.path.join(directory, name)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            attempt += 1
@@ -0,0 +1,142 @@
+# helpers/run_history.py
+# One row per run in an SQLite file, indexed for the questions people actually
+# ask ("failed team loads on tenant X last week") instead of grepping CSVs.
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+from config import RUN_HISTORY_DB, RUN_HISTORY_PAGE_SIZE
+from helpers.shared_logic import tenant_from_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id          TEXT PRIMARY KEY,
+    tenant          TEXT NOT NULL,
+    entity          TEXT,
+    adapter         TEXT,
+    adapter_key     TEXT,
+    migration_type  TEXT,
+    status          TEXT NOT NULL,
+    started_at      TEXT NOT NULL,
+    finished_at     TEXT,
+    duration        REAL,
+    total           INTEGER DEFAULT 0,
+    success         INTEGER DEFAULT 0,
+    skipped         INTEGER DEFAULT 0,
+    unchanged       INTEGER DEFAULT 0,
+    duplicates      INTEGER DEFAULT 0,
+    replay_of       TEXT,
+    config          TEXT,
+    artifacts       TEXT,
+    message         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_tenant_entity ON runs (tenant, entity, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_adapter ON runs (adapter, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at);
+"""
+
+FILTERS = ("tenant", "entity", "adapter", "status")
+
+
+def _connect(db_path=None):
+    db_path = db_path or RUN_HISTORY_DB
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the web app read history while a CLI run is writing to it
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def run_status(summary):
+    if not summary.get("total"):
+        return "empty"
+    if not summary.get("skipped"):
+        return "success"
+    return "partial" if summary.get("success") else "failed"
+
+
+def record_history(run_id, summary=None, status=None, message="", artifacts=None, **config):
+    """
+    Inserts or replaces the history row for a run. `config` holds what the run
+    was asked to do (adapter, entity, api_url...); it is stored whole as JSON,
+    the indexed fields are pulled out into their own columns.
+    """
+    summary = summary or {}
+    finished = datetime.now()
+    duration = summary.get("duration") or 0
+    row = {
+        "run_id": run_id,
+        "tenant": tenant_from_url(config.get("api_url") or config.get("base_url")),
+        "entity": config.get("entity"),
+        "adapter": config.get("adapter_name"),
+        "adapter_key": config.get("adapter_key"),
+        "migration_type": config.get("migration_type"),
+        "status": status or run_status(summary),
+        "started_at": (finished - timedelta(seconds=duration)).isoformat(timespec="seconds"),
+        "finished_at": finished.isoformat(timespec="seconds"),
+        "duration": duration,
+        "total": summary.get("total", 0),
+        "success": summary.get("success", 0),
+        "skipped": summary.get("skipped", 0),
+        "unchanged": summary.get("unchanged", 0),
+        "duplicates": summary.get("duplicates", 0),
+        "replay_of": config.get("replay_of"),
+        "config": json.dumps(config, default=str),
+        "artifacts": json.dumps(artifacts or {}, default=str),
+        "message": str(message)[:1000]
+    }
+    columns = ", ".join(row)
+    placeholders = ", ".join(f":{k}" for k in row)
+    try:
+        with closing(_connect()) as conn, conn:
+            conn.execute(f"INSERT OR REPLACE INTO runs ({columns}) VALUES ({placeholders})", row)
+    except sqlite3.Error as e:
+        # History is bookkeeping; never fail a finished migration over it
+        print(f"⚠️ [run_history] Could not record run {run_id}: {e}")
+    return row
+
+
+def _decode(row):
+    run = dict(row)
+    run["config"] = json.loads(run["config"] or "{}")
+    run["artifacts"] = json.loads(run["artifacts"] or "{}")
+    return run
+
+
+def query_runs(page=1, per_page=RUN_HISTORY_PAGE_SIZE, since=None, until=None, **filters):
+    """
+    Returns (runs, total) newest first. Filters are exact matches on the
+    indexed columns; since/until are ISO timestamps compared against started_at.
+    """
+    clauses, params = [], []
+    for field in FILTERS:
+        if filters.get(field):
+            clauses.append(f"{field} = ?")
+            params.append(filters[field])
+    if since:
+        clauses.append("started_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("started_at < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    page = max(int(page), 1)
+    per_page = min(max(int(per_page), 1), 500)
+    with closing(_connect()) as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM runs {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM runs {where} ORDER BY started_at DESC LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page]
+        ).fetchall()
+    return [_decode(r) for r in rows], total
+
+
+def get_run(run_id):
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    return _decode(row) if row else None
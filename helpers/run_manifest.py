@@ -0,0 +1,52 @@
+# helpers/run_manifest.py
+import json
+import os
+import uuid
+from datetime import datetime
+from helpers.run_context import run_dir
+from helpers.run_history import record_history
+
+
+def new_run_id():
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def manifest_path(run_id):
+    return os.path.join(run_dir(run_id), "manifest.json")
+
+
+def write_run_manifest(run_id, **fields):
+    """
+    Records what a run needs to be replayed later: adapter, entity, target
+    API, adapter cache key and where its row log was written.
+    """
+    path = manifest_path(run_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    manifest = {"run_id": run_id, "createdAt": datetime.now().isoformat(), **fields}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    print(f"🧾 Run manifest written to {path}")
+    return manifest
+
+
+def load_run_manifest(run_id):
+    path = manifest_path(run_id)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No manifest for run '{run_id}' at {path}")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record_run(run_id, summary, report_files, **fields):
+    manifest = write_run_manifest(
+        run_id,
+        row_log=report_files.get("row_log"),
+        result_formats=list(report_files.get("paths", {})) or None,
+        total=summary["total"],
+        success=summary["success"],
+        skipped=summary["skipped"],
+        **fields
+    )
+    artifacts = {"row_log": report_files.get("row_log"), **report_files.get("paths", {}), "manifest": manifest_path(run_id)}
+    record_history(run_id, summary, artifacts=artifacts, **fields)
+    return manifest
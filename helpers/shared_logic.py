@@ -1,5 +1,18 @@
 # helpers/shared_logic.py
+import copy
+import hashlib
+import threading
+import time
 import requests
+from urllib.parse import urlparse
+from config import DEFINITION_CACHE_TTL
+
+TOKEN_EXPIRY_MARGIN = 60    # seconds before expiry a cached token is replaced
+
+_token_cache = {}           # (tenant, email, password digest) -> (token, expires_at)
+_token_lock = threading.Lock()
+_definition_cache = {}      # (definition_url, Authorization) -> (definition, fetched_at)
+_definition_lock = threading.Lock()
 
 def auto_map_fields(adapter_record, entity_definition, operation_mode="insert"):
     if operation_mode == "insert":
@@ -11,6 +24,22 @@ def auto_map_fields(adapter_record, entity_definition, operation_mode="insert"):
 
 # === Validate Payload Structure ===
 def fetch_entity_definition(definition_url, headers):
+    """
+    Fetches an entity definition, reusing one fetched with the same token in
+    the last DEFINITION_CACHE_TTL seconds (batch runs load the same entity
+    many times). Callers get their own copy.
+    """
+    key = (definition_url, headers.get("Authorization"))
+    with _definition_lock:
+        cached = _definition_cache.get(key)
+    if cached and time.time() - cached[1] < DEFINITION_CACHE_TTL:
+        return copy.deepcopy(cached[0])
+    definition = _fetch_entity_definition(definition_url, headers)
+    with _definition_lock:
+        _definition_cache[key] = (definition, time.time())
+    return copy.deepcopy(definition)
+
+def _fetch_entity_definition(definition_url, headers):
     response = requests.get(definition_url, headers=headers)
 
     # print("🔗 Definition URL:", definition_url)
@@ -68,4 +97,43 @@ def build_auth_headers(token):
     return {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
-    }
\ No newline at end of file
+    }
+
+def tenant_from_url(url):
+    # https://shenderdemo.example.com/... → 'shenderdemo'
+    hostname = urlparse(url).hostname if url else None
+    return hostname.split(".")[0] if hostname else "default"
+
+def get_bearer_token(email, password, base_url):
+    """
+    Password-grant token for the tenant, cached in-process until shortly
+    before it expires so repeated runs (batch entries, app requests) sign in once.
+    """
+    tenant = tenant_from_url(base_url)
+    key = (tenant, email, hashlib.sha256(str(password).encode("utf-8")).hexdigest())
+    with _token_lock:
+        cached = _token_cache.get(key)
+        if cached and cached[1] > time.time():
+            return cached[0]
+        token, expires_in = _request_bearer_token(email, password, tenant)
+        _token_cache[key] = (token, time.time() + max(expires_in - TOKEN_EXPIRY_MARGIN, 0))
+        return token
+
+def _request_bearer_token(email, password, tenant):
+    region = "australia-east"
+    token_url = "https://auth.mysite-preview.com.au/connect/token"
+
+    client_id = f"xxxxxxxxxx:{region}:{tenant}:xxxxxxxxxxxx"
+    payload = {
+        "grant_type": "password",
+        "client_id": client_id,
+        "scope": "openid profile mysite.xxxxxxxxxxxxxxxxxx.api",
+        "username": email,
+        "password": password
+    }
+
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    response = requests.post(token_url, data=payload, headers=headers)
+    response.raise_for_status()
+    body = response.json()
+    return body["access_token"], int(body.get("expires_in", 3600))
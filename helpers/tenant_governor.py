@@ -0,0 +1,147 @@
+# helpers/tenant_governor.py
+# Splits one request budget per tenant fairly between every run hitting it.
+# Runs in this process are tracked in memory; runs in other processes (CLI,
+# other app workers) are seen through a lease table in a small SQLite file.
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from config import TENANT_RATE_LIMIT, TENANT_LEASE_SHARED, TENANT_LEASE_DB
+from helpers.request_engine import RateLimiter
+from helpers.shared_logic import tenant_from_url
+
+LEASE_TTL = 30          # seconds a lease survives without a heartbeat (crashed runs age out)
+REFRESH_INTERVAL = 5    # seconds between heartbeats / recounts of other processes' runs
+
+_active = {}            # tenant -> {lease_id: limiter} for runs in this process
+_active_lock = threading.Lock()
+_refreshers = {}        # lease_id -> the thread running its latest background refresh
+
+
+def _connect(db_path):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS leases (
+            lease_id    TEXT PRIMARY KEY,
+            tenant      TEXT NOT NULL,
+            pid         INTEGER,
+            expires_at  REAL NOT NULL
+        )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leases_tenant ON leases (tenant, expires_at)")
+    return conn
+
+
+class GovernedLimiter(RateLimiter):
+    """
+    A RateLimiter whose rate is the tenant budget divided by the number of
+    active runs on that tenant, optionally capped by the run's own --rate.
+    A run alone on its tenant is held only to its own --rate (0 = unlimited).
+    """
+    def __init__(self, tenant, budget, cap=0, shared=TENANT_LEASE_SHARED, db_path=None):
+        super().__init__(budget)
+        self.tenant = tenant
+        self.budget = budget
+        self.cap = cap
+        self.shared = shared
+        self.db_path = db_path or TENANT_LEASE_DB
+        self.lease_id = uuid.uuid4().hex
+        self.next_refresh = multiprocessing.Value("d", 0.0, lock=False)
+
+    def fair_rate(self, active):
+        if active <= 1:
+            return self.cap
+        share = self.budget / max(active, 1)
+        return min(share, self.cap) if self.cap else share
+
+    def reserve(self):
+        if self.shared:
+            with self.lock:
+                due = time.time() >= self.next_refresh.value
+                if due:
+                    self.next_refresh.value = time.time() + REFRESH_INTERVAL
+            if due:
+                # SQLite can block for seconds under contention; the caller may be an event loop
+                refresher = threading.Thread(target=self.refresh, name=f"lease-{self.tenant}", daemon=True)
+                _refreshers[self.lease_id] = refresher
+                refresher.start()
+        return super().reserve()
+
+    def refresh(self):
+        """Heartbeats this run's lease and re-reads how many runs share the tenant."""
+        try:
+            now = time.time()
+            with closing(_connect(self.db_path)) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (lease_id, tenant, pid, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.lease_id, self.tenant, os.getpid(), now + LEASE_TTL)
+                )
+                conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+                active = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE tenant = ? AND expires_at >= ?", (self.tenant, now)
+                ).fetchone()[0]
+        except sqlite3.Error as e:
+            # Fall back to what this process knows rather than stalling requests
+            print(f"⚠️ [tenant_governor] Lease table unavailable, using in-process count: {e}")
+            active = len(_active.get(self.tenant, {}))
+        self.set_rate(self.fair_rate(active))
+        return active
+
+    def release(self):
+        if not self.shared:
+            return
+        # A heartbeat still in flight would write the lease back after it is deleted
+        refresher = _refreshers.pop(self.lease_id, None)
+        if refresher is not None:
+            refresher.join()
+        try:
+            with closing(_connect(self.db_path)) as conn, conn:
+                conn.execute("DELETE FROM leases WHERE lease_id = ?", (self.lease_id,))
+        except sqlite3.Error as e:
+            print(f"⚠️ [tenant_governor] Could not release lease {self.lease_id}: {e}")
+
+
+def _rebalance(tenant):
+    # Called with _active_lock held; pushes the new share into every local run
+    runs = _active.get(tenant, {})
+    for limiter in runs.values():
+        if limiter.shared:
+            limiter.refresh()
+        else:
+            limiter.set_rate(limiter.fair_rate(len(runs)))
+
+
+@contextmanager
+def tenant_lease(api_url, rate_cap=0):
+    """
+    Yields the rate limiter a run should use against api_url's tenant, and
+    gives its share back to the other runs when the block exits.
+    """
+    if not TENANT_RATE_LIMIT:
+        yield RateLimiter(rate_cap) if rate_cap else None
+        return
+
+    tenant = tenant_from_url(api_url)
+    limiter = GovernedLimiter(tenant, TENANT_RATE_LIMIT, cap=rate_cap)
+    if limiter.shared:
+        limiter.refresh()   # take the lease first so the rebalance below counts this run
+    with _active_lock:
+        _active.setdefault(tenant, {})[limiter.lease_id] = limiter
+        _rebalance(tenant)
+    rate = f"{round(1 / limiter.interval, 2)} req/s" if limiter.interval else "unlimited"
+    print(f"🚦 Tenant {tenant}: {rate} for this run")
+    try:
+        yield limiter
+    finally:
+        limiter.release()
+        with _active_lock:
+            runs = _active.get(tenant, {})
+            runs.pop(limiter.lease_id, None)
+            if runs:
+                _rebalance(tenant)
+            else:
+                _active.pop(tenant, None)
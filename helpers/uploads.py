@@ -0,0 +1,41 @@
+# helpers/uploads.py
+import os
+import tempfile
+from config import UPLOAD_CHUNK_SIZE, MAX_UPLOAD_BYTES, UPLOAD_DIR
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def spool_upload(file_storage, suffix=".csv", max_bytes=MAX_UPLOAD_BYTES, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Copies an uploaded file to disk chunk by chunk and returns the path.
+    The upload is never held in memory as a whole.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="upload_", dir=UPLOAD_DIR)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file_storage.stream.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    print(f"📁 Upload spooled to {path} ({written} bytes)")
+    return path
+
+
+def discard_upload(path):
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError as e:
+        print(f"⚠️ Could not remove spooled upload {path}: {e}")
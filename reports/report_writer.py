@@ -1,34 +1,52 @@
 import json
-import csv
 import os
-from datetime import datetime
-from openpyxl import Workbook
-from fpdf import FPDF
 from pathlib import Path
-
-def generate_report_files(summary, adapter_name, entity, migration_type):
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_name = f"migration_api_{adapter_name}_{timestamp}"
-    output_dir = Path(__file__).resolve().parent.parent / "auditreports"
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    csv_path = output_dir / f"{base_name}.csv"
-
-    write_csv(summary["rows"], csv_path)
-
-    return {
-        "csv": csv_path.name
-    }
+from config import RESULT_FORMATS
+from helpers.result_sinks import SINKS, CsvSink, check_formats, write_rows
+from helpers.run_context import artifact_path
+
+# openpyxl and fpdf are imported inside write_xlsx / write_pdf: only the row
+# log is written per run, and both libraries are slow to import
+
+def generate_report_files(summary, adapter_name, entity, migration_type, formats=None):
+    """
+    Writes the run's rows through each selected sink (RESULT_FORMATS by
+    default) into the run's directory and returns {format: file name},
+    "paths" ({format: path}) and "row_log", the path of the first format
+    written (CSV when every selected format fails).
+    """
+    formats = check_formats(formats or RESULT_FORMATS) or ["csv"]
+    # auditreports/ only when called outside a run scope
+    fallback_dir = Path(__file__).resolve().parent.parent / "auditreports"
+
+    report_files = {"paths": {}, "row_log": None}
+    # A run where every record was filtered out has no rows and writes no log
+    if summary["rows"]:
+        for fmt in formats:
+            path = artifact_path(f"migration_api_{adapter_name}", SINKS[fmt].extension, fallback_dir)
+            try:
+                write_rows(summary["rows"], path, fmt)
+            except Exception as e:
+                # The requests have already been sent; one failing sink must not cost the run its row log
+                print(f"❌ [generate_report_files] {fmt} row log failed: {e}")
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            report_files[fmt] = os.path.basename(path)
+            report_files["paths"][fmt] = path
+        if not report_files["paths"]:
+            path = artifact_path(f"migration_api_{adapter_name}", "csv", fallback_dir)
+            report_files["csv"] = os.path.basename(write_rows(summary["rows"], path, "csv"))
+            report_files["paths"]["csv"] = path
+        report_files["row_log"] = next(iter(report_files["paths"].values()))
+    report_files["csv_path"] = report_files["paths"].get("csv")
+    return report_files
 
 def write_csv(rows, path):
     if not rows:
         return
-    fieldnames = sorted({key for row in rows if isinstance(row, dict) for key in row.keys()})
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({key: row.get(key, "") for key in fieldnames})
+    with CsvSink(path) as sink:
+        sink.write_all(rows)
 
 def write_xlsx(rows, path):
     if not rows:
@@ -68,6 +86,8 @@ def write_xlsx(rows, path):
 def write_pdf(rows, path):
     if not rows:
         return
+    from fpdf import FPDF
+
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=10)
@@ -0,0 +1,10 @@
+# tests/conftest.py
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def lease_db(tmp_path, monkeypatch):
+    # Runs started by tests lease from a table of their own, never run_history/leases.sqlite
+    path = tmp_path / "leases.sqlite"
+    monkeypatch.setattr("helpers.tenant_governor.TENANT_LEASE_DB", str(path))
+    return path
@@ -0,0 +1,93 @@
+# tests/test_adapter_stream.py
+# Reading adapter output record by record while the adapter runs. A small
+# script named `php` on PATH prints what adapters/lib/csv_stream.php would.
+import os
+import stat
+import sys
+
+import pytest
+
+from dispatcher import dispatch
+from helpers.adapter_loader import stream_php_adapter
+
+STREAMED = ('{"generatedAt":"2026-01-01T00:00:00+00:00","adapter_key":"users","records":[\n'
+            '{"values":{"name":"a"},"meta":{"rowIndex":2}},\n'
+            '{"values":{"name":"b"},"meta":{"rowIndex":3}}\n'
+            '],"recordCount":2,"droppedRecords":[{"rowIndex":4,"reason":"JSON encoding failed"}]}\n')
+
+
+@pytest.fixture
+def fake_php(tmp_path, monkeypatch):
+    def install(stdout, exit_status=0):
+        (tmp_path / "out.txt").write_text(stdout, encoding="utf-8")
+        script = tmp_path / "php"
+        script.write_text(f"#!{sys.executable}\n"
+                          f"import sys\n"
+                          f"sys.stdout.write(open({str(tmp_path / 'out.txt')!r}, encoding='utf-8').read())\n"
+                          f"sys.exit({exit_status})\n")
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+        adapter = tmp_path / "Adapter.php"
+        adapter.write_text("<?php\n")
+        upload = tmp_path / "input.csv"
+        upload.write_text("name\na\n")
+        return str(adapter), str(upload)
+    return install
+
+
+def test_records_are_read_one_at_a_time_and_the_tail_is_added(fake_php, tmp_path):
+    adapter, upload = fake_php(STREAMED)
+    tee = tmp_path / "adapter_output.json"
+    with stream_php_adapter(adapter, upload, "insert", tee_path=str(tee)) as output:
+        assert output["adapter_key"] == "users"
+        assert "droppedRecords" not in output       # written after the records
+        names = [record["values"]["name"] for record in output["records"]]
+        assert names == ["a", "b"]
+        assert output["recordCount"] == 2
+        assert output["droppedRecords"][0]["rowIndex"] == 4
+    assert tee.read_text(encoding="utf-8") == STREAMED
+
+
+def test_an_error_document_is_parsed_whole(fake_php):
+    adapter, upload = fake_php('{"error":"CSV file is empty or malformed"}', exit_status=1)
+    with stream_php_adapter(adapter, upload, "insert") as output:
+        assert output["error"] == "Adapter execution failed"
+
+
+def test_an_adapter_dying_mid_stream_fails_the_run(fake_php):
+    adapter, upload = fake_php(STREAMED.split("]")[0].rsplit("\n", 2)[0] + "\n", exit_status=255)
+    with stream_php_adapter(adapter, upload, "insert") as output:
+        with pytest.raises(RuntimeError, match="cut short"):
+            list(output["records"])
+
+
+def test_dispatch_sends_streamed_records_and_counts_the_drops(fake_php, monkeypatch):
+    adapter, upload = fake_php(STREAMED)
+    seen = []
+
+    def handler(payload, *args):
+        from helpers.logger import MigrationStats
+        stats = MigrationStats()
+        for record in payload["records"]:
+            seen.append(record["meta"]["recordIndex"])
+            stats.total += 1
+            stats.success += 1
+        return stats.summary(), stats
+
+    monkeypatch.setattr("dispatcher.get_handler", lambda key: handler)
+    monkeypatch.setattr("dispatcher.tenant_lease", _no_lease)
+    with stream_php_adapter(adapter, upload, "insert") as output:
+        summary, stats = dispatch("users", output, "insert", "https://tenant.example.com/api/entities/user", "t", "users")
+    assert seen == [1, 2]
+    assert summary["total"] == 3 and summary["skipped"] == 1
+
+
+class _no_lease:
+    def __init__(self, api_url, rate_limit):
+        pass
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
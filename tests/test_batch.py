@@ -0,0 +1,36 @@
+# tests/test_batch.py
+# Batch manifest loading: defaults, shared keys and per-entry row log formats.
+import json
+
+import pytest
+
+from helpers.batch import load_batch_manifest
+
+CREDENTIALS = {"base_url": "https://tenant.example.com/api", "email": "a@example.com", "password": "pw"}
+
+
+def write_manifest(tmp_path, *entries):
+    path = tmp_path / "batch.json"
+    path.write_text(json.dumps({**CREDENTIALS, "entries": list(entries)}), encoding="utf-8")
+    return str(path)
+
+
+def entry(**fields):
+    return {"adapter": "Users", "csv": "users.csv", "entity": "users", **fields}
+
+
+def test_a_single_format_name_is_one_format(tmp_path):
+    entries = load_batch_manifest(write_manifest(tmp_path, entry(format="ndjson"), entry(format=["CSV", "sqlite", "csv"]),
+                                                 entry()))
+    assert [e["format"] for e in entries] == [["ndjson"], ["csv", "sqlite"], None]
+    assert entries[0]["csv"] == str(tmp_path / "users.csv")
+
+
+@pytest.mark.parametrize("fmt, message", [
+    ("xlsx", "Unknown result format 'xlsx'"),
+    (["csv", "json"], "Unknown result format 'json'"),
+    (3, "format must be"),
+])
+def test_bad_formats_fail_at_load(tmp_path, fmt, message):
+    with pytest.raises(ValueError, match=f"Batch entry 2: {message}"):
+        load_batch_manifest(write_manifest(tmp_path, entry(), entry(format=fmt)))
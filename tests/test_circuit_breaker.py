@@ -0,0 +1,86 @@
+# tests/test_circuit_breaker.py
+# The breaker's state machine: only the half-open probe moves an open circuit.
+import pytest
+
+from helpers import request_engine
+from helpers.request_engine import CircuitBreaker, CircuitOpen
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(request_engine.time, "time", clock)
+    return clock
+
+
+def tripped(clock, **options):
+    breaker = CircuitBreaker("test", consecutive=3, min_calls=100, probe_initial=5, probe_max=300,
+                             max_pause=900, **options)
+    for _ in range(3):
+        breaker.record(True)
+    assert breaker.state == "open"
+    return breaker
+
+
+def test_trips_after_consecutive_failures(clock):
+    breaker = tripped(clock)
+    assert breaker.trips == 1
+    assert breaker.probe_interval == 5
+    delay, probe = breaker.admit()
+    assert delay > 0 and not probe
+
+
+def test_in_flight_failures_do_not_double_the_interval(clock):
+    breaker = tripped(clock)
+    for _ in range(200):
+        breaker.record(True)
+    assert breaker.probe_interval == 5
+    assert breaker.next_probe == clock.now + 5
+
+
+def test_in_flight_success_does_not_close(clock):
+    breaker = tripped(clock)
+    breaker.record(False)
+    assert breaker.state == "open"
+
+
+def test_failed_probe_doubles_and_successful_probe_closes(clock):
+    breaker = tripped(clock)
+    clock.now += 5
+    assert breaker.admit() == (0, True)
+    # Only one probe at a time
+    assert breaker.admit()[1] is False
+    breaker.record(True, probe=True)
+    assert breaker.state == "open"
+    assert breaker.probe_interval == 10
+
+    clock.now += 10
+    assert breaker.admit() == (0, True)
+    breaker.record(False, probe=True)
+    assert breaker.state == "closed"
+    assert breaker.admit() == (0, False)
+    assert breaker.paused_seconds == 15
+
+
+def test_cancelled_probe_lets_another_request_probe(clock):
+    breaker = tripped(clock)
+    clock.now += 5
+    assert breaker.admit() == (0, True)
+    breaker.cancel_probe(True)
+    assert breaker.admit() == (0, True)
+
+
+def test_gives_up_after_max_pause(clock):
+    breaker = tripped(clock)
+    clock.now += 901
+    with pytest.raises(CircuitOpen):
+        breaker.admit()
+    assert breaker.state == "abandoned"
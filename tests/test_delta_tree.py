@@ -0,0 +1,75 @@
+# tests/test_delta_tree.py
+# Delta runs of a classification tree: a changed child whose local parent is
+# unchanged (and so not re-sent) is attached to the ID created by an earlier run.
+import copy
+import itertools
+
+import dispatcher
+import helpers.delta_store as delta_store
+from helpers.logger import MigrationStats
+
+API_URL = "https://tenant.example.com/api/entities/classification"
+
+
+def classification(row, source_id, name, parent_local=""):
+    return {
+        "values": {"classificationType": 2, "dataVersion": 0, "deleted": False, "description": "",
+                   "name": name, "parentId": None if parent_local else 1},
+        "meta": {"rowIndex": row, "sourceId": source_id, "parentLocalId": parent_local, "name": name},
+    }
+
+
+def tree(grandchild_name="C"):
+    return [
+        classification(2, "A", "A"),
+        classification(3, "B", "B", parent_local="A"),
+        classification(4, "C", grandchild_name, parent_local="B"),
+    ]
+
+
+class FakeApi:
+    """Stands in for the generic handler: every record is created with the next ID."""
+    def __init__(self):
+        self.ids = itertools.count(100)
+        self.sent = []
+
+    def __call__(self, payload, migration_type, api_url, auth_token, entity):
+        stats = MigrationStats()
+        for i, record in enumerate(payload["records"], start=1):
+            self.sent.append(copy.deepcopy(record))
+            stats.total += 1
+            stats.log_success(i, {"recordIndex": record["meta"]["recordIndex"], "response_id": next(self.ids)})
+        return stats.summary(), stats
+
+
+def run(api, records, monkeypatch):
+    monkeypatch.setattr(dispatcher, "get_handler", lambda adapter_key: api)
+    return dispatcher.dispatch("classifications", {"records": records}, "insert", API_URL, "token",
+                               "classification", delta=True)
+
+
+def test_changed_child_of_unchanged_parent_uses_saved_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta_store, "DELTA_DIR", str(tmp_path))
+    api = FakeApi()
+
+    summary, _ = run(api, tree(), monkeypatch)
+    assert summary["success"] == 3
+    assert [r["values"]["parentId"] for r in api.sent] == [1, 100, 101]
+
+    api.sent.clear()
+    summary, stats = run(api, tree(grandchild_name="C renamed"), monkeypatch)
+    assert summary["success"] == 1
+    assert summary["skipped"] == 0
+    assert stats.unchanged == 2
+    assert [r["values"]["name"] for r in api.sent] == ["C renamed"]
+    assert api.sent[0]["values"]["parentId"] == 101
+
+
+def test_unknown_local_parent_is_still_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta_store, "DELTA_DIR", str(tmp_path))
+    api = FakeApi()
+
+    summary, stats = run(api, [classification(2, "C", "C", parent_local="B")], monkeypatch)
+    assert summary["success"] == 0
+    assert summary["skipped"] == 1
+    assert "Local parent 'B' is not in this payload" in stats.skip_reasons[0]
@@ -0,0 +1,57 @@
+# tests/test_reconcile.py
+# Reconcile diffs, and the recordIndex of the rows it generates.
+from handlers.generic import RowJob, prepare
+from helpers.entity_specs import ENTITY_SPECS
+from helpers.reconcile import (plan_teams_projects, plan_teams_users, _teams_projects_records,
+                               _teams_users_records)
+from helpers.replay import failed_record_indexes
+from helpers.result_sinks import write_rows
+
+
+def team_projects(team, projects, record_index):
+    return {"projectOperations": {"relate": projects, "unrelate": []},
+            "meta": {"id": team, "recordIndex": record_index}}
+
+
+def team_user(team, user, stereotype, record_index):
+    return {"userId": user, "stereotype": stereotype, "meta": {"id": team, "recordIndex": record_index}}
+
+
+def test_teams_projects_diff_is_per_team():
+    records = [team_projects("10", [1, 2], 1), team_projects("10", [3], 2), team_projects("20", [5], 3),
+               team_projects("30", [7], 4)]
+    current = {"10": [{"id": 2}, {"id": 4}], "20": [{"id": 5}]}    # team 30 could not be read
+    plan = plan_teams_projects(records, current, "id")
+    assert plan == {"10": (["1", "3"], ["4"]), "20": ([], [])}
+
+    outgoing = _teams_projects_records(plan)
+    assert len(outgoing) == 1
+    assert outgoing[0]["projectOperations"] == {"relate": [1, 3], "unrelate": [4]}
+    # A computed diff is not CSV record 1
+    assert outgoing[0]["meta"]["recordIndex"] == "reconcile-1"
+
+
+def test_teams_users_assigns_changed_stereotypes_and_removes_the_rest():
+    records = [team_user("10", 1, "Viewer", 1), team_user("10", 2, "Editor", 2)]
+    current = {"10": [{"userId": 1, "stereotype": "Viewer"}, {"userId": 2, "stereotype": "Viewer"},
+                      {"userId": 3, "stereotype": "Viewer"}, {"userId": 4, "stereotype": "Editor"}]}
+    plan = plan_teams_users(records, current, "userId", "stereotype")
+    assign, remove = _teams_users_records(plan)
+
+    assert [r["meta"]["recordIndex"] for r in assign] == [2]
+    assert [r["userId"] for r in remove] == [3, 4]
+    assert [r["meta"]["recordIndex"] for r in remove] == ["reconcile-1", "reconcile-2"]
+
+
+def test_generated_rows_keep_their_index_and_are_not_replayed(tmp_path):
+    remove = _teams_users_records({"10": ([], ["3"])})[1]
+    ctx = {"api_url": "https://tenant.example.com/api/security", "migration_type": "insert",
+           "entity": "team", "adapter_key": "users_teams_unrelate", "definition": None}
+    job = prepare(RowJob(1, remove[0]), ENTITY_SPECS["users_teams_unrelate"], ctx)
+    assert job.log_entry["recordIndex"] == "reconcile-1"
+
+    row_log = write_rows([
+        {**job.log_entry, "status": "Skipped", "result": "Error", "status_code": 500},
+        {"recordIndex": 2, "status": "Skipped", "result": "Error", "status_code": 503},
+    ], str(tmp_path / "rows.csv"), "csv")
+    assert failed_record_indexes(row_log) == {2}
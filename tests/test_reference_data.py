@@ -0,0 +1,31 @@
+# tests/test_reference_data.py
+# Lookup maps built from the tenant's reference lists.
+from config import REFERENCE_SOURCES
+from helpers.adapter_registry import adapters
+from helpers.reference_data import build_map, load_reference_data
+
+CLASSIFICATIONS = [
+    {"id": 1, "name": "Project Groups", "parentId": None},
+    {"id": 2, "name": "North", "parentId": 1},
+    {"id": 3, "name": "Project Group1", "parentId": 2},
+    {"id": 10, "name": "Regions", "parentId": None},
+    {"id": 11, "name": "North", "parentId": 10},
+    {"id": 12, "name": "Project Group1", "parentId": 11},
+]
+
+
+def test_project_groups_come_from_their_own_tree():
+    lookup = build_map(CLASSIFICATIONS, REFERENCE_SOURCES["projectGroups"])
+    assert lookup == {"North": 2, "Project Groups:North": 2, "Project Group1": 3, "North:Project Group1": 3}
+
+
+def test_classifications_keep_every_tree():
+    lookup = build_map(CLASSIFICATIONS, REFERENCE_SOURCES["classifications"])
+    assert lookup["Regions:North"] == 11 and lookup["Project Groups:North"] == 2
+
+
+def test_only_adapters_declaring_maps_fetch_them():
+    declared = {name: info.reference_maps for name, info in adapters().items() if info.reference_maps}
+    assert declared == {"Projects": ["projectGroups"], "Users": ["roles"]}
+    # Nothing to fetch: no request is made and the adapter gets no sidecar
+    assert load_reference_data("https://tenant.example.com/api", "token", adapters()["Teams"].reference_maps) is None
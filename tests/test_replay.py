@@ -0,0 +1,65 @@
+# tests/test_replay.py
+# Which failed rows a replay resends, and where it finds their records.
+import json
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from handlers.generic import RowJob, _failed
+from helpers.replay import is_retryable, build_replay_payload
+from helpers.request_engine import CircuitOpen
+from helpers.result_sinks import write_rows
+
+
+def failed_row(record_index, status_code):
+    return {"recordIndex": record_index, "status": "Skipped", "result": "Error", "status_code": status_code}
+
+
+@pytest.mark.parametrize("status_code, retryable", [
+    (429, True), (500, True), (503, True), (504, True),
+    ("NotSent", True), ("CircuitOpen", True),
+    (400, False), (401, False), (409, False), (422, False),
+    ("Exception", False),      # a read timeout: the POST may have been committed
+])
+def test_only_rows_the_server_never_took_are_retryable(status_code, retryable):
+    assert is_retryable(failed_row(1, status_code)) is retryable
+
+
+def test_successful_rows_are_not_retryable():
+    assert not is_retryable({"recordIndex": 1, "status": "Success", "result": "Success", "status_code": 503})
+
+
+def test_failures_are_marked_by_whether_the_request_went_out():
+    refused = requests.exceptions.ConnectionError(
+        MaxRetryError(None, "/", NewConnectionError(None, "refused")))
+    cases = [(refused, "NotSent"), (requests.exceptions.ConnectTimeout(), "NotSent"),
+             (requests.exceptions.ReadTimeout(), "Exception"), (CircuitOpen("tenant down"), "CircuitOpen")]
+    for error, status_code in cases:
+        job = RowJob(1, {})
+        _failed(job, error)
+        assert job.status_code == status_code
+
+
+def test_replay_reads_the_output_kept_with_the_run(tmp_path):
+    output = {"adapter_key": "users", "records": [{"values": {"name": n}} for n in "abcd"],
+              "droppedRecords": [{"rowIndex": 9, "reason": "JSON encoding failed"}]}
+    output_path = tmp_path / "adapter_output.json"
+    output_path.write_text(json.dumps(output), encoding="utf-8")
+    row_log = write_rows([failed_row(1, 503), failed_row(2, 422), failed_row(3, "Exception"),
+                          failed_row(4, "NotSent")], str(tmp_path / "rows.csv"), "csv")
+    # No cache entry: the run used --no_cache or its entry was evicted
+    manifest = {"run_id": "r1", "row_log": row_log, "cache_key": None, "adapter_output": str(output_path)}
+
+    payload = build_replay_payload(manifest)
+    assert [r["values"]["name"] for r in payload["records"]] == ["a", "d"]
+    # The original run already logged the adapter's drops as skipped
+    assert "droppedRecords" not in payload
+
+
+def test_replay_without_any_output_says_so(tmp_path):
+    row_log = write_rows([failed_row(1, 503)], str(tmp_path / "rows.csv"), "csv")
+    manifest = {"run_id": "r1", "row_log": row_log, "cache_key": None,
+                "adapter_output": str(tmp_path / "missing.json")}
+    with pytest.raises(ValueError, match="no adapter output to replay from"):
+        build_replay_payload(manifest)
@@ -0,0 +1,58 @@
+# tests/test_tenant_governor.py
+# Fair shares of a tenant's request budget, and lease heartbeats kept off the caller's thread.
+import asyncio
+import threading
+import time
+
+from helpers import tenant_governor
+from helpers.tenant_governor import GovernedLimiter, tenant_lease
+
+API_URL = "https://tenant.example.com/api/entities/user"
+
+
+def test_runs_on_one_tenant_split_the_budget(lease_db, monkeypatch):
+    monkeypatch.setattr(tenant_governor, "TENANT_RATE_LIMIT", 20)
+    with tenant_lease(API_URL, rate_cap=0) as first:
+        assert first.db_path == str(lease_db)
+        assert first.interval == 0                  # alone: only its own cap, none here
+        with tenant_lease(API_URL, rate_cap=0) as second:
+            assert first.interval == second.interval == 1 / 10
+        assert first.interval == 0
+    assert lease_db.exists()
+
+
+def test_a_capped_run_keeps_its_cap_when_alone(monkeypatch):
+    monkeypatch.setattr(tenant_governor, "TENANT_RATE_LIMIT", 20)
+    with tenant_lease(API_URL, rate_cap=4) as limiter:
+        assert limiter.interval == 1 / 4
+
+
+def test_heartbeat_does_not_block_the_event_loop(lease_db):
+    limiter = GovernedLimiter("tenant", 20)
+    refreshed = threading.Event()
+    refresh_threads = []
+
+    def slow_refresh():
+        refresh_threads.append(threading.current_thread())
+        time.sleep(0.5)        # a lease table locked by another process
+        refreshed.set()
+
+    limiter.refresh = slow_refresh
+
+    async def reserve():
+        started = time.monotonic()
+        limiter.reserve()
+        return time.monotonic() - started, threading.current_thread()
+
+    elapsed, loop_thread = asyncio.run(reserve())
+    assert elapsed < 0.25
+    assert refreshed.wait(2)
+    assert refresh_threads and refresh_threads[0] is not loop_thread
+
+
+def test_release_waits_for_an_in_flight_heartbeat(lease_db):
+    limiter = GovernedLimiter("tenant", 20)
+    limiter.reserve()                               # first call is due: heartbeat on a thread
+    limiter.release()
+    with tenant_governor.closing(tenant_governor._connect(str(lease_db))) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0] == 0